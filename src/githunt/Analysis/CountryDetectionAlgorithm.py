@@ -1,27 +1,12 @@
 from datetime import datetime, timezone, timedelta
-from zoneinfo import ZoneInfo, available_timezones
-from typing import Iterable, Optional
+from typing import Iterable
 from loguru import logger
-from countryinfo import CountryInfo
-
-import pytz
-import countryflag
 
 from githunt.Classes.CountryResult import CountryResult
-
-WAKE_START = 6
-WAKE_END = 23 # Inclusive
-
-def build_tz_to_country_map() -> dict[str, list[str]]:
-    tz_to_countries: dict[str, list[str]] = {}
-    for cc, tzs in pytz.country_timezones.items():
-        for tz in tzs:
-            tz_to_countries.setdefault(tz, []).append(cc)
-
-    logger.debug("Built tz->country map for {} zone names", len(tz_to_countries))
-    return tz_to_countries
-
-TZ_TO_COUNTRY = build_tz_to_country_map()
+from githunt.Analysis.TimezoneIndex import load_timezone_index
+from githunt.Analysis.LocalHours import compute_local_hours
+from githunt.Analysis.CountryScoring import count_country_hits
+from githunt.Analysis.CountryTable import load_country_table
 
 def unique_utc_pairs(timestamps: Iterable[datetime]) -> list[tuple[datetime, timedelta]]:
     pairs = set()
@@ -46,19 +31,11 @@ def unique_utc_pairs(timestamps: Iterable[datetime]) -> list[tuple[datetime, tim
 
 def timezones_matching_offset_cached(pairs: Iterable[tuple[datetime, timedelta]]) -> dict[tuple[datetime, timedelta], list[str]]:
     cache: dict[tuple[datetime, timedelta], list[str]] = {}
-    all_tz = list(available_timezones())
+    index = load_timezone_index()
 
-    logger.debug("Searching among {} available timezones for offset matches", len(all_tz))
+    logger.debug("Searching the timezone index for offset matches")
     for utc, offset in pairs:
-        matches: list[str] = []
-        for tz_name in all_tz:
-            try:
-                tz = ZoneInfo(tz_name)
-                local = utc.astimezone(tz)
-                if local.utcoffset() == offset:
-                    matches.append(tz_name)
-            except:
-                logger.exception("Zone {} failed during offset check", tz_name)
+        matches = list(index.zones_matching(int(utc.timestamp()), int(offset.total_seconds())))
 
         cache[(utc, offset)] = matches
         logger.trace("UTC {} offset {} matched {} timezones", utc.isoformat(), offset, len(matches))
@@ -95,10 +72,12 @@ def infer_countries(user, N: int, use_population_apriori: bool) -> list[dict]:
 
     logger.debug("Mapped {} timestamps to timezone candidate lists", len(timestamp_to_tz_candidates))
 
+    country_table = load_country_table()
+
     candidate_countries = set()
     for cand_list in timestamp_to_tz_candidates:
         for tz_name in cand_list:
-            countries = TZ_TO_COUNTRY.get(tz_name, [])
+            countries = country_table.tz_to_countries.get(tz_name, [])
             for candidate in countries:
                 candidate_countries.add(candidate)
 
@@ -108,70 +87,30 @@ def infer_countries(user, N: int, use_population_apriori: bool) -> list[dict]:
         return []
 
     country_stats = {}
-    tz_local_hours_cache: dict[str, list[Optional[int]]] = {}
 
     all_candidate_tzs = set()
     for candidate in candidate_countries:
-        tzs = pytz.country_timezones.get(candidate, [])
+        tzs = country_table.countries[candidate].timezones
         for tz in tzs:
             all_candidate_tzs.add(tz)
 
     logger.debug("Computing local hours for {} timezone candidates", len(all_candidate_tzs))
-    for tz_name in all_candidate_tzs:
-        hours_for_ts: list[Optional[int]] = []
-        try:
-            zone = ZoneInfo(tz_name)
-        except:
-            logger.warning("ZoneInfo cannot build tz {}, filling with None", tz_name)
-            tz_local_hours_cache[tz_name] = [None] * len(timestamps)
-            continue
-
-        for timestamp in timestamps:
-            if timestamp.tzinfo is None:
-                ts2 = timestamp.replace(tzinfo=timezone.utc)
-            else:
-                ts2 = timestamp
-            try:
-                local = ts2.astimezone(zone)
-                hours_for_ts.append(local.hour)
-            except:
-                hours_for_ts.append(None)
-
-        tz_local_hours_cache[tz_name] = hours_for_ts
+    tz_local_hours_cache = compute_local_hours(timestamps, all_candidate_tzs)
 
+    country_tzs: dict[str, list[str]] = {}
     for candidate in candidate_countries:
-        tzs = pytz.country_timezones.get(candidate, [])
+        tzs = country_table.countries[candidate].timezones
         if not tzs:
-            logger.trace("Country {} has no tz list in pytz, skipping", candidate)
+            logger.trace("Country {} has no tz list, skipping", candidate)
             continue
 
-        matched_count = 0
-        wake_hits = 0
-
-        # Wakefullness evaluation
-        for idx, candidate_tzs in enumerate(timestamp_to_tz_candidates):
-            for tz_name in candidate_tzs:
-                countries_for_tz = TZ_TO_COUNTRY.get(tz_name, [])
-                if candidate in countries_for_tz:
-                    matched_count += 1
-                    break
-
-            wake_here = False
-            for tz_name in tzs:
-                hours = tz_local_hours_cache.get(tz_name)
-                if not hours:
-                    continue
-
-                hour = hours[idx]
-                if hour is None:
-                    continue
+        country_tzs[candidate] = tzs
 
-                if WAKE_START <= hour <= WAKE_END:
-                    wake_here = True
-                    break
+    # Wakefullness evaluation
+    country_hits = count_country_hits(country_tzs, timestamp_to_tz_candidates, tz_local_hours_cache)
 
-            if wake_here:
-                wake_hits += 1
+    for candidate, tzs in country_tzs.items():
+        matched_count, wake_hits = country_hits[candidate]
 
         match_fraction = matched_count / total
         wake_fraction = wake_hits / total
@@ -183,12 +122,8 @@ def infer_countries(user, N: int, use_population_apriori: bool) -> list[dict]:
 
         population_prior = 1.0
         if use_population_apriori:
-            try:
-                pop = CountryInfo(candidate).population()
-                population_prior = (float(pop) ** 0.25) if pop and pop > 0 else 1.0
-            except:
-                logger.trace("Population lookup failed for {}, using prior 1", candidate)
-                population_prior = 1.0
+            pop = country_table.countries[candidate].population
+            population_prior = (float(pop) ** 0.25) if pop and pop > 0 else 1.0
 
         adjusted_score = raw_score * population_prior
         country_stats[candidate] = {
@@ -225,22 +160,12 @@ def infer_countries(user, N: int, use_population_apriori: bool) -> list[dict]:
 
     results: list[CountryResult] = []
     for candidate, stats in country_stats.items():
-        try:
-            info = CountryInfo(candidate).info()
-            assert info
-            name = info.get("name", candidate)
-        except:
-            logger.trace("CountryInfo info lookup failed for {}, using code as name", candidate)
-            name = candidate
-        try:
-            flag = countryflag.getflag(name)
-        except:
-            flag = "🏳"
+        country = country_table.countries[candidate]
 
         results.append(CountryResult(
             code=candidate,
-            name=name,
-            flag=flag, # pyright: ignore[reportArgumentType]
+            name=country.name,
+            flag=country.flag,
             score=stats["adjusted_score"] / 100,
             probability=stats["probability"],
             match_fraction=stats["match_fraction"],
@@ -0,0 +1,124 @@
+"""
+# CountryScoring
+
+This file hosts the per-country counting behind country inference: for each country, how many timestamps
+have a matching timezone candidate in it, and how many fall within waking hours in at least one of its timezones.
+
+With NumPy, both counts are reductions of boolean matrices through the timezone -> country incidence matrix:
+- match: unique candidate lists x timezones, weighted by how many timestamps share each list
+- wake: timezones x timestamps from the local hours, bit-packed per timezone
+"""
+
+from typing import Sequence
+from loguru import logger
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+WAKE_START = 6
+WAKE_END = 23 # Inclusive
+
+def count_country_hits_python(
+    country_tzs: dict[str, list[str]],
+    timestamp_to_tz_candidates: list[list[str]],
+    tz_local_hours: dict[str, Sequence[int]]
+) -> dict[str, tuple[int, int]]:
+    hits: dict[str, tuple[int, int]] = {}
+
+    for country, tzs in country_tzs.items():
+        tzs_set = set(tzs)
+        matched_count = 0
+        wake_hits = 0
+
+        for idx, candidate_tzs in enumerate(timestamp_to_tz_candidates):
+            if any(tz_name in tzs_set for tz_name in candidate_tzs):
+                matched_count += 1
+
+            for tz_name in tzs:
+                hours = tz_local_hours.get(tz_name)
+                if hours is None:
+                    continue
+
+                hour = hours[idx]
+                if hour >= 0 and WAKE_START <= hour <= WAKE_END:
+                    wake_hits += 1
+                    break
+
+        hits[country] = (matched_count, wake_hits)
+
+    return hits
+
+def count_set_bits(packed: np.ndarray) -> int:
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(packed).sum())
+
+    return int(np.unpackbits(packed).sum())
+
+def count_country_hits_numpy(
+    country_tzs: dict[str, list[str]],
+    timestamp_to_tz_candidates: list[list[str]],
+    tz_local_hours: dict[str, Sequence[int]]
+) -> dict[str, tuple[int, int]]:
+    assert np is not None
+
+    countries = list(country_tzs)
+    total = len(timestamp_to_tz_candidates)
+
+    tz_names = sorted({tz_name for tzs in country_tzs.values() for tz_name in tzs})
+    tz_rows = {tz_name: i for i, tz_name in enumerate(tz_names)}
+    country_tz_rows = [[tz_rows[tz_name] for tz_name in country_tzs[country]] for country in countries]
+
+    incidence = np.zeros((len(tz_names), len(countries)), dtype=np.float32)
+    for column, rows in enumerate(country_tz_rows):
+        incidence[rows, column] = 1
+
+    # Match matrix, over unique candidate lists only (timestamps sharing a (utc, offset) pair share the same list object)
+    unique_rows: dict[int, int] = {}
+    unique_lists: list[list[str]] = []
+    for candidate_tzs in timestamp_to_tz_candidates:
+        if id(candidate_tzs) not in unique_rows:
+            unique_rows[id(candidate_tzs)] = len(unique_lists)
+            unique_lists.append(candidate_tzs)
+
+    row_of_timestamp = np.fromiter((unique_rows[id(candidate_tzs)] for candidate_tzs in timestamp_to_tz_candidates), dtype=np.int64, count=total)
+    row_weights = np.bincount(row_of_timestamp, minlength=len(unique_lists))
+
+    match_matrix = np.zeros((len(unique_lists), len(tz_names)), dtype=np.float32)
+    for row, candidate_tzs in enumerate(unique_lists):
+        columns = [tz_rows[tz_name] for tz_name in candidate_tzs if tz_name in tz_rows]
+        match_matrix[row, columns] = 1
+
+    matched_counts = row_weights @ ((match_matrix @ incidence) > 0)
+
+    # Wake matrix (timezones x timestamps), bit-packed so that each country is a few OR-reductions of packed rows
+    missing_hours = np.full(total, -1, dtype=np.int8)
+    hours_matrix = np.stack([np.asarray(tz_local_hours.get(tz_name, missing_hours), dtype=np.int8) for tz_name in tz_names])
+    wake_bits = np.packbits((hours_matrix >= WAKE_START) & (hours_matrix <= WAKE_END), axis=1)
+
+    wake_hits = [
+        count_set_bits(np.bitwise_or.reduce(wake_bits[rows], axis=0))
+        for rows in country_tz_rows
+    ]
+
+    logger.debug("Scored {} countries over {} timezones, {} timestamps and {} unique candidate lists", len(countries), len(tz_names), total, len(unique_lists))
+
+    return {
+        country: (int(matched_counts[i]), wake_hits[i])
+        for i, country in enumerate(countries)
+    }
+
+def count_country_hits(
+    country_tzs: dict[str, list[str]],
+    timestamp_to_tz_candidates: list[list[str]],
+    tz_local_hours: dict[str, Sequence[int]]
+) -> dict[str, tuple[int, int]]:
+    """
+    Returns (matched timestamps, timestamps within waking hours) for each country, countries must have at least one timezone
+    """
+
+    if np is None or not country_tzs or not timestamp_to_tz_candidates:
+        return count_country_hits_python(country_tzs, timestamp_to_tz_candidates, tz_local_hours)
+
+    return count_country_hits_numpy(country_tzs, timestamp_to_tz_candidates, tz_local_hours)
@@ -0,0 +1,126 @@
+"""
+# CountryTable
+
+This file hosts the country metadata used by country inference: ISO code -> name, flag, population and timezones,
+plus the reverse timezone -> countries map.
+
+It is built once from `pytz`, `countryinfo` and `countryflag` (each of which parses its bundled data on every lookup),
+then pickled into the cache directory, keyed by the versions of those packages.
+"""
+
+from importlib.metadata import version, PackageNotFoundError
+from typing import Optional
+from loguru import logger
+
+import pickle
+import os
+
+from githunt.Classes.CountryMetadata import CountryMetadata
+from githunt.Utils import default_cache_dir
+
+TABLE_FORMAT_VERSION = 1
+SOURCE_PACKAGES = ["pytz", "countryinfo", "countryflag"]
+DEFAULT_FLAG = "🏳"
+
+def sources_fingerprint() -> str:
+    versions = []
+    for package in SOURCE_PACKAGES:
+        try:
+            versions.append(f"{package}={version(package)}")
+        except PackageNotFoundError:
+            versions.append(f"{package}=unknown")
+
+    return f"{TABLE_FORMAT_VERSION}:" + ",".join(versions)
+
+def lookup_country(code: str, timezones: list[str]) -> CountryMetadata:
+    # The source packages are only needed when (re)building the table
+    from countryinfo import CountryInfo
+    import countryflag
+
+    try:
+        info = CountryInfo(code).info()
+        assert info
+        name = info.get("name", code)
+    except:
+        logger.trace("CountryInfo info lookup failed for {}, using code as name", code)
+        name = code
+
+    try:
+        population = CountryInfo(code).population()
+        population = int(population) if population else None
+    except:
+        logger.trace("Population lookup failed for {}", code)
+        population = None
+
+    try:
+        flag = countryflag.getflag(name)
+    except:
+        flag = DEFAULT_FLAG
+
+    return CountryMetadata(code=code, name=name, flag=flag, population=population, timezones=timezones) # pyright: ignore[reportArgumentType]
+
+class CountryTable:
+    def __init__(self, fingerprint: str, countries: dict[str, CountryMetadata]) -> None:
+        self.fingerprint: str = fingerprint
+        self.countries: dict[str, CountryMetadata] = countries
+
+        self.tz_to_countries: dict[str, list[str]] = {}
+        for code, country in countries.items():
+            for tz_name in country.timezones:
+                self.tz_to_countries.setdefault(tz_name, []).append(code)
+
+    @classmethod
+    def build(cls, fingerprint: str) -> CountryTable:
+        import pytz
+
+        countries = {
+            code: lookup_country(code, list(tzs))
+            for code, tzs in pytz.country_timezones.items()
+        }
+
+        logger.debug("Built country table for {} countries", len(countries))
+        return cls(fingerprint, countries)
+
+country_table: Optional[CountryTable] = None
+
+def load_country_table(cache_path: Optional[str] = None) -> CountryTable:
+    """
+    Returns the process-wide table, loading it from the disk cache or building (and caching) it
+    """
+
+    global country_table
+
+    if country_table is not None:
+        return country_table
+
+    fingerprint = sources_fingerprint()
+    cache_path = cache_path or os.path.join(default_cache_dir(), "country_table.pickle")
+
+    try:
+        with open(cache_path, "rb") as cache_file:
+            cached_table = pickle.load(cache_file)
+
+        if isinstance(cached_table, CountryTable) and cached_table.fingerprint == fingerprint:
+            logger.debug("Loaded country table from '{}'", cache_path)
+            country_table = cached_table
+            return cached_table
+
+        logger.debug("Country table cache '{}' is stale, rebuilding", cache_path)
+
+    except FileNotFoundError:
+        logger.debug("No country table cache at '{}', building", cache_path)
+    except Exception:
+        logger.exception("Couldn't load the country table cache '{}', rebuilding", cache_path)
+
+    country_table = CountryTable.build(fingerprint)
+
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as cache_file:
+            pickle.dump(country_table, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except Exception:
+        logger.exception("Couldn't write the country table cache '{}'", cache_path)
+
+    return country_table
@@ -0,0 +1,86 @@
+"""
+# LocalHours
+
+This file hosts the computation of the local hour of every timestamp in every candidate timezone.
+
+When NumPy is installed, timestamps become an int64 epoch array and each zone's transition table (from the
+timezone index) is applied with `searchsorted`, giving all hours of a zone at once.
+Otherwise, every timestamp is converted with `astimezone` in pure Python.
+
+Both paths return, per zone, a sequence of hours where -1 marks a failed conversion.
+"""
+
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+from typing import Iterable, Optional, Sequence
+from loguru import logger
+
+from githunt.Analysis.TimezoneIndex import TimezoneIndex, load_timezone_index
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def as_aware(timestamp: datetime) -> datetime:
+    return timestamp if timestamp.tzinfo is not None else timestamp.replace(tzinfo=timezone.utc)
+
+def local_hours_python(timestamps: Sequence[datetime], tz_names: Iterable[str]) -> dict[str, list[int]]:
+    local_hours: dict[str, list[int]] = {}
+
+    for tz_name in tz_names:
+        try:
+            zone = ZoneInfo(tz_name)
+        except:
+            logger.warning("ZoneInfo cannot build tz {}, filling with -1", tz_name)
+            local_hours[tz_name] = [-1] * len(timestamps)
+            continue
+
+        hours_for_ts: list[int] = []
+        for timestamp in timestamps:
+            try:
+                hours_for_ts.append(as_aware(timestamp).astimezone(zone).hour)
+            except:
+                hours_for_ts.append(-1)
+
+        local_hours[tz_name] = hours_for_ts
+
+    return local_hours
+
+def local_hours_numpy(timestamps: Sequence[datetime], tz_names: Iterable[str], index: TimezoneIndex) -> dict[str, Sequence[int]]:
+    """
+    Returns int8 arrays, as -1 does not fit in uint8
+    """
+
+    assert np is not None
+
+    epochs = np.fromiter((int(as_aware(timestamp).timestamp()) for timestamp in timestamps), dtype=np.int64, count=len(timestamps))
+    local_hours: dict[str, Sequence[int]] = {}
+    fallback_tz_names: list[str] = []
+
+    for tz_name in tz_names:
+        changes = index.zone_changes.get(tz_name)
+        if changes is None:
+            fallback_tz_names.append(tz_name)
+            continue
+
+        starts = np.asarray(changes[0], dtype=np.int64)
+        offsets = np.asarray(changes[1], dtype=np.int64)
+
+        interval_indices = np.maximum(np.searchsorted(starts, epochs, side="right") - 1, 0)
+        local_epochs = epochs + offsets[interval_indices]
+        local_hours[tz_name] = ((local_epochs // 3600) % 24).astype(np.int8)
+
+    if fallback_tz_names:
+        logger.debug("{} timezones are missing from the timezone index, converting them in pure Python", len(fallback_tz_names))
+        for tz_name, hours in local_hours_python(timestamps, fallback_tz_names).items():
+            local_hours[tz_name] = np.asarray(hours, dtype=np.int8)
+
+    return local_hours
+
+def compute_local_hours(timestamps: Sequence[datetime], tz_names: Iterable[str], index: Optional[TimezoneIndex] = None) -> dict[str, Sequence[int]]:
+    if np is None:
+        logger.debug("NumPy is not installed, computing local hours in pure Python")
+        return dict(local_hours_python(timestamps, tz_names))
+
+    return local_hours_numpy(timestamps, tz_names, index or load_timezone_index())
@@ -0,0 +1,340 @@
+"""
+# TimezoneIndex
+
+This file hosts an index answering "which timezones had this UTC offset at this instant?" with a bisect.
+
+It is built once from the TZif files backing `zoneinfo` (explicit transitions, then the POSIX TZ footer rule
+expanded up to `HORIZON_YEAR`), following the same conventions as `zoneinfo.ZoneInfo`.
+The built index is pickled into the cache directory, keyed by a fingerprint of the zone files.
+"""
+
+from datetime import date, timedelta
+from importlib import resources
+from typing import IO, Iterable, Optional
+from zoneinfo import available_timezones, TZPATH
+from bisect import bisect_right
+from loguru import logger
+
+import hashlib
+import pickle
+import struct
+import re
+import os
+
+from githunt.Utils import default_cache_dir
+
+INDEX_FORMAT_VERSION = 2
+HORIZON_YEAR = 2100
+MIN_TIME = -(2 ** 62)
+MAX_TIME = 2 ** 62
+
+POSIX_NAME = r"(?:[A-Za-z]{3,}|<[+\-0-9A-Za-z]+>)"
+POSIX_OFFSET = r"[+-]?\d{1,3}(?::\d{1,2}){0,2}"
+POSIX_TZ_PATTERN = re.compile(rf"^({POSIX_NAME})({POSIX_OFFSET})(?:({POSIX_NAME})({POSIX_OFFSET})?(?:,([^,]+),([^,]+))?)?$")
+
+Interval = tuple[int, int, int] # (start, end, UTC offset in seconds), end excluded
+
+def parse_posix_seconds(value: str) -> int:
+    sign = -1 if value.startswith("-") else 1
+    parts = [int(part) for part in value.lstrip("+-").split(":")]
+    parts += [0] * (3 - len(parts))
+
+    return sign * (parts[0] * 3600 + parts[1] * 60 + parts[2])
+
+def posix_rule_day(rule: str, year: int) -> date:
+    """
+    Resolves a POSIX TZ date rule (`Jn`, `n` or `Mm.w.d`) for a given year
+    """
+
+    if rule.startswith("M"):
+        month, week, weekday = (int(part) for part in rule[1:].split("."))
+        first_day = date(year, month, 1)
+        first_weekday = (first_day.weekday() + 1) % 7 # POSIX weeks start on Sunday
+
+        day = first_day + timedelta(days=(weekday - first_weekday) % 7 + (week - 1) * 7)
+        while day.month != month: # Week 5 means "last"
+            day -= timedelta(days=7)
+
+        return day
+
+    if rule.startswith("J"):
+        day_number = int(rule[1:]) # 1-365, February 29th is never counted
+        is_leap = year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+        return date(year, 1, 1) + timedelta(days=day_number - 1 + (1 if is_leap and day_number >= 60 else 0))
+
+    return date(year, 1, 1) + timedelta(days=int(rule))
+
+def posix_rule_transition(rule: str, year: int, offset: int) -> int:
+    day_rule, _, time_rule = rule.partition("/")
+    local_seconds = (posix_rule_day(day_rule, year) - date(1970, 1, 1)).days * 86400
+    local_seconds += parse_posix_seconds(time_rule) if time_rule else 7200
+
+    return local_seconds - offset
+
+def expand_posix_tz(tz_string: str, first_year: int) -> tuple[int, list[tuple[int, int]]]:
+    """
+    Returns the offset in effect before any transition, and the sorted (time, offset) transitions
+    from `first_year` up to `HORIZON_YEAR`
+    """
+
+    match = POSIX_TZ_PATTERN.match(tz_string)
+    if match is None:
+        raise ValueError(f"Unsupported TZ string '{tz_string}'")
+
+    _, std_value, dst_name, dst_value, start_rule, end_rule = match.groups()
+    std_offset = -parse_posix_seconds(std_value)
+
+    if dst_name is None or start_rule is None:
+        return std_offset, []
+
+    dst_offset = -parse_posix_seconds(dst_value) if dst_value else std_offset + 3600
+
+    transitions: list[tuple[int, int]] = []
+    for year in range(first_year, HORIZON_YEAR + 1):
+        transitions.append((posix_rule_transition(start_rule, year, std_offset), dst_offset))
+        transitions.append((posix_rule_transition(end_rule, year, dst_offset), std_offset))
+
+    transitions.sort()
+    return std_offset, transitions
+
+def read_tzif(fobj: IO[bytes]) -> tuple[list[int], list[int], list[int], list[bool], str]:
+    """
+    Reads transition times, their local time type indices, the UTC offsets/DST flags of each type and the footer
+    """
+
+    def read_header() -> tuple[int, tuple[int, ...]]:
+        if fobj.read(4) != b"TZif":
+            raise ValueError("Invalid TZif file: magic not found")
+
+        version = fobj.read(1)
+        fobj.read(15)
+        return (int(version) if version.strip(b"\0") else 1), struct.unpack(">6l", fobj.read(24))
+
+    version, counts = read_header()
+    time_size = 4
+
+    if version >= 2: # Skips the 32-bit data block
+        isutcnt, isstdcnt, leapcnt, timecnt, typecnt, charcnt = counts
+        fobj.seek(timecnt * 5 + typecnt * 6 + charcnt + leapcnt * 8 + isstdcnt + isutcnt, 1)
+        _, counts = read_header()
+        time_size = 8
+
+    isutcnt, isstdcnt, leapcnt, timecnt, typecnt, charcnt = counts
+    transitions = list(struct.unpack(f">{timecnt}{'q' if time_size == 8 else 'l'}", fobj.read(timecnt * time_size)))
+    indices = list(fobj.read(timecnt))
+
+    offsets: list[int] = []
+    is_dst: list[bool] = []
+    for _ in range(typecnt):
+        utoff, isdst, _ = struct.unpack(">lbb", fobj.read(6))
+        offsets.append(utoff)
+        is_dst.append(bool(isdst))
+
+    footer = ""
+    if version >= 2:
+        fobj.seek(charcnt + leapcnt * (time_size + 4) + isstdcnt + isutcnt, 1)
+        footer = fobj.read().strip(b"\n").split(b"\n")[0].decode()
+
+    return transitions, indices, offsets, is_dst, footer
+
+def zone_intervals(fobj: IO[bytes]) -> list[Interval]:
+    transitions, indices, offsets, is_dst, footer = read_tzif(fobj)
+
+    # Before the first transition, zoneinfo uses the first standard time type
+    offset_before = next((offset for offset, dst in zip(offsets, is_dst) if not dst), offsets[0] if offsets else 0)
+
+    changes: list[tuple[int, int]] = [(MIN_TIME, offset_before)]
+    changes.extend((time, offsets[index]) for time, index in zip(transitions, indices))
+
+    if footer:
+        # After the last transition, zoneinfo evaluates the footer rule
+        last_time = transitions[-1] if transitions else MIN_TIME
+        first_year = (date(1970, 1, 1) + timedelta(seconds=last_time)).year - 1 if transitions else 1900
+        std_offset, footer_changes = expand_posix_tz(footer, max(first_year, 1900))
+
+        offset_at_last = std_offset
+        for time, offset in footer_changes:
+            if time > last_time:
+                break
+            offset_at_last = offset
+
+        if transitions:
+            changes[-1] = (last_time, offset_at_last)
+        else:
+            changes = [(MIN_TIME, offset_at_last)]
+
+        changes.extend(change for change in footer_changes if change[0] > last_time)
+
+    intervals: list[Interval] = []
+    for i, (start, offset) in enumerate(changes):
+        end = changes[i + 1][0] if i + 1 < len(changes) else MAX_TIME
+        if start >= end:
+            continue
+
+        if intervals and intervals[-1][2] == offset and intervals[-1][1] == start:
+            intervals[-1] = (intervals[-1][0], end, offset)
+        else:
+            intervals.append((start, end, offset))
+
+    return intervals
+
+def open_zone_file(key: str) -> Optional[IO[bytes]]:
+    for directory in TZPATH:
+        path = os.path.join(directory, key)
+        if os.path.isfile(path):
+            return open(path, "rb")
+
+    try:
+        return resources.files("tzdata.zoneinfo").joinpath(*key.split("/")).open("rb")
+    except (ImportError, FileNotFoundError):
+        return None
+
+def zones_fingerprint(keys: Iterable[str]) -> str:
+    digest = hashlib.sha256(f"{INDEX_FORMAT_VERSION}:{HORIZON_YEAR}".encode())
+
+    for key in sorted(keys):
+        digest.update(key.encode())
+        for directory in TZPATH:
+            path = os.path.join(directory, key)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+                break
+
+    try:
+        import tzdata
+        digest.update(tzdata.IANA_VERSION.encode())
+    except ImportError:
+        pass
+
+    return digest.hexdigest()
+
+class TimezoneIndex:
+    def __init__(
+        self,
+
+        fingerprint: str,
+        segments: dict[int, tuple[list[int], list[tuple[str, ...]]]],
+        zone_changes: dict[str, tuple[list[int], list[int]]]
+    ) -> None:
+        self.fingerprint: str = fingerprint
+
+        # UTC offset in seconds -> (sorted segment starts, zones having that offset during each segment)
+        self.segments: dict[int, tuple[list[int], list[tuple[str, ...]]]] = segments
+
+        # Zone name -> (sorted interval starts, UTC offset in seconds during each interval)
+        self.zone_changes: dict[str, tuple[list[int], list[int]]] = zone_changes
+
+    @classmethod
+    def build(cls, keys: Iterable[str], fingerprint: str) -> TimezoneIndex:
+        events_by_offset: dict[int, list[tuple[int, int, str]]] = {}
+        zone_changes: dict[str, tuple[list[int], list[int]]] = {}
+
+        for key in keys:
+            fobj = open_zone_file(key)
+            if fobj is None:
+                logger.warning("Zone file for {} not found, skipping", key)
+                continue
+
+            try:
+                with fobj:
+                    intervals = zone_intervals(fobj)
+            except Exception:
+                logger.exception("Zone {} failed while building the timezone index", key)
+                continue
+
+            zone_changes[key] = ([start for start, _, _ in intervals], [offset for _, _, offset in intervals])
+
+            for start, end, offset in intervals:
+                events = events_by_offset.setdefault(offset, [])
+                events.append((start, 1, key))
+                events.append((end, -1, key))
+
+        interned: dict[tuple[str, ...], tuple[str, ...]] = {}
+        segments: dict[int, tuple[list[int], list[tuple[str, ...]]]] = {}
+
+        for offset, events in events_by_offset.items():
+            events.sort()
+            starts: list[int] = []
+            zone_sets: list[tuple[str, ...]] = []
+            active: dict[str, int] = {}
+
+            i = 0
+            while i < len(events):
+                time = events[i][0]
+                while i < len(events) and events[i][0] == time:
+                    _, delta, key = events[i]
+                    active[key] = active.get(key, 0) + delta
+                    if active[key] == 0:
+                        del active[key]
+                    i += 1
+
+                zone_set = tuple(sorted(active))
+                zone_set = interned.setdefault(zone_set, zone_set)
+                if zone_sets and zone_sets[-1] == zone_set:
+                    continue
+
+                starts.append(time)
+                zone_sets.append(zone_set)
+
+            segments[offset] = (starts, zone_sets)
+
+        logger.debug("Built timezone index over {} offsets", len(segments))
+        return cls(fingerprint, segments, zone_changes)
+
+    def zones_matching(self, utc_seconds: int, offset_seconds: int) -> tuple[str, ...]:
+        entry = self.segments.get(offset_seconds)
+        if entry is None:
+            return ()
+
+        starts, zone_sets = entry
+        i = bisect_right(starts, utc_seconds) - 1
+        return zone_sets[i] if i >= 0 else ()
+
+timezone_index: Optional[TimezoneIndex] = None
+
+def load_timezone_index(cache_path: Optional[str] = None) -> TimezoneIndex:
+    """
+    Returns the process-wide index, loading it from the disk cache or building (and caching) it
+
+    The zone files are only fingerprinted once per process: they aren't expected to change under a running process
+    """
+
+    global timezone_index
+
+    if timezone_index is not None:
+        return timezone_index
+
+    keys = available_timezones()
+    fingerprint = zones_fingerprint(keys)
+
+    cache_path = cache_path or os.path.join(default_cache_dir(), "timezone_index.pickle")
+
+    try:
+        with open(cache_path, "rb") as cache_file:
+            cached_index = pickle.load(cache_file)
+
+        if isinstance(cached_index, TimezoneIndex) and cached_index.fingerprint == fingerprint:
+            logger.debug("Loaded timezone index from '{}'", cache_path)
+            timezone_index = cached_index
+            return cached_index
+
+        logger.debug("Timezone index cache '{}' is stale, rebuilding", cache_path)
+
+    except FileNotFoundError:
+        logger.debug("No timezone index cache at '{}', building", cache_path)
+    except Exception:
+        logger.exception("Couldn't load the timezone index cache '{}', rebuilding", cache_path)
+
+    timezone_index = TimezoneIndex.build(keys, fingerprint)
+
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as cache_file:
+            pickle.dump(timezone_index, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except Exception:
+        logger.exception("Couldn't write the timezone index cache '{}'", cache_path)
+
+    return timezone_index
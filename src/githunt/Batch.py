@@ -0,0 +1,68 @@
+"""
+# Batch
+
+This file hosts batch mode: targets are read from a file (or stdin, one username per line),
+scanned concurrently through one `Scanner`, and reported as NDJSON (one JSON object per line) as each one completes.
+
+A target that couldn't be scanned gets a line with an "error" key, so that every target has its line.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import IO
+from loguru import logger
+
+import json
+import sys
+
+from githunt.Scanner import Scanner
+
+def read_usernames(path: str) -> list[str]:
+    """
+    Reads usernames one per line from `path` ("-" for stdin), skipping blank lines, comments (#) and duplicates
+    """
+
+    if path == "-":
+        lines = [line.strip() for line in sys.stdin]
+    else:
+        with open(path) as usernames_file:
+            lines = [line.strip() for line in usernames_file]
+
+    return list(dict.fromkeys(line for line in lines if line and not line.startswith("#")))
+
+def scan_target(scanner: Scanner, username: str) -> dict:
+    try:
+        report = scanner.scan(username)
+    except Exception as exception:
+        logger.exception("Scanning target '{}' failed", username)
+        return {"username": username, "error": str(exception)}
+
+    if report is None:
+        logger.error("Could not query the user '{}' (user is None)", username)
+        return {"username": username, "error": "user not found"}
+
+    return report
+
+def run_batch(scanner: Scanner, usernames: list[str], output: IO[str], concurrency: int) -> int:
+    """
+    Scans every target, writing each report to `output` as soon as it completes
+
+    Returns the number of targets that couldn't be scanned
+    """
+
+    logger.info("Scanning {} targets, {} at a time", len(usernames), concurrency)
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = [executor.submit(scan_target, scanner, username) for username in usernames]
+
+        for position, future in enumerate(as_completed(futures)):
+            report = future.result()
+            output.write(json.dumps(report) + "\n")
+            output.flush()
+
+            if "error" in report:
+                failures += 1
+            else:
+                logger.success("Scanned target '{}' ({}/{})", report["username"], position + 1, len(usernames))
+
+    return failures
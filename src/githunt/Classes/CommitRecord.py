@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+@dataclass
+class CommitRecord:
+    sha: str
+    author_name: str
+    author_email: str
+    committed_datetime: datetime
+    is_signed: bool
@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass
+class CountryMetadata:
+    code: str
+    name: str
+    flag: str
+    population: Optional[int]
+    timezones: list[str]
@@ -1,18 +1,103 @@
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 from datetime import datetime
 
 from githunt.Classes.Alias import Alias
+from githunt.Utils import normalize_name
 
 if TYPE_CHECKING:
     from githunt.Classes.User import User
 
 class GitData:
+    """
+    Aliases and emails are indexed as they are added, so they must be added through `add_alias`/`add_email`
+
+    Lookups are done on normalized keys: stripped lowercase names, and stripped emails.
+    """
+
     def __init__(self, user: User) -> None:
-        self.aliases: list[Alias] = [Alias(user.name, is_main=True, is_signed=False)]
+        self.aliases: list[Alias] = []
         self.emails: set[str] = set()
         self.timestamps: list[datetime] = [] # We don't mind duplicates
 
-        self.emails.add(f"{user.id}+{user.name}@users.noreply.github.com") # Default GitHub email
+        self.aliases_by_name: dict[str, Alias] = {} # Exact name -> alias
+        self.alias_keys: set[str] = set()
+        self.email_keys: set[str] = set()
+
+        # The target's own names, indexed for the weak matching heuristics (see `matches_user_name_guess`)
+        self.user_names_lower: list[str] = [name.lower() for name in dict.fromkeys((user.name, user.displayname))]
+        self.user_name_substrings: set[str] = {
+            name_lower[start:end]
+            for name_lower in self.user_names_lower
+            for start in range(len(name_lower) + 1)
+            for end in range(start, len(name_lower) + 1)
+        }
+        self.user_name_tokens: set[tuple[str, ...]] = set() # Whole token sequences
+        self.user_name_bounds: set[tuple[str, str]] = set() # First and last tokens, of the names with two tokens or more
+        for name_lower in self.user_names_lower:
+            tokens = tuple(normalize_name(name_lower).split())
+            if tokens:
+                self.user_name_tokens.add(tokens)
+            if len(tokens) >= 2:
+                self.user_name_bounds.add((tokens[0], tokens[-1]))
+
+        self.add_alias(Alias(user.name, is_main=True, is_signed=False))
+        self.add_email(f"{user.id}+{user.name}@users.noreply.github.com") # Default GitHub email
 
         if user.email:
-            self.emails.add(user.email)
\ No newline at end of file
+            self.add_email(user.email)
+
+    @staticmethod
+    def alias_key(name: str) -> str:
+        return name.strip().lower()
+
+    @staticmethod
+    def email_key(email: str) -> str:
+        return email.strip()
+
+    @property
+    def main_alias(self) -> Alias:
+        return self.aliases[0]
+
+    def add_alias(self, alias: Alias) -> bool:
+        if alias.name in self.aliases_by_name:
+            return False
+
+        self.aliases.append(alias)
+        self.aliases_by_name[alias.name] = alias
+        self.alias_keys.add(self.alias_key(alias.name))
+        return True
+
+    def add_email(self, email: str) -> bool:
+        if email in self.emails:
+            return False
+
+        self.emails.add(email)
+        self.email_keys.add(self.email_key(email))
+        return True
+
+    def get_alias(self, name: str) -> Optional[Alias]:
+        return self.aliases_by_name.get(name)
+
+    def matches_alias_name(self, name: str) -> bool:
+        return self.alias_key(name) in self.alias_keys
+
+    def matches_email(self, email: str) -> bool:
+        return self.email_key(email) in self.email_keys
+
+    def matches_user_name_guess(self, name: str) -> bool:
+        """
+        Weak match of a name against the target's username and display name, see `names_equivalent_guess` and `matching_substrings`
+
+        Token matches and names contained in the target's are set lookups; only the target's (two at most) names
+        contained in `name` need a scan
+        """
+
+        name_lower = name.lower()
+        if name_lower in self.user_name_substrings:
+            return True
+
+        name_tokens = tuple(normalize_name(name).split())
+        if name_tokens in self.user_name_tokens or (len(name_tokens) >= 2 and (name_tokens[0], name_tokens[-1]) in self.user_name_bounds):
+            return True
+
+        return any(user_name_lower in name_lower for user_name_lower in self.user_names_lower)
@@ -0,0 +1,34 @@
+from threading import Lock
+from typing import Any
+
+class HttpStats:
+    """
+    Per-request latency counters of an HTTP session, used to confirm that connections are being reused
+    """
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.latencies: list[float] = []
+        self.status_counts: dict[int, int] = {}
+
+    def record(self, response: Any, *args, **kwargs) -> None:
+        """
+        `requests` response hook
+        """
+
+        with self.lock:
+            self.latencies.append(response.elapsed.total_seconds())
+            self.status_counts[response.status_code] = self.status_counts.get(response.status_code, 0) + 1
+
+    @property
+    def request_count(self) -> int:
+        return len(self.latencies)
+
+    def latency_percentile(self, fraction: float) -> float:
+        with self.lock:
+            latencies = sorted(self.latencies)
+
+        if not latencies:
+            return 0.0
+
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+class Identity:
+    """
+    We define "Identity" as a distinct (author name, author email) pair found in the commit history.
+
+    Identities are extracted once per repository, then merged into a single table that identity expansion runs over.
+    """
+
+    def __init__(self, name: str, email: str) -> None:
+        self.name: str = name
+        self.email: str = email
+
+        self.commit_count: int = 0
+        self.is_signed: bool = False
+        self.timestamps: list[datetime] = []
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return (self.name, self.email)
+
+    def add_commit(self, timestamp: datetime, is_signed: bool) -> None:
+        self.commit_count += 1
+        self.is_signed = self.is_signed or is_signed
+        self.timestamps.append(timestamp)
+
+    def merge(self, other: Identity) -> None:
+        self.commit_count += other.commit_count
+        self.is_signed = self.is_signed or other.is_signed
+        self.timestamps.extend(other.timestamps)
+
+    def __str__(self) -> str:
+        return f"<{self.name} <{self.email}> (commits: {self.commit_count}, is_signed: {self.is_signed})>"
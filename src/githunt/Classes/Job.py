@@ -0,0 +1,74 @@
+from typing import Any, Optional
+from threading import Condition
+
+import uuid
+import time
+
+class Job:
+    """
+    A target scan submitted to the service: its status, the progress events of its scan, then its report or error
+
+    Status goes from "queued" to "running", then to "done" or "failed"
+    """
+
+    def __init__(self, username: str) -> None:
+        self.id: str = uuid.uuid4().hex
+        self.username: str = username
+
+        self.status: str = "queued"
+        self.submitted_at: float = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        self.events: list[dict[str, Any]] = []
+        self.result: Optional[dict[str, Any]] = None
+        self.error: Optional[str] = None
+
+        self.changed = Condition()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def add_event(self, event: dict[str, Any]) -> None:
+        with self.changed:
+            self.events.append({"time": time.time(), **event})
+            self.changed.notify_all()
+
+    def start(self) -> None:
+        with self.changed:
+            self.status = "running"
+            self.started_at = time.time()
+            self.changed.notify_all()
+
+    def finish(self, result: Optional[dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        with self.changed:
+            self.status = "failed" if error is not None else "done"
+            self.finished_at = time.time()
+            self.result = result
+            self.error = error
+            self.changed.notify_all()
+
+    def events_after(self, count: int, timeout: float) -> list[dict[str, Any]]:
+        """
+        Returns the events past the first `count` ones, waiting up to `timeout` seconds for some while the job runs
+        """
+
+        with self.changed:
+            self.changed.wait_for(lambda: len(self.events) > count or self.is_finished, timeout)
+            return self.events[count:]
+
+    def to_dict(self) -> dict[str, Any]:
+        with self.changed:
+            return {
+                "id": self.id,
+                "username": self.username,
+                "status": self.status,
+                "submitted_at": self.submitted_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "event_count": len(self.events),
+                "last_event": self.events[-1] if self.events else None,
+                "result": self.result,
+                "error": self.error,
+            }
@@ -12,7 +12,9 @@ class RepositoryInformation:
         forks: int,
         watchers: int,
 
-        git_url: str
+        git_url: str,
+        size_kb: Optional[int] = None,
+        pushed_at: Optional[str] = None
     ) -> None:
         self.name: str = name
         self.description: Optional[str] = description
@@ -23,3 +25,5 @@ class RepositoryInformation:
         self.watchers: int = watchers
 
         self.git_url: str = git_url
+        self.size_kb: Optional[int] = size_kb # Disk usage reported by the git host, when known
+        self.pushed_at: Optional[str] = pushed_at # Last push time reported by the git host, when known
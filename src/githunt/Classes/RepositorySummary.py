@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from githunt.Classes.Identity import Identity
+
+@dataclass
+class RepositorySummary:
+    """
+    Everything extracted from a single repository, sent back from extraction worker processes to be merged
+
+    An incremental summary (`since_sha` set) only covers the commits between `since_sha` and `head_sha`
+    """
+
+    repo_name: str
+    identities: dict[tuple[str, str], Identity]
+    commit_count: int
+    head_sha: Optional[str] = None
+    since_sha: Optional[str] = None
@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import argparse
+
+@dataclass
+class ScanOptions:
+    """
+    Everything that decides how a target is scanned and analyzed, shared by every target of a batch or service
+    """
+
+    scan_forks: bool
+    scan_orgs: bool
+    blacklisted_orgs: list[str]
+    fetch_details: bool
+    alias_based_inference: bool
+
+    infer_country: bool
+    top_countries: int
+    use_population_apriori: bool
+    infer_activity: bool
+
+    workers: int
+    proxy: Optional[str]
+
+    filter_org_repositories: bool = True
+    use_api_ingestion: bool = False
+    api_ingestion_size: Optional[float] = None # In MiB, None for the default
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace, blacklisted_orgs: list[str]) -> ScanOptions:
+        return cls(
+            args.scan_forks,
+            args.scan_orgs,
+            blacklisted_orgs,
+            args.fetch_repository_details,
+            args.alias_based_inference,
+            args.infer_country,
+            args.top_countries,
+            args.use_population_apriori,
+            args.infer_activity,
+            args.workers,
+            args.proxy,
+            args.filter_org_repositories,
+            args.use_api_ingestion,
+            args.api_ingestion_size
+        )
@@ -21,7 +21,9 @@ class User:
 
         followers: int,
         following: int,
-        total_repository_count: int
+        total_repository_count: int,
+
+        node_id: Optional[str] = None
     ) -> None:
         self.id: int = id
 
@@ -41,5 +43,7 @@ class User:
         self.following: int = following
         self.total_repository_count: int = total_repository_count
 
+        self.node_id: Optional[str] = node_id # Global ID of the account, which GraphQL queries filter by
+
         self.repositories: list[RepositoryInformation] = []
         self.git_data: GitData = GitData(self)
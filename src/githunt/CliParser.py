@@ -18,16 +18,82 @@ parser.add_argument(
 )
 
 parser.add_argument(
+	"--api",
+	choices=["rest", "graphql"],
+	default="rest",
+	help="Git host API to query (GraphQL needs far fewer requests, but requires a Personal Access Token)"
+)
+
+parser.add_argument(
+	"--engine",
+	choices=["threads", "async"],
+	default="threads",
+	help="Concurrency engine of the REST API provider (async requires httpx, and runs every request on one event loop)"
+)
+
+target = parser.add_mutually_exclusive_group(required=True)
+
+target.add_argument(
 	"-u",
 	"--username",
-	required=True,
 	help="Target username"
 )
 
+target.add_argument(
+	"--usernames-file",
+	help="Batch mode: file of target usernames, one per line ('-' for stdin), reported as NDJSON"
+)
+
+target.add_argument(
+	"--serve",
+	action="store_true",
+	help="Service mode: scan the targets submitted through a local HTTP/JSON API, keeping caches warm between them"
+)
+
+parser.add_argument(
+	"--listen",
+	help="Service mode: address the API listens on",
+    default="127.0.0.1:8765"
+)
+
+parser.add_argument(
+	"--queue-size",
+	help="Service mode: jobs waiting at most, further submissions are refused",
+    type=int,
+    default=64
+)
+
+parser.add_argument(
+	"--summary-ttl",
+	help="Service mode: minutes during which a repository's extraction is reused by later jobs",
+    type=float,
+    default=60
+)
+
+parser.add_argument(
+	"--output",
+	help="Batch mode: NDJSON report destination ('-' for stdout)",
+    default="-"
+)
+
+parser.add_argument(
+	"--batch-concurrency",
+	help="Batch and service modes: targets scanned at once (they share the workers, caches and already extracted repositories)",
+    type=int,
+    default=4
+)
+
 parser.add_argument(
 	"--pat",
-    dest="personal_access_token",
-	help="GitHub Personal Access Token (PAT) to improve results"
+    dest="personal_access_tokens",
+	action="append",
+	default=[],
+	help="GitHub Personal Access Token (PAT) to improve results, can be repeated to spread requests over several tokens"
+)
+
+parser.add_argument(
+	"--pat-file",
+	help="File of GitHub Personal Access Tokens, one per line (added to the '--pat' ones)"
 )
 
 parser.add_argument(
@@ -63,6 +129,62 @@ parser.add_argument(
     default=12
 )
 
+parser.add_argument(
+	"--max-request-rate",
+	help="Maximum API requests per second, shared by all workers",
+    type=float,
+    default=12.0
+)
+
+parser.add_argument(
+	"--max-concurrent-requests",
+	help="Maximum API requests in flight at once, shared by all workers",
+    type=int,
+    default=16
+)
+
+parser.add_argument(
+	"--clone-cache-dir",
+	help="Persistent clone cache location (defaults to the user cache directory)"
+)
+
+parser.add_argument(
+	"--clone-cache-size",
+	help="Clone cache size budget in MiB, least recently used repositories get evicted past it",
+    type=int,
+    default=2048
+)
+
+parser.add_argument(
+	"--http-cache-dir",
+	help="Persistent API response cache location (defaults to the user cache directory)"
+)
+
+parser.add_argument(
+	"--http-cache-ttl",
+	help="Hours after which a cached API response is dropped instead of revalidated",
+    type=float,
+    default=24 * 7
+)
+
+parser.add_argument(
+	"--http-cache-size",
+	help="API response cache size budget in MiB, least recently used responses get evicted past it",
+    type=int,
+    default=64
+)
+
+parser.add_argument(
+	"--store-path",
+	help="Scan store (SQLite database) location, which lets re-scans only walk new commits (defaults to the user cache directory)"
+)
+
+parser.add_argument(
+	"--api-ingestion-size",
+	help="Size in MiB from which a repository has the target's commits read from the API rather than being cloned, with '--api-ingestion' (needs a PAT)",
+    type=float
+)
+
 # Feature toggles
 parser.add_argument(
 	"--no-population-apriori",
@@ -106,6 +228,54 @@ parser.add_argument(
 	help="Disables activity inference"
 )
 
+parser.add_argument(
+	"--no-cache",
+	dest="use_cache",
+	action="store_false",
+	help="Keep nothing on disk between runs: same as '--no-clone-cache --no-http-cache --no-store'"
+)
+
+parser.add_argument(
+	"--no-clone-cache",
+	dest="use_clone_cache",
+	action="store_false",
+	help="Clone into a temporary directory instead of the persistent clone cache"
+)
+
+parser.add_argument(
+	"--no-store",
+	dest="use_store",
+	action="store_false",
+	help="Don't store scan results (every run walks every repository's whole history)"
+)
+
+parser.add_argument(
+	"--api-ingestion",
+	dest="use_api_ingestion",
+	action="store_true",
+	help="Read the target's commits in large repositories from the API instead of cloning them. Only commits linked to the target's account are returned, so unlinked emails and aliases in those repositories go unseen"
+)
+
+parser.add_argument(
+	"--no-http-cache",
+	dest="use_http_cache",
+	action="store_false",
+	help="Don't cache API responses (every run downloads them again)"
+)
+
+parser.add_argument(
+	"--fetch-repository-details",
+	action="store_true",
+	help="Fetch the details of the repositories whose list entry lacks some fields (100 per GraphQL query with a PAT, one request per such repository otherwise)"
+)
+
+parser.add_argument(
+	"--full-org-scan",
+	dest="filter_org_repositories",
+	action="store_false",
+	help="Clone every organization repository, instead of only the ones the git host reports commits by the target in"
+)
+
 parser.add_argument(
 	"--scan-forks",
 	action="store_true",
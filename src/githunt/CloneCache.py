@@ -0,0 +1,190 @@
+"""
+# CloneCache
+
+This file hosts the persistent clone cache, shared between runs (and between concurrent githunt processes).
+
+Entries are bare metadata-only clones named after the SHA-256 of their clone URL.
+Each entry has a lock file: it is held exclusively while the entry is cloned, fetched or evicted,
+and shared while a run reads from it, so that eviction never removes a repository being scanned.
+Readers release an entry as soon as they are done extracting it (never waiting on another entry while holding one),
+so that concurrent runs acquiring the same entries in different orders can't deadlock.
+"""
+
+from typing import IO, Optional
+from threading import Lock
+from loguru import logger
+
+import hashlib
+import shutil
+import os
+
+from githunt.Classes.RepositoryInformation import RepositoryInformation
+from githunt.RepositoriesVisitor import clone_repository, fetch_repository
+from githunt.Utils import default_cache_dir
+
+try:
+    import fcntl
+except ImportError: # Not available on Windows, where the cache falls back to lock-less operation
+    fcntl = None
+
+DEFAULT_CLONE_CACHE_SIZE_MB = 2048
+
+def lock_file(handle: IO, exclusive: bool, blocking: bool = True) -> bool:
+    if fcntl is None:
+        return True
+
+    operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+    if not blocking:
+        operation |= fcntl.LOCK_NB
+
+    try:
+        fcntl.flock(handle.fileno(), operation)
+        return True
+    except BlockingIOError:
+        return False
+
+def directory_size(path: str) -> int:
+    total = 0
+    for dir_path, _, file_names in os.walk(path):
+        for file_name in file_names:
+            try:
+                total += os.lstat(os.path.join(dir_path, file_name)).st_size
+            except OSError:
+                continue
+
+    return total
+
+class CloneCache:
+    def __init__(self, root: Optional[str] = None, max_size_mb: int = DEFAULT_CLONE_CACHE_SIZE_MB) -> None:
+        self.root: str = root or os.path.join(default_cache_dir(), "repos")
+        self.max_size: int = max_size_mb * 1024 * 1024
+
+        # Key -> its share-locked lock file, and how many readers of this process hold it
+        self.held_locks: dict[str, tuple[IO, int]] = {}
+        self.key_locks: dict[str, Lock] = {}
+        self.held_locks_lock = Lock()
+
+        os.makedirs(self.root, exist_ok=True)
+        logger.debug("Using clone cache '{}' (max {} MiB)", self.root, max_size_mb)
+
+    @staticmethod
+    def key_for(git_url: str) -> str:
+        return hashlib.sha256(git_url.encode()).hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.git")
+
+    def lock_path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.lock")
+
+    def acquire(self, repo: RepositoryInformation) -> Optional[tuple[str, RepositoryInformation]]:
+        """
+        Clones the repository into the cache, or fetches it if already cached
+
+        The entry stays share-locked until `release` (or `release_all`) is called, once per successful `acquire`
+        """
+
+        key = self.key_for(repo.git_url)
+        repo_path = self.entry_path(key)
+
+        # Threads of this process serialize on the entry first, as a second flock from the same process would deadlock
+        with self.held_locks_lock:
+            key_lock = self.key_locks.setdefault(key, Lock())
+
+        with key_lock:
+            with self.held_locks_lock:
+                if key in self.held_locks:
+                    handle, reader_count = self.held_locks[key]
+                    self.held_locks[key] = (handle, reader_count + 1)
+                    return repo_path, repo
+
+            return self.acquire_locked(repo, key, repo_path)
+
+    def acquire_locked(self, repo: RepositoryInformation, key: str, repo_path: str) -> Optional[tuple[str, RepositoryInformation]]:
+        handle = open(self.lock_path(key), "a")
+        lock_file(handle, exclusive=True)
+
+        try:
+            if os.path.isdir(repo_path) and fetch_repository(repo, repo_path):
+                logger.debug("Reused cached clone of '{}'", repo.name)
+                result = (repo_path, repo)
+            else:
+                shutil.rmtree(repo_path, ignore_errors=True)
+                result = clone_repository(repo, self.root, os.path.basename(repo_path))
+
+            if result is None:
+                handle.close()
+                return None
+
+            os.utime(repo_path) # Marks the entry as recently used for eviction
+            lock_file(handle, exclusive=False)
+
+        except Exception:
+            handle.close()
+            raise
+
+        with self.held_locks_lock:
+            self.held_locks[key] = (handle, 1)
+
+        return result
+
+    def release(self, repo: RepositoryInformation) -> None:
+        """
+        Releases one `acquire` of the repository's entry, which can then be fetched again, or evicted
+        """
+
+        key = self.key_for(repo.git_url)
+        with self.held_locks_lock:
+            if key not in self.held_locks:
+                return
+
+            handle, reader_count = self.held_locks.pop(key)
+            if reader_count > 1:
+                self.held_locks[key] = (handle, reader_count - 1)
+                return
+
+        handle.close()
+
+    def release_all(self) -> None:
+        with self.held_locks_lock:
+            handles = [handle for handle, _ in self.held_locks.values()]
+            self.held_locks.clear()
+
+        for handle in handles:
+            handle.close()
+
+    def evict(self) -> None:
+        """
+        Removes least recently used entries until the cache fits within its size budget
+
+        Entries currently locked by any process are skipped
+        """
+
+        entries: list[tuple[float, str, int]] = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".git"):
+                continue
+
+            path = os.path.join(self.root, name)
+            try:
+                entries.append((os.stat(path).st_mtime, name[:-len(".git")], directory_size(path)))
+            except OSError:
+                continue
+
+        total_size = sum(size for _, _, size in entries)
+        logger.debug("Clone cache holds {} entries for {} MiB", len(entries), total_size // (1024 * 1024))
+
+        entries.sort()
+        for _, key, size in entries:
+            if total_size <= self.max_size:
+                break
+
+            with open(self.lock_path(key), "a") as handle:
+                if not lock_file(handle, exclusive=True, blocking=False):
+                    logger.trace("Clone cache entry {} is in use, not evicting", key)
+                    continue
+
+                logger.debug("Evicting clone cache entry {} ({} bytes)", key, size)
+                shutil.rmtree(self.entry_path(key), ignore_errors=True) # The lock file is kept, as other processes may be waiting on it
+
+            total_size -= size
@@ -0,0 +1,150 @@
+"""
+# GitLog
+
+This file hosts a streaming commit metadata reader, built on a single `git log` process per repository.
+
+Raw commit headers are read instead of `%G?` because the latter verifies every signature through gpg,
+while we only care whether a signature is present.
+"""
+
+from datetime import datetime, timezone, timedelta
+from typing import Iterator, Optional
+from loguru import logger
+
+import subprocess
+import tempfile
+import re
+
+from githunt.Classes.CommitRecord import CommitRecord
+
+GIT_LOG_COMMAND = ["git", "log", "-z", "--pretty=raw", "--no-show-signature", "--no-color"]
+SIGNATURE_HEADERS = (b"gpgsig", b"gpgsig-sha256")
+PERSON_PATTERN = re.compile(rb"^(.*?) ?<(.*)> (\d+) ([+-])(\d{2})(\d{2})$") # The name may be empty
+READ_SIZE = 1 << 16
+
+def decode(value: bytes) -> str:
+    return value.decode("utf-8", errors="replace")
+
+def parse_person(value: bytes) -> Optional[tuple[str, str, datetime]]:
+    """
+    Parses an `author`/`committer` header value, i.e. `Name <email> epoch +hhmm`
+    """
+
+    match = PERSON_PATTERN.match(value)
+    if match is None:
+        return None
+
+    name, email, epoch, sign, hours, minutes = match.groups()
+    offset = timedelta(hours=int(hours), minutes=int(minutes))
+    if sign == b"-":
+        offset = -offset
+
+    try:
+        tz = timezone(offset)
+    except ValueError:
+        logger.trace("Out of range offset {}, assuming UTC", decode(value))
+        tz = timezone.utc
+
+    return decode(name), decode(email), datetime.fromtimestamp(int(epoch), tz)
+
+def parse_raw_commit(record: bytes) -> Optional[CommitRecord]:
+    header = record.split(b"\n\n", 1)[0]
+
+    sha: Optional[str] = None
+    author: Optional[tuple[str, str, datetime]] = None
+    committer: Optional[tuple[str, str, datetime]] = None
+    is_signed = False
+
+    for line in header.split(b"\n"):
+        if line.startswith(b" "): # Continuation of a multi-line header (signatures, mergetag)
+            continue
+
+        key, _, value = line.partition(b" ")
+        if key == b"commit":
+            sha = decode(value.split(b" ", 1)[0])
+        elif key == b"author":
+            author = parse_person(value)
+        elif key == b"committer":
+            committer = parse_person(value)
+        elif key in SIGNATURE_HEADERS:
+            is_signed = True
+
+    if sha is None or author is None or committer is None:
+        return None
+
+    return CommitRecord(
+        sha=sha,
+        author_name=author[0],
+        author_email=author[1],
+        committed_datetime=committer[2],
+        is_signed=is_signed,
+    )
+
+def head_sha(repo_path: str) -> Optional[str]:
+    """
+    Returns the commit HEAD points to, or None if there is none (e.g. in empty repositories)
+    """
+
+    process = subprocess.run(["git", "rev-parse", "--verify", "-q", "HEAD^{commit}"], cwd=repo_path, capture_output=True, text=True)
+    return process.stdout.strip() if process.returncode == 0 else None
+
+def is_ancestor(repo_path: str, sha: str) -> bool:
+    """
+    Tells whether `sha` is a commit reachable from HEAD (it isn't after a force push, or if it is unknown to the repository)
+    """
+
+    process = subprocess.run(["git", "merge-base", "--is-ancestor", sha, "HEAD"], cwd=repo_path, capture_output=True)
+    return process.returncode == 0
+
+def iter_commit_records(repo_path: str, since_sha: Optional[str] = None) -> Iterator[CommitRecord]:
+    """
+    Yields commit metadata as `git log` streams it, without holding the whole history in memory
+
+    With `since_sha`, only the commits reachable from HEAD but not from `since_sha` are walked.
+    Raises `subprocess.CalledProcessError` once the stream ends if git failed (e.g. on empty repositories).
+    git's stderr goes to a temporary file, as a full stderr pipe would block it while we wait on stdout
+    """
+
+    command = GIT_LOG_COMMAND if since_sha is None else [*GIT_LOG_COMMAND, "HEAD", f"^{since_sha}"]
+    stderr_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        command,
+        cwd=repo_path,
+        stdout=subprocess.PIPE,
+        stderr=stderr_file
+    )
+    assert process.stdout
+
+    try:
+        buffer = b""
+        while True:
+            chunk = process.stdout.read(READ_SIZE)
+            if not chunk:
+                break
+
+            buffer += chunk
+            *records, buffer = buffer.split(b"\0")
+            for record in records:
+                commit_record = parse_raw_commit(record)
+                if commit_record is None:
+                    logger.warning("Skipping unparsable commit record in '{}'", repo_path)
+                    continue
+
+                yield commit_record
+
+        if buffer.strip():
+            commit_record = parse_raw_commit(buffer)
+            if commit_record is not None:
+                yield commit_record
+
+        if process.wait() != 0:
+            stderr_file.seek(0)
+            raise subprocess.CalledProcessError(process.returncode, command, stderr=decode(stderr_file.read()))
+
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+        process.stdout.close()
+        stderr_file.close()
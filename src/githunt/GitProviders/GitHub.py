@@ -2,163 +2,642 @@
 # GitHub
 
 This file hosts the necessary code to retrieve user information from the git host GitHub.
+
+All API calls of a query go through one `requests.Session`, whose keep-alive connection pool is sized to the number of workers.
 """
 
-from concurrent.futures import ThreadPoolExecutor
-from typing import Optional
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Generator, Iterator, Mapping, Optional, TYPE_CHECKING
+from urllib.parse import parse_qs, urlparse
+from threading import Event
+from queue import Full, Queue
 from loguru import logger
 
+from requests.adapters import HTTPAdapter
+
 import requests
 import json
 import time
 
 from githunt.Classes.RepositoryInformation import RepositoryInformation
+from githunt.Classes.HttpStats import HttpStats
 from githunt.Classes.User import User
+from githunt.HttpCache import CachingHTTPAdapter
+from githunt.GitProviders.TokenPool import TokenPool
+from githunt.GitProviders.RateLimiter import jittered, shared_rate_limiter
 
-def http_json_get(url: str, pat: Optional[str]):
-    headers = {"Authorization": f"token {pat}"} if pat else None
+if TYPE_CHECKING:
+    from githunt.HttpCache import HttpCache
 
-    while True:
-        response = requests.get(url, headers=headers)
+API_URL = "https://api.github.com"
+PAGE_SIZE = 100
+# The fields a repository list entry may leave out, which are then read from the repository's details
+DETAIL_FIELDS = ("description", "homepage", "stargazers_count", "forks_count", "watchers_count", "clone_url", "size", "pushed_at")
 
-        logger.trace("HTTP Status {}", response.status_code)
-        logger.trace("Response Body:\n{}", response.text)
+def create_session(workers: int, proxy: Optional[str] = None, http_cache: Optional[HttpCache] = None) -> tuple[requests.Session, HttpStats]:
+    session = requests.Session()
+    session.headers["Accept-Encoding"] = "gzip"
 
-        if response.status_code == 403:
-            remaining = response.headers.get("X-RateLimit-Remaining")
-            reset = response.headers.get("X-RateLimit-Reset")
+    # Blocking pool: at most `workers` connections are opened, and threads beyond that wait for one to be released
+    pool_arguments = {"pool_connections": 1, "pool_maxsize": workers, "pool_block": True}
+    adapter = CachingHTTPAdapter(http_cache, **pool_arguments) if http_cache else HTTPAdapter(**pool_arguments)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
 
-            if remaining == "0" and reset is not None:
-                reset_ts = int(reset)
-                now = int(time.time())
-                sleep_for = max(reset_ts - now, 0) + 1
+    if proxy:
+        session.proxies = {"http": proxy, "https": proxy}
+        logger.debug("Using proxy '{}' for API requests", proxy)
 
-                logger.warning(
-                    "Rate limit exceeded; sleeping for {} seconds until reset",
-                    sleep_for
-                )
+    stats = HttpStats()
+    session.hooks["response"].append(stats.record)
 
-                time.sleep(sleep_for)
-                continue
+    return session, stats
+
+def opened_connections(session: requests.Session) -> int:
+    total = 0
+    for adapter in set(session.adapters.values()):
+        if not isinstance(adapter, HTTPAdapter):
+            continue
+
+        for manager in [adapter.poolmanager, *adapter.proxy_manager.values()]:
+            for key in manager.pools.keys():
+                pool = manager.pools.get(key)
+                total += getattr(pool, "num_connections", 0)
+
+    return total
+
+def log_session_stats(session: requests.Session, stats: HttpStats) -> None:
+    logger.info(
+        "Sent {} API requests over {} connections (latency p50 {:.0f}ms, p95 {:.0f}ms, max {:.0f}ms)",
+        stats.request_count,
+        opened_connections(session),
+        stats.latency_percentile(0.5) * 1000,
+        stats.latency_percentile(0.95) * 1000,
+        stats.latency_percentile(1.0) * 1000
+    )
+    logger.debug("API response status counts: {}", stats.status_counts)
+
+def http_json_get(session: requests.Session, url: str, token_pool: TokenPool):
+    return http_json_request(session, "GET", url, token_pool)
+
+def is_secondary_rate_limit(status_code: int, headers: Mapping[str, str]) -> bool:
+    return status_code == 429 or (status_code == 403 and "Retry-After" in headers)
+
+def rate_limit_delay(status_code: int, headers: Mapping[str, str]) -> Optional[int]:
+    """
+    Returns how many seconds to wait before retrying a rate-limited request, or None if it wasn't rate-limited
+    """
 
-        if response.status_code == 429:
-            retry_after = response.headers.get("Retry-After")
-            sleep_for = int(retry_after) if retry_after else 60
+    if status_code == 403:
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+
+        if remaining == "0" and reset is not None:
+            reset_ts = int(reset)
+            now = int(time.time())
+            sleep_for = max(reset_ts - now, 0) + 1
 
             logger.warning(
-                "Secondary rate limit hit; sleeping for {} seconds",
+                "Rate limit exceeded; it resets in {} seconds",
                 sleep_for
             )
+            return sleep_for
+
+    if is_secondary_rate_limit(status_code, headers):
+        retry_after = headers.get("Retry-After")
+        sleep_for = int(retry_after) if retry_after else 60
+
+        logger.warning(
+            "Secondary rate limit hit; retrying after {} seconds",
+            sleep_for
+        )
+        return sleep_for
+
+    return None
+
+def authorization_headers(token: Optional[str]) -> Optional[dict[str, str]]:
+    return {"Authorization": f"token {token}"} if token else None
+
+def http_json_request(session: requests.Session, method: str, url: str, token_pool: TokenPool, body: Optional[dict] = None, resource: str = "core"):
+    return response_json(http_request(session, method, url, token_pool, body, resource))
+
+def http_request(session: requests.Session, method: str, url: str, token_pool: TokenPool, body: Optional[dict] = None, resource: str = "core") -> requests.Response:
+    """
+    Sends the request through the token pool and the rate limiter, retrying for as long as it gets rate-limited
+    """
+
+    rate_limiter = shared_rate_limiter()
+
+    while True:
+        token_state = token_pool.acquire(resource)
+        rate_limiter.wait(resource)
+        with rate_limiter.slot():
+            response = session.request(method, url, headers=authorization_headers(token_state.token), json=body)
+        token_pool.update(token_state, resource, response.headers)
+
+        logger.trace("HTTP Status {}", response.status_code)
+        logger.trace("Response Body:\n{}", response.text)
+
+        sleep_for = rate_limit_delay(response.status_code, response.headers)
+        if sleep_for is not None:
+            if is_secondary_rate_limit(response.status_code, response.headers):
+                rate_limiter.penalize()
+                sleep_for = jittered(sleep_for)
 
-            time.sleep(sleep_for)
+            token_pool.backoff(token_state, resource, sleep_for)
             continue
 
-        if not response.ok:
-            logger.error("The response is not ok (response.ok is False)")
-            return None
+        rate_limiter.observe(token_pool.budget_rate(resource), resource)
+        return response
 
-        try:
-            return response.json()
-        except json.decoder.JSONDecodeError:
-            logger.exception(
-                "The response JSON appears malformed (json.loads raised json.decoder.JSONDecodeError)"
-            )
-            return None
+def response_json(response: requests.Response):
+    if not response.ok:
+        logger.error("The response is not ok (response.ok is False)")
+        return None
+
+    try:
+        return response.json()
+    except json.decoder.JSONDecodeError:
+        logger.exception(
+            "The response JSON appears malformed (json.loads raised json.decoder.JSONDecodeError)"
+        )
+        return None
+
+def user_from_payload(user_info: dict) -> User:
+    return User(
+        user_info["id"],
+        user_info["login"], # Has the corrected username, so we use that instead of `username`
+        user_info["name"] or user_info["login"],
+        user_info.get("bio"),
+        user_info.get("location"),
+        user_info.get("blog"),
+        user_info.get("email"),
+        user_info["followers"],
+        user_info["following"],
+        user_info["public_repos"],
+        user_info.get("node_id")
+    )
+
+def repository_from_payload(repo_info: dict) -> RepositoryInformation:
+    """
+    Builds a repository from a list entry or a detail payload. Only `full_name` is required, as the other fields may be missing
+    from list entries whose details couldn't be fetched
+    """
+
+    return RepositoryInformation(
+        repo_info["full_name"],
+        repo_info.get("description"),
+        repo_info.get("homepage") or None,
+        repo_info.get("stargazers_count", 0),
+        repo_info.get("forks_count", 0),
+        repo_info.get("watchers_count", 0),
+        repo_info.get("clone_url") or (f"{repo_info['html_url']}.git" if repo_info.get("html_url") else ""),
+        repo_info.get("size"),
+        repo_info.get("pushed_at")
+    )
+
+def has_missing_fields(repo_info: dict) -> bool:
+    return any(field not in repo_info for field in DETAIL_FIELDS)
+
+def fetch_rest_details(session: requests.Session, repo_info: dict, token_pool: TokenPool) -> list[Optional[RepositoryInformation]]:
+    """
+    Fetches the details of one repository from its own endpoint, for anonymous runs (which can't batch them through GraphQL)
+    """
+
+    repo_full_info = http_json_get(session, repo_info["url"], token_pool)
+    return [None if repo_full_info is None else repository_from_payload(repo_full_info)]
+
+def with_details(repos_info: list[dict], details: list[Optional[RepositoryInformation]]) -> Iterator[RepositoryInformation]:
+    """
+    Yields the repositories with their details, or built from their list entry when these couldn't be fetched
+    """
+
+    for repo_info, repo in zip(repos_info, details):
+        if repo is None:
+            logger.debug("Couldn't fetch the details of repository '{}', falling back to its list entry", repo_info["full_name"])
+            repo = repository_from_payload(repo_info)
+
+        yield repo
+
+def log_repository(repo: RepositoryInformation) -> RepositoryInformation:
+    logger.trace(repo.__dict__)
+    logger.info(
+        "Added repository '{}' with {} stargazers to list",
+        repo.name,
+        repo.stars
+    )
+    return repo
+
+def add_repository(repositories: list[RepositoryInformation], repo: RepositoryInformation) -> None:
+    repositories.append(log_repository(repo))
+
+def page_url(repos_url: str, page: int) -> str:
+    return f'{repos_url}?per_page={PAGE_SIZE}&page={page}&type=owner'
+
+def last_page_number(links: Mapping[str, Mapping[str, str]], repository_count: Optional[int] = None) -> Optional[int]:
+    """
+    Tells how many pages a listing has, from the `Link` header of its first page, or else from its repository count when known
+    """
+
+    last_link = links.get("last")
+    if last_link is None:
+        return None if repository_count is None else max(1, -(-repository_count // PAGE_SIZE))
+
+    pages = parse_qs(urlparse(last_link["url"]).query).get("page")
+    return int(pages[0]) if pages else None
+
+def iter_repositories(
+    session: requests.Session,
+    repos_url: str,
+    scan_forks: bool,
+    token_pool: TokenPool,
+    workers: int,
+    fetch_details: bool = False,
+    repository_count: Optional[int] = None,
+    graphql_url: Optional[str] = None
+) -> Iterator[RepositoryInformation]:
+    """
+    Lists the repositories, yielding them as their pages come in. They are built from the list payloads, which carry every field we use
+
+    The first page tells how many pages there are (from its `Link` header, or from `repository_count` when known),
+    then the other pages are all fetched concurrently.
+    With `fetch_details`, the details of the repositories whose list entry lacks some fields are fetched as well: through GraphQL
+    in batches when given its `graphql_url` and a token, otherwise from each repository's own endpoint.
+    The repositories whose details can't be fetched are built from their list entry
+    """
+
+    # Imported here, as the GraphQL provider builds on this module
+    from githunt.GitProviders.GitHubGraphQL import DETAILS_BATCH_SIZE, fetch_details as fetch_graphql_details
+
+    batch_details = graphql_url is not None and token_pool.is_authenticated
 
-def scan_repositories(user: User, repos_url: str, scan_forks: bool, personal_access_token: str, workers: int) -> None:
-    page = 1
     with ThreadPoolExecutor(max_workers=workers) as executor:
-        while True:
-            repos_list = http_json_get(f'{repos_url}?per_page=100&page={page}&type=owner', personal_access_token)
-            if repos_list is None:
-                logger.debug("repos_list is None")
-                return
+        detail_futures: dict[Future, list[dict]] = {}
+        pending_details: list[dict] = []
 
-            repo_futures = []
+        def submit_details() -> None:
+            batch = pending_details.copy()
+            pending_details.clear()
+            logger.debug("Fetching details of repositories {}", [repo_info["full_name"] for repo_info in batch])
+            detail_futures[executor.submit(fetch_graphql_details, session, graphql_url, [repo_info["full_name"] for repo_info in batch], token_pool)] = batch
+
+        def page_repositories(repos_list: list[dict]) -> Iterator[RepositoryInformation]:
             for repo_basic_info in repos_list:
-                if (not scan_forks) and repo_basic_info["fork"]:
+                if (not scan_forks) and repo_basic_info.get("fork"):
                     logger.warning(
                         "Skipping the scan of the fork '{}' (use '--scan-forks' to scan forks)",
                         repo_basic_info["full_name"]
                     )
                     continue
 
-                logger.debug("Scanning repository '{}'", repo_basic_info["full_name"])
-                future = executor.submit(http_json_get, repo_basic_info["url"], personal_access_token)
-                repo_futures.append((repo_basic_info, future))
+                if fetch_details and has_missing_fields(repo_basic_info):
+                    if batch_details:
+                        pending_details.append(repo_basic_info)
+                        if len(pending_details) == DETAILS_BATCH_SIZE:
+                            submit_details()
+                    else:
+                        logger.debug("Fetching details of repository '{}'", repo_basic_info["full_name"])
+                        detail_futures[executor.submit(fetch_rest_details, session, repo_basic_info, token_pool)] = [repo_basic_info]
+                    continue
+
+                yield log_repository(repository_from_payload(repo_basic_info))
 
-            for repo_basic_info, future in repo_futures:
-                repo_full_info = future.result()
-                if repo_full_info is None:
-                    logger.debug("repo_full_info is None")
+        response = http_request(session, "GET", page_url(repos_url, 1), token_pool)
+        repos_list = response_json(response)
+        if repos_list is None:
+            logger.debug("repos_list is None")
+            return
+
+        yield from page_repositories(repos_list)
+
+        last_page = last_page_number(response.links, repository_count)
+
+        if last_page is not None and last_page > 1:
+            logger.debug("Fetching pages 2 to {} of '{}' concurrently", last_page, repos_url)
+            page_futures = [executor.submit(http_json_get, session, page_url(repos_url, page), token_pool) for page in range(2, last_page + 1)]
+
+            for future in as_completed(page_futures):
+                repos_list = future.result()
+                if repos_list is None:
+                    logger.debug("repos_list is None")
                     continue
 
-                repo = RepositoryInformation(
-                    repo_basic_info["full_name"],
-                    repo_basic_info.get("description"),
-                    repo_full_info["homepage"] if repo_full_info["homepage"] != "" else None,
-                    repo_full_info["stargazers_count"],
-                    repo_full_info["forks_count"],
-                    repo_full_info["watchers_count"],
-                    repo_full_info["clone_url"]
-                )
-
-                user.repositories.append(repo)
-                logger.trace(repo.__dict__)
-                logger.info(
-                    "Added repository '{}' with {} stargazers to list",
-                    repo.name,
-                    repo.stars
-                )
-
-            if len(repos_list) < 100:
-                break
+                yield from page_repositories(repos_list)
+
+            # The last page may have been full: repositories might have been created since the count was taken
+            repos_list = page_futures[-1].result()
+
+        # Without a page count, pages are listed one after another
+        page = last_page or 1
+        while repos_list is not None and len(repos_list) >= PAGE_SIZE:
             page += 1
+            repos_list = http_json_get(session, page_url(repos_url, page), token_pool)
+            if repos_list is None:
+                logger.debug("repos_list is None")
+                break
+
+            yield from page_repositories(repos_list)
+
+        if pending_details:
+            submit_details()
+
+        for future in as_completed(detail_futures):
+            batch = detail_futures[future]
+            try:
+                details = future.result()
+            except Exception:
+                logger.exception("Fetching the details of {} repositories failed", len(batch))
+                details = [None] * len(batch)
+
+            for repo in with_details(batch, details):
+                yield log_repository(repo)
+
+def scan_repositories(
+    session: requests.Session,
+    repos_url: str,
+    scan_forks: bool,
+    token_pool: TokenPool,
+    workers: int,
+    fetch_details: bool = False,
+    repository_count: Optional[int] = None,
+    graphql_url: Optional[str] = None
+) -> list[RepositoryInformation]:
+    return list(iter_repositories(session, repos_url, scan_forks, token_pool, workers, fetch_details, repository_count, graphql_url))
+
+def merge_iterators(iterators: list[Iterator[RepositoryInformation]], workers: int) -> Generator[RepositoryInformation, None, None]:
+    """
+    Consumes the iterators concurrently, yielding their items as they come
+
+    The iterators run at most about a page ahead of the consumer each, and are stopped (and closed) once it goes away
+    """
+
+    items: Queue = Queue(maxsize=PAGE_SIZE * len(iterators))
+    done = object()
+    stopped = Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+
+        return False
+
+    def drain(iterator: Iterator[RepositoryInformation]) -> None:
+        try:
+            if stopped.is_set():
+                return
+
+            for item in iterator:
+                if not put(item):
+                    return
+        except Exception as exception:
+            put(exception)
+        finally:
+            if isinstance(iterator, Generator):
+                iterator.close()
+            put(done)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(iterators)))) as executor:
+        for iterator in iterators:
+            executor.submit(drain, iterator)
+
+        try:
+            remaining = len(iterators)
+            while remaining:
+                item = items.get()
+                if item is done:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            stopped.set()
+
+def stream_user(
+    username: str,
+    scan_forks: bool,
+    scan_orgs: bool,
+    blacklisted_orgs: list[str],
+    token_pool: TokenPool,
+    workers: int,
+    proxy: Optional[str] = None,
+    http_cache: Optional[HttpCache] = None,
+    fetch_details: bool = False,
+    filter_org_repositories: bool = False,
+    api_url: str = API_URL,
+    shared_session: Optional[requests.Session] = None,
+    known_emails: Optional[list[str]] = None
+) -> Optional[tuple[User, Generator[RepositoryInformation, None, None]]]:
+    """
+    Queries the user, returning it along with a stream of its repositories (and its organizations'), which is listed as it is consumed
+
+    The stream must be closed if it isn't consumed to the end (which releases the session, when it's not shared).
+
+    With `filter_org_repositories`, the organizations' repositories the user never authored a commit in
+    (through its account, its public email or any of `known_emails`) are left out.
+    A `shared_session` (which several targets query through) is left open, and its stats to its owner
+    """
+
+    if shared_session is not None:
+        session = shared_session
+    else:
+        session, stats = create_session(workers, proxy, http_cache)
+
+    def close() -> None:
+        if shared_session is not None:
+            return
+
+        log_session_stats(session, stats)
+        token_pool.log_summary()
+        shared_rate_limiter().log_summary()
+        session.close()
+
+        if http_cache is not None:
+            logger.info("Served {} API responses from the HTTP cache (304 Not Modified)", http_cache.revalidated)
+            http_cache.evict()
+
+    try:
+        logger.debug("Querying user {}", username)
+        user_info = http_json_get(session, f"{api_url}/users/{username}", token_pool)
+    except Exception:
+        close()
+        raise
 
-def query_user(username: str, scan_forks: bool, scan_orgs: bool, blacklisted_orgs: list[str], personal_access_token: str, workers: int) -> Optional[User]:
-    logger.debug("Querying user {}", username)
-    user_info = http_json_get(f"https://api.github.com/users/{username}", personal_access_token)
     if user_info is None:
         logger.debug("user_info is None")
-        return
+        close()
+        return None
 
-    user = User(
-        user_info["id"],
-        user_info["login"], # Has the corrected username, so we use that instead of `username`
-        user_info["name"] or user_info["login"],
-        user_info.get("bio"),
-        user_info.get("location"),
-        user_info.get("blog"),
-        user_info.get("email"),
-        user_info["followers"],
-        user_info["following"],
-        user_info["public_repos"]
-    )
+    user = user_from_payload(user_info)
     logger.trace(user.__dict__)
 
-    scan_repositories(user, user_info["repos_url"], scan_forks, personal_access_token, workers)
+    def repositories() -> Generator[RepositoryInformation, None, None]:
+        try:
+            yield from iter_user_repositories(session, api_url, user_info, scan_forks, scan_orgs, blacklisted_orgs, token_pool, workers, fetch_details, filter_org_repositories, known_emails)
+        finally:
+            close()
+
+    return user, repositories()
+
+def contributor_emails(public_email: Optional[str], known_emails: Optional[list[str]]) -> list[str]:
+    """
+    Returns the emails the target's commits may be authored with beyond its account's verified ones:
+    its public email, and the ones previous scans captured
+    """
+
+    return list(dict.fromkeys([*([public_email] if public_email else []), *(known_emails or [])]))
+
+def can_filter_contributions(user_info: dict, token_pool: TokenPool) -> bool:
+    if not token_pool.is_authenticated:
+        logger.warning("Not filtering organization repositories by contributor, as GitHub's GraphQL API requires a Personal Access Token")
+        return False
+
+    if not user_info.get("node_id"):
+        logger.warning("Not filtering organization repositories by contributor, as the global ID of '{}' is unknown", user_info["login"])
+        return False
+
+    return True
+
+def iter_contributed_repositories(
+    session: requests.Session,
+    graphql_url: str,
+    repositories: Iterator[RepositoryInformation],
+    author_id: str,
+    emails: list[str],
+    token_pool: TokenPool,
+    workers: int
+) -> Iterator[RepositoryInformation]:
+    """
+    Filters a stream of repositories down to the ones the account (or any of `emails`) authored commits in,
+    checking them through GraphQL in batches, concurrently as they come in.
+    The repositories of a batch whose check fails are all kept, like those GraphQL couldn't answer for
+    """
+
+    # Imported here, as the GraphQL provider builds on this module
+    from githunt.GitProviders.GitHubGraphQL import CONTRIBUTION_BATCH_SIZE, check_contributions
+
+    checked: Queue = Queue()
+    submitted = 0
+    kept = 0
+
+    def drain(block: bool) -> Iterator[RepositoryInformation]:
+        nonlocal submitted, kept
+
+        while submitted and (block or not checked.empty()):
+            batch, future = checked.get()
+            submitted -= 1
+
+            try:
+                contributions = future.result()
+            except Exception:
+                logger.exception("Checking contributions to {} repositories failed, keeping them", len(batch))
+                contributions = [True] * len(batch)
+
+            for repo_info, has_contributed in zip(batch, contributions):
+                if has_contributed:
+                    kept += 1
+                    yield repo_info
+                else:
+                    logger.debug("Skipping repository '{}', which the target never authored a commit in", repo_info.name)
+
+    def submit(batch: list[RepositoryInformation]) -> None:
+        nonlocal submitted
+
+        submitted += 1
+        future = executor.submit(check_contributions, session, graphql_url, batch, author_id, emails, token_pool)
+        future.add_done_callback(lambda future: checked.put((batch, future)))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        total = 0
+        batch: list[RepositoryInformation] = []
+        for repo_info in repositories:
+            total += 1
+            batch.append(repo_info)
+            if len(batch) == CONTRIBUTION_BATCH_SIZE:
+                submit(batch)
+                batch = []
+
+            yield from drain(block=False)
+
+        if batch:
+            submit(batch)
+        yield from drain(block=True)
+
+    logger.info("Kept {} of {} organization repositories, which the target authored commits in", kept, total)
+
+def iter_user_repositories(
+    session: requests.Session,
+    api_url: str,
+    user_info: dict,
+    scan_forks: bool,
+    scan_orgs: bool,
+    blacklisted_orgs: list[str],
+    token_pool: TokenPool,
+    workers: int,
+    fetch_details: bool,
+    filter_org_repositories: bool,
+    known_emails: Optional[list[str]] = None
+) -> Iterator[RepositoryInformation]:
+    own_repositories = iter_repositories(session, user_info["repos_url"], scan_forks, token_pool, workers, fetch_details, user_info["public_repos"], f"{api_url}/graphql")
     if not scan_orgs:
         logger.warning("Not scanning organizations (as requested with '--no-scan-orgs')")
-        return user
+        yield from own_repositories
+        return
 
-    orgs_info = http_json_get(user_info["organizations_url"], personal_access_token)
+    orgs_info = http_json_get(session, user_info["organizations_url"], token_pool)
     if orgs_info is None:
         logger.debug("orgs_info is None")
         logger.warning("Querying organizations failed, but the bare minimum information required is present. Skipping organization scanning")
-        return user
+        yield from own_repositories
+        return
 
     logger.debug("Scanning organizations..")
 
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        futures = []
-        for org_info in orgs_info:
-            if org_info["login"] in blacklisted_orgs:
-                logger.warning("Skipping scanning blacklisted organization {}", org_info["login"])
-                continue
-            futures.append(executor.submit(scan_repositories, user, org_info["repos_url"], scan_forks, personal_access_token, workers))
-
-        for future in futures:
-            future.result()
+    if filter_org_repositories and not can_filter_contributions(user_info, token_pool):
+        filter_org_repositories = False
 
+    streams = [own_repositories]
+    for org_info in orgs_info:
+        if org_info["login"] in blacklisted_orgs:
+            logger.warning("Skipping scanning blacklisted organization {}", org_info["login"])
+            continue
+        org_repositories = iter_repositories(session, org_info["repos_url"], scan_forks, token_pool, workers, fetch_details, graphql_url=f"{api_url}/graphql")
+        if filter_org_repositories:
+            org_repositories = iter_contributed_repositories(
+                session,
+                f"{api_url}/graphql",
+                org_repositories,
+                user_info["node_id"],
+                contributor_emails(user_info.get("email"), known_emails),
+                token_pool,
+                workers
+            )
+        streams.append(org_repositories)
+
+    yield from merge_iterators(streams, workers)
+
+def query_user(
+    username: str,
+    scan_forks: bool,
+    scan_orgs: bool,
+    blacklisted_orgs: list[str],
+    token_pool: TokenPool,
+    workers: int,
+    proxy: Optional[str] = None,
+    http_cache: Optional[HttpCache] = None,
+    fetch_details: bool = False,
+    filter_org_repositories: bool = False,
+    api_url: str = API_URL,
+    known_emails: Optional[list[str]] = None
+) -> Optional[User]:
+    streamed = stream_user(username, scan_forks, scan_orgs, blacklisted_orgs, token_pool, workers, proxy, http_cache, fetch_details, filter_org_repositories, api_url, known_emails=known_emails)
+    if streamed is None:
+        return None
+
+    user, repositories = streamed
+    user.repositories.extend(repositories)
     return user
-
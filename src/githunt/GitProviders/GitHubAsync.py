@@ -0,0 +1,430 @@
+"""
+# GitHubAsync
+
+This file hosts the asyncio engine of the GitHub REST provider, built on `httpx`.
+
+Every request of a query runs on a single event loop: in-flight requests are bounded by one semaphore
+(and one connection pool) sized to the number of workers, however many organizations get scanned at once.
+It returns the same `User` as the threaded provider, from the same payloads.
+"""
+
+from typing import Any, Mapping, Optional, TYPE_CHECKING
+from loguru import logger
+
+import asyncio
+import httpx
+import json
+
+from githunt.Classes.RepositoryInformation import RepositoryInformation
+from githunt.Classes.HttpStats import HttpStats
+from githunt.Classes.User import User
+from githunt.GitProviders.GitHub import (
+    API_URL,
+    PAGE_SIZE,
+    authorization_headers,
+    can_filter_contributions,
+    contributor_emails,
+    is_secondary_rate_limit,
+    rate_limit_delay,
+    user_from_payload,
+    last_page_number,
+    page_url,
+    has_missing_fields,
+    repository_from_payload,
+    with_details,
+    add_repository
+)
+from githunt.GitProviders.GitHubGraphQL import (
+    CONTRIBUTION_BATCH_SIZE,
+    DETAILS_BATCH_SIZE,
+    contributions_query,
+    contributions_variables,
+    contributions_from_data,
+    details_query,
+    details_variables,
+    details_from_data
+)
+from githunt.GitProviders.RateLimiter import RateLimiter, jittered, shared_rate_limiter
+from githunt.HttpCache import PAGINATION_HEADERS
+from githunt.GitProviders.TokenPool import TokenPool, TokenState
+
+if TYPE_CHECKING:
+    from githunt.HttpCache import HttpCache
+
+class AsyncGitHubClient:
+    def __init__(self, workers: int, token_pool: TokenPool, proxy: Optional[str] = None, http_cache: Optional[HttpCache] = None) -> None:
+        self.client = httpx.AsyncClient(
+            headers={"Accept-Encoding": "gzip"},
+            limits=httpx.Limits(max_connections=workers, max_keepalive_connections=workers),
+            proxy=proxy,
+            timeout=None, # Like `requests`, which the threaded provider uses
+            follow_redirects=True
+        )
+        self.rate_limiter: RateLimiter = shared_rate_limiter()
+        # Requests wait here rather than in the pool, which would time them out
+        self.semaphore = asyncio.Semaphore(min(workers, self.rate_limiter.max_concurrency))
+        self.token_pool: TokenPool = token_pool
+        self.http_cache: Optional[HttpCache] = http_cache
+        self.stats = HttpStats()
+
+    async def acquire_token(self, resource: str) -> TokenState:
+        while True:
+            token_state, wait = self.token_pool.choose(resource)
+            if wait == 0:
+                return token_state
+
+            logger.warning("Every token is rate-limited; sleeping for {:.0f} seconds", wait)
+            await asyncio.sleep(wait)
+
+    async def get_json(self, url: str):
+        return await self.request_json("GET", url)
+
+    async def get_page(self, url: str) -> tuple[Optional[list], Mapping[str, Mapping[str, str]]]:
+        """
+        Fetches a listing page, along with the links (from its `Link` header) to the other pages
+        """
+
+        return await self.request("GET", url)
+
+    async def post_graphql(self, url: str, query: str, variables: dict) -> Optional[dict]:
+        response = await self.request_json("POST", url, {"query": query, "variables": variables}, "graphql")
+        if response is None:
+            return None
+
+        for error in response.get("errors") or []:
+            logger.warning("GraphQL error: {}", error.get("message"))
+
+        return response.get("data")
+
+    async def request_json(self, method: str, url: str, body: Optional[dict] = None, resource: str = "core"):
+        data, _ = await self.request(method, url, body, resource)
+        return data
+
+    async def request(self, method: str, url: str, body: Optional[dict] = None, resource: str = "core") -> tuple[Any, Mapping[str, Mapping[str, str]]]:
+        while True:
+            token_state = await self.acquire_token(resource)
+            headers = authorization_headers(token_state.token) or {}
+
+            cache_key = None
+            cache_entry = None
+            if self.http_cache is not None and method == "GET":
+                cache_key = self.http_cache.key_for(url, headers.get("Authorization"))
+                cache_entry = await asyncio.to_thread(self.http_cache.load, cache_key) # Disk I/O is kept off the event loop
+
+                if cache_entry is not None:
+                    if cache_entry["etag"]:
+                        headers["If-None-Match"] = cache_entry["etag"]
+                    if cache_entry["last_modified"]:
+                        headers["If-Modified-Since"] = cache_entry["last_modified"]
+
+            delay = self.rate_limiter.reserve(resource)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            async with self.semaphore:
+                response = await self.client.request(method, url, headers=headers, json=body)
+
+            self.stats.record(response)
+            self.token_pool.update(token_state, resource, response.headers)
+            logger.trace("HTTP Status {}", response.status_code)
+
+            sleep_for = rate_limit_delay(response.status_code, response.headers)
+            if sleep_for is not None:
+                if is_secondary_rate_limit(response.status_code, response.headers):
+                    self.rate_limiter.penalize()
+                    sleep_for = jittered(sleep_for)
+
+                self.token_pool.backoff(token_state, resource, sleep_for)
+                continue
+
+            self.rate_limiter.observe(self.token_pool.budget_rate(resource), resource)
+            break
+
+        if self.http_cache is not None and cache_key is not None:
+            if response.status_code == 304 and cache_entry is not None:
+                logger.trace("Serving '{}' from the HTTP cache", url)
+                for name, value in cache_entry.get("headers", {}).items():
+                    if name not in response.headers:
+                        response.headers[name] = value
+                await asyncio.to_thread(self.http_cache.touch, cache_key)
+                return json.loads(cache_entry["body"]), response.links
+
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if response.status_code == 200 and (etag or last_modified):
+                cached_headers = {name: response.headers[name] for name in PAGINATION_HEADERS if name in response.headers}
+                await asyncio.to_thread(self.http_cache.store, cache_key, url, etag, last_modified, response.content, cached_headers)
+
+        logger.trace("Response Body:\n{}", response.text)
+
+        if not response.is_success:
+            logger.error("The response is not ok (response.is_success is False)")
+            return None, response.links
+
+        try:
+            return response.json(), response.links
+        except json.decoder.JSONDecodeError:
+            logger.exception(
+                "The response JSON appears malformed (json.loads raised json.decoder.JSONDecodeError)"
+            )
+            return None, response.links
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+        logger.info(
+            "Sent {} API requests (latency p50 {:.0f}ms, p95 {:.0f}ms, max {:.0f}ms)",
+            self.stats.request_count,
+            self.stats.latency_percentile(0.5) * 1000,
+            self.stats.latency_percentile(0.95) * 1000,
+            self.stats.latency_percentile(1.0) * 1000
+        )
+        logger.debug("API response status counts: {}", self.stats.status_counts)
+        self.token_pool.log_summary()
+        self.rate_limiter.log_summary()
+
+async def scan_repositories(
+    api: AsyncGitHubClient,
+    repos_url: str,
+    scan_forks: bool,
+    fetch_details: bool,
+    repository_count: Optional[int] = None,
+    graphql_url: Optional[str] = None
+) -> list[RepositoryInformation]:
+    """
+    Lists the repositories like the threaded provider: the first page tells how many pages there are,
+    then the other pages are all fetched concurrently. Details are fetched the same way too
+    """
+
+    repositories: list[RepositoryInformation] = []
+    detail_tasks: list[tuple[list[dict], asyncio.Task]] = []
+    pending_details: list[dict] = []
+    batch_details = graphql_url is not None and api.token_pool.is_authenticated
+
+    def submit_details() -> None:
+        assert graphql_url is not None
+        batch = pending_details.copy()
+        pending_details.clear()
+        logger.debug("Fetching details of repositories {}", [repo_info["full_name"] for repo_info in batch])
+        detail_tasks.append((batch, asyncio.create_task(fetch_graphql_details(api, graphql_url, [repo_info["full_name"] for repo_info in batch]))))
+
+    def add_page(repos_list: list[dict]) -> None:
+        for repo_basic_info in repos_list:
+            if (not scan_forks) and repo_basic_info.get("fork"):
+                logger.warning(
+                    "Skipping the scan of the fork '{}' (use '--scan-forks' to scan forks)",
+                    repo_basic_info["full_name"]
+                )
+                continue
+
+            if fetch_details and has_missing_fields(repo_basic_info):
+                if batch_details:
+                    pending_details.append(repo_basic_info)
+                    if len(pending_details) == DETAILS_BATCH_SIZE:
+                        submit_details()
+                else:
+                    logger.debug("Fetching details of repository '{}'", repo_basic_info["full_name"])
+                    detail_tasks.append(([repo_basic_info], asyncio.create_task(fetch_rest_details(api, repo_basic_info))))
+                continue
+
+            add_repository(repositories, repository_from_payload(repo_basic_info))
+
+    repos_list, links = await api.get_page(page_url(repos_url, 1))
+    if repos_list is None:
+        logger.debug("repos_list is None")
+        return repositories
+
+    add_page(repos_list)
+
+    last_page = last_page_number(links, repository_count)
+    if last_page is not None and last_page > 1:
+        logger.debug("Fetching pages 2 to {} of '{}' concurrently", last_page, repos_url)
+        pages = await asyncio.gather(*(api.get_json(page_url(repos_url, page)) for page in range(2, last_page + 1)))
+
+        for repos_list in pages:
+            if repos_list is None:
+                logger.debug("repos_list is None")
+                continue
+
+            add_page(repos_list)
+
+        # The last page may have been full: repositories might have been created since the count was taken
+        repos_list = pages[-1]
+
+    # Without a page count, pages are listed one after another
+    page = last_page or 1
+    while repos_list is not None and len(repos_list) >= PAGE_SIZE:
+        page += 1
+        repos_list = await api.get_json(page_url(repos_url, page))
+        if repos_list is None:
+            logger.debug("repos_list is None")
+            break
+
+        add_page(repos_list)
+
+    if pending_details:
+        submit_details()
+
+    results = await asyncio.gather(*(task for _, task in detail_tasks), return_exceptions=True)
+    for (batch, _), details in zip(detail_tasks, results):
+        if isinstance(details, Exception):
+            logger.opt(exception=details).error("Fetching the details of {} repositories failed", len(batch))
+            details = [None] * len(batch)
+
+        for repo in with_details(batch, details):
+            add_repository(repositories, repo)
+
+    return repositories
+
+async def fetch_rest_details(api: AsyncGitHubClient, repo_info: dict) -> list[Optional[RepositoryInformation]]:
+    repo_full_info = await api.get_json(repo_info["url"])
+    return [None if repo_full_info is None else repository_from_payload(repo_full_info)]
+
+async def fetch_graphql_details(api: AsyncGitHubClient, graphql_url: str, names: list[str]) -> list[Optional[RepositoryInformation]]:
+    data = await api.post_graphql(graphql_url, details_query(len(names)), details_variables(names))
+    return details_from_data(data, len(names))
+
+async def check_contributions(api: AsyncGitHubClient, graphql_url: str, repositories: list[RepositoryInformation], author_id: str, emails: list[str]) -> list[bool]:
+    data = await api.post_graphql(graphql_url, contributions_query(len(repositories), bool(emails)), contributions_variables(repositories, author_id, emails))
+    return contributions_from_data(data, len(repositories))
+
+async def filter_contributed(api: AsyncGitHubClient, graphql_url: str, repositories: list[RepositoryInformation], author_id: str, emails: list[str]) -> list[RepositoryInformation]:
+    batches = [repositories[start:start + CONTRIBUTION_BATCH_SIZE] for start in range(0, len(repositories), CONTRIBUTION_BATCH_SIZE)]
+    contributed = await asyncio.gather(*(check_contributions(api, graphql_url, batch, author_id, emails) for batch in batches), return_exceptions=True)
+    for i, (batch, contributions) in enumerate(zip(batches, contributed)):
+        if isinstance(contributions, Exception):
+            logger.opt(exception=contributions).error("Checking contributions to {} repositories failed, keeping them", len(batch))
+            contributed[i] = [True] * len(batch)
+
+    kept = []
+    for repo_info, has_contributed in zip(repositories, (has_contributed for batch in contributed for has_contributed in batch)):
+        if has_contributed:
+            kept.append(repo_info)
+        else:
+            logger.debug("Skipping repository '{}', which the target never authored a commit in", repo_info.name)
+
+    logger.info("Kept {} of {} organization repositories, which the target authored commits in", len(kept), len(repositories))
+    return kept
+
+async def scan_organizations(
+    api: AsyncGitHubClient,
+    api_url: str,
+    user_info: dict,
+    blacklisted_orgs: list[str],
+    scan_forks: bool,
+    fetch_details: bool,
+    filter_org_repositories: bool,
+    known_emails: Optional[list[str]]
+) -> list[RepositoryInformation]:
+    organizations_url = user_info["organizations_url"]
+    orgs_info = await api.get_json(organizations_url)
+    if orgs_info is None:
+        logger.debug("orgs_info is None")
+        logger.warning("Querying organizations failed, but the bare minimum information required is present. Skipping organization scanning")
+        return []
+
+    logger.debug("Scanning organizations..")
+
+    scans = []
+    for org_info in orgs_info:
+        if org_info["login"] in blacklisted_orgs:
+            logger.warning("Skipping scanning blacklisted organization {}", org_info["login"])
+            continue
+        scans.append(scan_repositories(api, org_info["repos_url"], scan_forks, fetch_details, graphql_url=f"{api_url}/graphql"))
+
+    repositories = [repo for repositories in await asyncio.gather(*scans) for repo in repositories]
+    if filter_org_repositories and can_filter_contributions(user_info, api.token_pool):
+        emails = contributor_emails(user_info.get("email"), known_emails)
+        return await filter_contributed(api, f"{api_url}/graphql", repositories, user_info["node_id"], emails)
+
+    return repositories
+
+async def query_user_async(
+    api: AsyncGitHubClient,
+    api_url: str,
+    username: str,
+    scan_forks: bool,
+    scan_orgs: bool,
+    blacklisted_orgs: list[str],
+    fetch_details: bool,
+    filter_org_repositories: bool,
+    known_emails: Optional[list[str]] = None
+) -> Optional[User]:
+    logger.debug("Querying user {}", username)
+    user_info = await api.get_json(f"{api_url}/users/{username}")
+    if user_info is None:
+        logger.debug("user_info is None")
+        return
+
+    user = user_from_payload(user_info)
+    logger.trace(user.__dict__)
+
+    if not scan_orgs:
+        logger.warning("Not scanning organizations (as requested with '--no-scan-orgs')")
+        user.repositories.extend(await scan_repositories(api, user_info["repos_url"], scan_forks, fetch_details, user_info["public_repos"], f"{api_url}/graphql"))
+        return user
+
+    # The user's repositories and the organizations' are listed concurrently
+    own_repositories, org_repositories = await asyncio.gather(
+        scan_repositories(api, user_info["repos_url"], scan_forks, fetch_details, user_info["public_repos"], f"{api_url}/graphql"),
+        scan_organizations(api, api_url, user_info, blacklisted_orgs, scan_forks, fetch_details, filter_org_repositories, known_emails)
+    )
+    user.repositories.extend(own_repositories)
+    user.repositories.extend(org_repositories)
+
+    return user
+
+async def run_query_user(
+    username: str,
+    scan_forks: bool,
+    scan_orgs: bool,
+    blacklisted_orgs: list[str],
+    token_pool: TokenPool,
+    workers: int,
+    proxy: Optional[str],
+    http_cache: Optional[HttpCache],
+    fetch_details: bool,
+    filter_org_repositories: bool,
+    api_url: str,
+    known_emails: Optional[list[str]]
+) -> Optional[User]:
+    api = AsyncGitHubClient(workers, token_pool, proxy, http_cache)
+
+    try:
+        return await query_user_async(api, api_url, username, scan_forks, scan_orgs, blacklisted_orgs, fetch_details, filter_org_repositories, known_emails)
+    finally:
+        await api.close()
+
+def query_user(
+    username: str,
+    scan_forks: bool,
+    scan_orgs: bool,
+    blacklisted_orgs: list[str],
+    token_pool: TokenPool,
+    workers: int,
+    proxy: Optional[str] = None,
+    http_cache: Optional[HttpCache] = None,
+    fetch_details: bool = False,
+    filter_org_repositories: bool = False,
+    api_url: str = API_URL,
+    known_emails: Optional[list[str]] = None
+) -> Optional[User]:
+    try:
+        return asyncio.run(run_query_user(
+            username,
+            scan_forks,
+            scan_orgs,
+            blacklisted_orgs,
+            token_pool,
+            workers,
+            proxy,
+            http_cache,
+            fetch_details,
+            filter_org_repositories,
+            api_url,
+            known_emails
+        ))
+    finally:
+        if http_cache is not None:
+            logger.info("Served {} API responses from the HTTP cache (304 Not Modified)", http_cache.revalidated)
+            http_cache.evict()
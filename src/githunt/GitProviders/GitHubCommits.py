@@ -0,0 +1,169 @@
+"""
+# GitHubCommits
+
+This file hosts clone-less commit ingestion: the commit metadata identity expansion needs (author name and email,
+commit date with its UTC offset, signature presence) is read from GitHub's GraphQL API instead of a clone.
+
+Only the commits authored by the target's account are listed (GitHub attributes them through every email verified on it),
+100 per query. GraphQL is used as its `GitTimestamp` dates keep their UTC offset, which the REST API converts to UTC.
+Commits made under emails that aren't linked to the account are left out, where a clone sees every identity of the repository:
+this is why ingestion is opt-in (`--api-ingestion`).
+"""
+
+from datetime import datetime
+from typing import Iterator, Optional
+from loguru import logger
+
+import requests
+
+from githunt.Classes.CommitRecord import CommitRecord
+from githunt.Classes.RepositoryInformation import RepositoryInformation
+from githunt.Classes.RepositorySummary import RepositorySummary
+from githunt.Classes.Identity import Identity
+from githunt.Classes.User import User
+from githunt.GitProviders.GitHub import create_session
+from githunt.GitProviders.GitHubGraphQL import GRAPHQL_URL, PAGE_SIZE, graphql_query
+from githunt.GitProviders.TokenPool import LOW_BUDGET, TokenPool
+from githunt.RepositoriesVisitor import group_identities
+
+DEFAULT_MIN_SIZE_MB = 256
+
+# GraphQL budget (summed over the tokens) under which repositories are cloned rather than ingested
+MIN_BUDGET = 1000
+
+REPOSITORY_COMMITS_QUERY = f"""
+query RepositoryCommits($owner: String!, $name: String!, $author: ID!, $cursor: String) {{
+    repository(owner: $owner, name: $name) {{
+        defaultBranchRef {{
+            target {{
+                ... on Commit {{
+                    history(first: {PAGE_SIZE}, after: $cursor, author: {{ id: $author }}) {{
+                        pageInfo {{ hasNextPage endCursor }}
+                        nodes {{
+                            oid
+                            author {{ name email }}
+                            committer {{ date }}
+                            signature {{ isValid }}
+                        }}
+                    }}
+                }}
+            }}
+        }}
+    }}
+}}
+"""
+
+class IngestionAborted(Exception):
+    pass
+
+def commit_from_node(node: dict) -> CommitRecord:
+    return CommitRecord(
+        sha=node["oid"],
+        author_name=node["author"]["name"] or "",
+        author_email=node["author"]["email"] or "",
+        committed_datetime=datetime.fromisoformat(node["committer"]["date"]),
+        is_signed=node.get("signature") is not None,
+    )
+
+class ApiCommitSource:
+    """
+    Reads a target's commits of the repositories worth it from the API: the ones of at least `min_size_mb`,
+    while the tokens' GraphQL budget lasts (repositories are cloned otherwise)
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        token_pool: TokenPool,
+        author_id: str,
+        min_size_mb: float = DEFAULT_MIN_SIZE_MB,
+        graphql_url: str = GRAPHQL_URL
+    ) -> None:
+        self.session: requests.Session = session
+        self.token_pool: TokenPool = token_pool
+        self.author_id: str = author_id
+        self.min_size_kb: float = min_size_mb * 1024
+        self.graphql_url: str = graphql_url
+
+    def prefers_api(self, repo_info: RepositoryInformation) -> bool:
+        if repo_info.size_kb is None or repo_info.size_kb < self.min_size_kb:
+            return False
+
+        return self.token_pool.total_remaining("graphql") >= MIN_BUDGET
+
+    def iter_commits(self, repo_info: RepositoryInformation) -> Iterator[CommitRecord]:
+        """
+        Raises `IngestionAborted` if a page can't be fetched, or once the GraphQL budget runs low
+        """
+
+        owner, name = repo_info.name.split("/", 1)
+        cursor: Optional[str] = None
+
+        while True:
+            if self.token_pool.total_remaining("graphql") < LOW_BUDGET:
+                raise IngestionAborted("the GraphQL rate limit budget ran low")
+
+            variables = {"owner": owner, "name": name, "author": self.author_id, "cursor": cursor}
+            data = graphql_query(self.session, self.graphql_url, REPOSITORY_COMMITS_QUERY, variables, self.token_pool)
+
+            repository = (data or {}).get("repository")
+            if repository is None:
+                raise IngestionAborted("the repository couldn't be queried")
+
+            if repository["defaultBranchRef"] is None: # Empty repository
+                return
+
+            history = repository["defaultBranchRef"]["target"]["history"]
+            for node in history["nodes"]:
+                yield commit_from_node(node)
+
+            if not history["pageInfo"]["hasNextPage"]:
+                return
+            cursor = history["pageInfo"]["endCursor"]
+
+    def summarize(self, repo_info: RepositoryInformation) -> Optional[RepositorySummary]:
+        """
+        Returns the summary of the target's commits in the repository, or None if the repository should be cloned instead
+        """
+
+        logger.info("Reading the commits of repository '{}' from the API ({} MiB, not cloned)", repo_info.name, (repo_info.size_kb or 0) // 1024)
+        identities: dict[tuple[str, str], Identity] = {}
+
+        try:
+            group_identities(self.iter_commits(repo_info), repo_info, identities)
+        except IngestionAborted as exception:
+            logger.warning("Stopped reading the commits of repository '{}' from the API ({}), cloning it instead", repo_info.name, exception)
+            return None
+
+        return RepositorySummary(
+            repo_info.name,
+            identities,
+            sum(identity.commit_count for identity in identities.values())
+        )
+
+def create_commit_source(
+    token_pool: TokenPool,
+    user: User,
+    min_size_mb: Optional[float] = None,
+    graphql_url: str = GRAPHQL_URL,
+    session: Optional[requests.Session] = None,
+    workers: int = 1,
+    proxy: Optional[str] = None
+) -> Optional[ApiCommitSource]:
+    """
+    Returns None when the user's commits can't be read from the API. Without a `session`, the source gets its own,
+    which its caller closes
+    """
+
+    if not token_pool.is_authenticated:
+        logger.debug("Not reading commits from the API, as GitHub's GraphQL API requires a Personal Access Token")
+        return None
+
+    if user.node_id is None:
+        logger.debug("Not reading commits from the API, as the global ID of '{}' is unknown", user.name)
+        return None
+
+    if session is None:
+        session, _ = create_session(workers, proxy)
+
+    return ApiCommitSource(session, token_pool, user.node_id, DEFAULT_MIN_SIZE_MB if min_size_mb is None else min_size_mb, graphql_url)
@@ -0,0 +1,380 @@
+"""
+# GitHubGraphQL
+
+This file hosts the GraphQL alternative to the GitHub REST provider.
+
+The profile, the owned repositories and the organizations come in one query (plus one per extra page of 100 repositories),
+then the organizations' repositories are fetched `ORGANIZATION_BATCH_SIZE` organizations at a time, through aliased fields.
+It populates the same `User` and `RepositoryInformation` objects as the REST provider.
+
+Aliased fields also check which organization repositories the target authored commits in, `CONTRIBUTION_BATCH_SIZE` at a time
+(which every provider filters organization repositories with), and fetch the details missing from REST repository lists,
+`DETAILS_BATCH_SIZE` at a time.
+GitHub's GraphQL API requires a token, and counts against its own ("graphql") rate limit budget.
+"""
+
+from typing import Optional, TYPE_CHECKING
+from loguru import logger
+
+import requests
+
+from githunt.Classes.RepositoryInformation import RepositoryInformation
+from githunt.Classes.User import User
+from githunt.GitProviders.GitHub import contributor_emails, create_session, log_session_stats, http_json_request
+from githunt.GitProviders.TokenPool import TokenPool
+from githunt.GitProviders.RateLimiter import shared_rate_limiter
+
+if TYPE_CHECKING:
+    from githunt.HttpCache import HttpCache
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+PAGE_SIZE = 100
+ORGANIZATION_BATCH_SIZE = 10
+CONTRIBUTION_BATCH_SIZE = 50
+DETAILS_BATCH_SIZE = 100
+
+REPOSITORY_FIELDS = """
+    nameWithOwner
+    description
+    homepageUrl
+    isFork
+    stargazerCount
+    forkCount
+    watchers { totalCount }
+    url
+    diskUsage
+    pushedAt
+"""
+
+REPOSITORY_CONNECTION = f"""
+    totalCount
+    pageInfo {{ hasNextPage endCursor }}
+    nodes {{ {REPOSITORY_FIELDS} }}
+"""
+
+USER_PROFILE_QUERY = f"""
+query UserProfile($login: String!) {{
+    user(login: $login) {{
+        id
+        databaseId
+        login
+        name
+        bio
+        location
+        websiteUrl
+        email
+        followers {{ totalCount }}
+        following {{ totalCount }}
+        organizations(first: {PAGE_SIZE}) {{
+            pageInfo {{ hasNextPage }}
+            nodes {{ login }}
+        }}
+        repositories(first: {PAGE_SIZE}, privacy: PUBLIC, ownerAffiliations: OWNER) {{ {REPOSITORY_CONNECTION} }}
+    }}
+}}
+"""
+
+USER_REPOSITORIES_QUERY = f"""
+query UserRepositories($login: String!, $cursor: String) {{
+    user(login: $login) {{
+        repositories(first: {PAGE_SIZE}, after: $cursor, privacy: PUBLIC, ownerAffiliations: OWNER) {{ {REPOSITORY_CONNECTION} }}
+    }}
+}}
+"""
+
+def organization_repositories_query(count: int) -> str:
+    arguments = ", ".join(f"$login{i}: String!, $cursor{i}: String" for i in range(count))
+    fields = "\n".join(
+        f"org{i}: organization(login: $login{i}) {{ repositories(first: {PAGE_SIZE}, after: $cursor{i}, privacy: PUBLIC) {{ {REPOSITORY_CONNECTION} }} }}"
+        for i in range(count)
+    )
+
+    return f"query OrganizationRepositories({arguments}) {{\n{fields}\n}}"
+
+def contributions_query(count: int, with_emails: bool) -> str:
+    """
+    Asks for one commit of each repository's default branch authored by the account (and one authored with any of the emails)
+    """
+
+    arguments = ", ".join(["$author: ID!", *(["$emails: [String!]"] if with_emails else []), *(f"$owner{i}: String!, $name{i}: String!" for i in range(count))])
+    histories = "byAccount: history(first: 1, author: { id: $author }) { nodes { oid } }"
+    if with_emails:
+        histories += " byEmail: history(first: 1, author: { emails: $emails }) { nodes { oid } }"
+
+    fields = "\n".join(
+        f"repo{i}: repository(owner: $owner{i}, name: $name{i}) {{ defaultBranchRef {{ target {{ ... on Commit {{ {histories} }} }} }} }}"
+        for i in range(count)
+    )
+
+    return f"query RepositoryContributions({arguments}) {{\n{fields}\n}}"
+
+def details_query(count: int) -> str:
+    arguments = ", ".join(f"$owner{i}: String!, $name{i}: String!" for i in range(count))
+    fields = "\n".join(f"repo{i}: repository(owner: $owner{i}, name: $name{i}) {{ {REPOSITORY_FIELDS} }}" for i in range(count))
+
+    return f"query RepositoryDetails({arguments}) {{\n{fields}\n}}"
+
+def details_variables(names: list[str]) -> dict:
+    variables: dict = {}
+    for i, name in enumerate(names):
+        variables[f"owner{i}"], variables[f"name{i}"] = name.split("/", 1)
+
+    return variables
+
+def details_from_data(data: Optional[dict], count: int) -> list[Optional[RepositoryInformation]]:
+    """
+    Returns None for the repositories that couldn't be queried
+    """
+
+    return [repository_from_node(node) if (node := (data or {}).get(f"repo{i}")) else None for i in range(count)]
+
+def contributions_variables(repositories: list[RepositoryInformation], author_id: str, emails: list[str]) -> dict:
+    variables: dict = {"author": author_id}
+    if emails:
+        variables["emails"] = emails
+
+    for i, repo_info in enumerate(repositories):
+        variables[f"owner{i}"], variables[f"name{i}"] = repo_info.name.split("/", 1)
+
+    return variables
+
+def contributions_from_data(data: Optional[dict], count: int) -> list[bool]:
+    """
+    A repository that couldn't be queried counts as contributed to, so that it still gets scanned when the git host can't tell
+    """
+
+    contributions = []
+    for i in range(count):
+        repository = (data or {}).get(f"repo{i}")
+        if repository is None:
+            contributions.append(True)
+        elif repository["defaultBranchRef"] is None: # Empty repository
+            contributions.append(False)
+        else:
+            commit = repository["defaultBranchRef"]["target"]
+            contributions.append(any(commit.get(history) and commit[history]["nodes"] for history in ("byAccount", "byEmail")))
+
+    return contributions
+
+def graphql_query(session: requests.Session, graphql_url: str, query: str, variables: dict, token_pool: TokenPool) -> Optional[dict]:
+    response = http_json_request(session, "POST", graphql_url, token_pool, {"query": query, "variables": variables}, "graphql")
+    if response is None:
+        return None
+
+    for error in response.get("errors") or []:
+        logger.warning("GraphQL error: {}", error.get("message"))
+
+    return response.get("data")
+
+def check_contributions(
+    session: requests.Session,
+    graphql_url: str,
+    repositories: list[RepositoryInformation],
+    author_id: str,
+    emails: list[str],
+    token_pool: TokenPool
+) -> list[bool]:
+    """
+    Returns whether the account (or any of `emails`) authored a commit of each repository, in one query for up to `CONTRIBUTION_BATCH_SIZE` repositories
+    """
+
+    variables = contributions_variables(repositories, author_id, emails)
+    data = graphql_query(session, graphql_url, contributions_query(len(repositories), bool(emails)), variables, token_pool)
+    return contributions_from_data(data, len(repositories))
+
+def fetch_details(session: requests.Session, graphql_url: str, names: list[str], token_pool: TokenPool) -> list[Optional[RepositoryInformation]]:
+    """
+    Fetches the details of up to `DETAILS_BATCH_SIZE` repositories in one query
+    """
+
+    data = graphql_query(session, graphql_url, details_query(len(names)), details_variables(names), token_pool)
+    return details_from_data(data, len(names))
+
+def filter_contributed(
+    session: requests.Session,
+    graphql_url: str,
+    repositories: list[RepositoryInformation],
+    author_id: str,
+    emails: list[str],
+    token_pool: TokenPool
+) -> list[RepositoryInformation]:
+    kept = []
+    for start in range(0, len(repositories), CONTRIBUTION_BATCH_SIZE):
+        batch = repositories[start:start + CONTRIBUTION_BATCH_SIZE]
+        for repo_info, has_contributed in zip(batch, check_contributions(session, graphql_url, batch, author_id, emails, token_pool)):
+            if has_contributed:
+                kept.append(repo_info)
+            else:
+                logger.debug("Skipping repository '{}', which the target never authored a commit in", repo_info.name)
+
+    logger.info("Kept {} of {} organization repositories, which the target authored commits in", len(kept), len(repositories))
+    return kept
+
+def repository_from_node(node: dict) -> RepositoryInformation:
+    return RepositoryInformation(
+        node["nameWithOwner"],
+        node.get("description"),
+        node["homepageUrl"] or None,
+        node["stargazerCount"],
+        node["forkCount"],
+        node["watchers"]["totalCount"],
+        f"{node['url']}.git",
+        node.get("diskUsage"),
+        node.get("pushedAt")
+    )
+
+def add_repositories(repositories: list[RepositoryInformation], connection: dict, scan_forks: bool) -> None:
+    for node in connection["nodes"]:
+        if (not scan_forks) and node["isFork"]:
+            logger.warning(
+                "Skipping the scan of the fork '{}' (use '--scan-forks' to scan forks)",
+                node["nameWithOwner"]
+            )
+            continue
+
+        repo = repository_from_node(node)
+        repositories.append(repo)
+        logger.trace(repo.__dict__)
+        logger.info(
+            "Added repository '{}' with {} stargazers to list",
+            repo.name,
+            repo.stars
+        )
+
+def next_cursor(connection: dict) -> Optional[str]:
+    page_info = connection["pageInfo"]
+    return page_info["endCursor"] if page_info["hasNextPage"] else None
+
+def scan_organizations(session: requests.Session, graphql_url: str, logins: list[str], scan_forks: bool, token_pool: TokenPool) -> list[RepositoryInformation]:
+    repositories: list[RepositoryInformation] = []
+
+    # Organization login -> cursor of its next page of repositories
+    pending: dict[str, Optional[str]] = {login: None for login in logins}
+    while pending:
+        batch = list(pending.items())[:ORGANIZATION_BATCH_SIZE]
+        variables: dict[str, Optional[str]] = {}
+        for i, (login, cursor) in enumerate(batch):
+            variables[f"login{i}"] = login
+            variables[f"cursor{i}"] = cursor
+
+        logger.debug("Querying repositories of organizations {}", [login for login, _ in batch])
+        data = graphql_query(session, graphql_url, organization_repositories_query(len(batch)), variables, token_pool)
+
+        for i, (login, _) in enumerate(batch):
+            organization = (data or {}).get(f"org{i}")
+            if organization is None:
+                logger.warning("Couldn't query the repositories of organization {}, skipping it", login)
+                del pending[login]
+                continue
+
+            connection = organization["repositories"]
+            add_repositories(repositories, connection, scan_forks)
+
+            cursor = next_cursor(connection)
+            if cursor is None:
+                del pending[login]
+            else:
+                pending[login] = cursor
+
+    return repositories
+
+def query_user(
+    username: str,
+    scan_forks: bool,
+    scan_orgs: bool,
+    blacklisted_orgs: list[str],
+    token_pool: TokenPool,
+    workers: int,
+    proxy: Optional[str] = None,
+    http_cache: Optional[HttpCache] = None,
+    fetch_details: bool = False,
+    filter_org_repositories: bool = False,
+    graphql_url: str = GRAPHQL_URL,
+    known_emails: Optional[list[str]] = None
+) -> Optional[User]:
+    """
+    With `filter_org_repositories`, the organizations' repositories the user never authored a commit in
+    (through its account, its public email or any of `known_emails`) are left out
+    """
+
+    # GraphQL responses are POST responses, which the HTTP cache never stores,
+    # and repository nodes already carry every field (so `fetch_details` has nothing to fetch)
+    session, stats = create_session(workers, proxy, http_cache)
+
+    try:
+        return query_user_with_session(session, graphql_url, username, scan_forks, scan_orgs, blacklisted_orgs, token_pool, filter_org_repositories, known_emails)
+    finally:
+        log_session_stats(session, stats)
+        token_pool.log_summary()
+        shared_rate_limiter().log_summary()
+        session.close()
+
+def query_user_with_session(
+    session: requests.Session,
+    graphql_url: str,
+    username: str,
+    scan_forks: bool,
+    scan_orgs: bool,
+    blacklisted_orgs: list[str],
+    token_pool: TokenPool,
+    filter_org_repositories: bool = False,
+    known_emails: Optional[list[str]] = None
+) -> Optional[User]:
+    logger.debug("Querying user {} through GraphQL", username)
+    data = graphql_query(session, graphql_url, USER_PROFILE_QUERY, {"login": username}, token_pool)
+    user_info = (data or {}).get("user")
+    if user_info is None:
+        logger.debug("user_info is None")
+        return
+
+    repositories_connection = user_info["repositories"]
+    user = User(
+        user_info["databaseId"],
+        user_info["login"], # Has the corrected username, so we use that instead of `username`
+        user_info["name"] or user_info["login"],
+        user_info.get("bio"),
+        user_info.get("location"),
+        user_info.get("websiteUrl"),
+        user_info.get("email") or None,
+        user_info["followers"]["totalCount"],
+        user_info["following"]["totalCount"],
+        repositories_connection["totalCount"],
+        user_info.get("id")
+    )
+    logger.trace(user.__dict__)
+
+    add_repositories(user.repositories, repositories_connection, scan_forks)
+    cursor = next_cursor(repositories_connection)
+    while cursor is not None:
+        data = graphql_query(session, graphql_url, USER_REPOSITORIES_QUERY, {"login": user.name, "cursor": cursor}, token_pool)
+        if not data or data.get("user") is None:
+            logger.warning("Querying a page of repositories failed, keeping the {} repositories found so far", len(user.repositories))
+            break
+
+        repositories_connection = data["user"]["repositories"]
+        add_repositories(user.repositories, repositories_connection, scan_forks)
+        cursor = next_cursor(repositories_connection)
+
+    if not scan_orgs:
+        logger.warning("Not scanning organizations (as requested with '--no-scan-orgs')")
+        return user
+
+    organizations = user_info["organizations"]
+    if organizations["pageInfo"]["hasNextPage"]:
+        logger.warning("The user belongs to more than {} organizations, only scanning the first {}", PAGE_SIZE, PAGE_SIZE)
+
+    logins: list[str] = []
+    for org_info in organizations["nodes"]:
+        if org_info["login"] in blacklisted_orgs:
+            logger.warning("Skipping scanning blacklisted organization {}", org_info["login"])
+            continue
+        logins.append(org_info["login"])
+
+    logger.debug("Scanning organizations..")
+    org_repositories = scan_organizations(session, graphql_url, logins, scan_forks, token_pool)
+    if filter_org_repositories:
+        emails = contributor_emails(user_info.get("email"), known_emails)
+        org_repositories = filter_contributed(session, graphql_url, org_repositories, user_info["id"], emails, token_pool)
+    user.repositories.extend(org_repositories)
+
+    return user
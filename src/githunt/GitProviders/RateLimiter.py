@@ -0,0 +1,139 @@
+"""
+# RateLimiter
+
+This file hosts the process-wide limiter every provider request goes through, so that workers pace themselves
+instead of each discovering GitHub's secondary rate limits on its own.
+
+It combines:
+- a token bucket shared by every request, whose rate is the configured rate times a penalty factor
+  halved on every secondary rate limit (and slowly recovered on successes)
+- a token bucket per rate limit resource (REST "core", "graphql", ...), whose rate is what the tokens' remaining
+  budgets for that resource can sustain until their reset (only once they run low)
+- a cap on concurrent requests
+"""
+
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from threading import BoundedSemaphore, Lock
+from loguru import logger
+
+import random
+import time
+
+DEFAULT_REQUEST_RATE = 12.0 # GitHub's secondary limits allow 900 REST points per minute
+DEFAULT_MAX_CONCURRENT_REQUESTS = 16
+MIN_PENALTY_FACTOR = 1 / 16
+PENALTY_RECOVERY = 0.02
+BACKOFF_JITTER = 0.25
+
+def jittered(seconds: float) -> float:
+    """
+    Spreads retries so that the workers waiting on the same limit don't all come back at once
+    """
+
+    return seconds * (1 + random.uniform(0, BACKOFF_JITTER))
+
+class RateLimiter:
+    def __init__(self, rate: float = DEFAULT_REQUEST_RATE, max_concurrency: int = DEFAULT_MAX_CONCURRENT_REQUESTS) -> None:
+        self.rate: float = rate
+        self.burst: float = max(1.0, rate * 2)
+        self.max_concurrency: int = max_concurrency
+
+        self.lock = Lock()
+        self.slots = BoundedSemaphore(max_concurrency)
+
+        self.tokens: float = self.burst
+        self.updated_at: float = time.monotonic()
+        self.penalty_factor: float = 1.0
+
+        # Resource -> the request rate its budgets can sustain, and its bucket (tokens, last update), while they run low
+        self.budget_rates: dict[str, float] = {}
+        self.budget_buckets: dict[str, tuple[float, float]] = {}
+
+        self.waited: float = 0.0
+        self.penalty_count: int = 0
+
+    def current_rate(self, resource: Optional[str] = None) -> float:
+        rate = self.rate * self.penalty_factor
+        if resource in self.budget_rates:
+            rate = min(rate, self.budget_rates[resource])
+
+        return max(rate, 1e-3)
+
+    def reserve(self, resource: str = "core") -> float:
+        """
+        Takes a token from the shared bucket and from the resource's, returning how many seconds to wait before sending the request
+        """
+
+        with self.lock:
+            now = time.monotonic()
+            rate = self.current_rate()
+
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * rate)
+            self.updated_at = now
+            self.tokens -= 1 # May go negative: later callers queue behind the earlier reservations
+            wait = max(-self.tokens / rate, 0.0)
+
+            if resource in self.budget_rates:
+                budget_rate = max(self.budget_rates[resource], 1e-3)
+                tokens, updated_at = self.budget_buckets.get(resource, (1.0, now))
+                tokens = min(1.0, tokens + (now - updated_at) * budget_rate) - 1
+                self.budget_buckets[resource] = (tokens, now)
+                wait = max(wait, -tokens / budget_rate)
+
+            self.waited += wait
+            return wait
+
+    def wait(self, resource: str = "core") -> None:
+        delay = self.reserve(resource)
+        if delay > 0:
+            logger.trace("Pacing request by {:.2f} seconds", delay)
+            time.sleep(delay)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self.slots:
+            yield
+
+    def observe(self, budget_rate: Optional[float], resource: str = "core") -> None:
+        """
+        Feeds back a successful response, with the request rate that the tokens' remaining budgets for its resource can sustain
+        """
+
+        with self.lock:
+            if budget_rate is not None:
+                self.budget_rates[resource] = budget_rate
+            else:
+                self.budget_rates.pop(resource, None)
+                self.budget_buckets.pop(resource, None)
+
+            self.penalty_factor = min(1.0, self.penalty_factor + PENALTY_RECOVERY)
+
+    def penalize(self) -> None:
+        """
+        Feeds back a secondary rate limit: halves the request rate
+        """
+
+        with self.lock:
+            self.penalty_count += 1
+            self.penalty_factor = max(MIN_PENALTY_FACTOR, self.penalty_factor / 2)
+            logger.warning("Secondary rate limit hit, slowing requests down to {:.1f}/s", self.current_rate())
+
+    def log_summary(self) -> None:
+        logger.info(
+            "Rate limiter: paced requests by {:.1f} seconds in total, {} secondary rate limits hit",
+            self.waited,
+            self.penalty_count
+        )
+
+rate_limiter: RateLimiter = RateLimiter()
+
+def configure_rate_limiter(rate: float, max_concurrency: int) -> RateLimiter:
+    global rate_limiter
+
+    rate_limiter = RateLimiter(rate, max_concurrency)
+    logger.debug("Limiting API requests to {}/s and {} concurrent requests", rate, max_concurrency)
+    return rate_limiter
+
+def shared_rate_limiter() -> RateLimiter:
+    return rate_limiter
@@ -0,0 +1,158 @@
+"""
+# TokenPool
+
+This file hosts the pool of API tokens shared by every request of a provider.
+
+Each token's rate limit budget is tracked per resource (REST "core", "graphql", ...) from the `X-RateLimit-*` response headers.
+Requests are routed to the token with the most budget left, so that a run only waits once every token is drained.
+"""
+
+from typing import Mapping, Optional
+from threading import Lock
+from loguru import logger
+
+import time
+
+# Budget assumed for a token until a response reports it, so that every token gets used (and measured) early
+UNKNOWN_REMAINING = 5000
+
+# Remaining budget (summed over the tokens) under which requests get paced to last until the reset
+LOW_BUDGET = 200
+
+def mask_token(token: Optional[str]) -> str:
+    if token is None:
+        return "<anonymous>"
+
+    return f"{token[:4]}...{token[-4:]}" if len(token) > 12 else "<token>"
+
+def read_token_file(path: str) -> list[str]:
+    with open(path) as token_file:
+        lines = [line.strip() for line in token_file]
+
+    return [line for line in lines if line and not line.startswith("#")]
+
+class TokenState:
+    def __init__(self, token: Optional[str]) -> None:
+        self.token: Optional[str] = token
+
+        # Resource -> (remaining requests, reset epoch)
+        self.budgets: dict[str, tuple[int, float]] = {}
+        self.available_at: float = 0 # Set by secondary rate limits
+
+        self.request_count: int = 0
+        self.rate_limited_count: int = 0
+
+    def remaining(self, resource: str, now: float) -> int:
+        remaining, reset = self.budgets.get(resource, (UNKNOWN_REMAINING, 0))
+        return UNKNOWN_REMAINING if reset and now >= reset else remaining
+
+    def usable_at(self, resource: str, now: float) -> float:
+        if self.remaining(resource, now) > 0:
+            return self.available_at
+
+        return max(self.available_at, self.budgets[resource][1])
+
+class TokenPool:
+    def __init__(self, tokens: list[str]) -> None:
+        unique_tokens = list(dict.fromkeys(tokens))
+        self.states: list[TokenState] = [TokenState(token) for token in unique_tokens] or [TokenState(None)]
+        self.lock = Lock()
+        self.created_at: float = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    @property
+    def is_authenticated(self) -> bool:
+        return self.states[0].token is not None
+
+    def choose(self, resource: str) -> tuple[TokenState, float]:
+        """
+        Returns the token with the most budget left for `resource`, and how many seconds to wait before using it
+        """
+
+        with self.lock:
+            now = time.time()
+            state = max(self.states, key=lambda state: (state.usable_at(resource, now) <= now, state.remaining(resource, now), -state.usable_at(resource, now)))
+            wait = max(state.usable_at(resource, now) - now, 0)
+
+            if wait == 0:
+                reset = state.budgets.get(resource, (UNKNOWN_REMAINING, 0))[1]
+                state.budgets[resource] = (state.remaining(resource, now) - 1, reset) # Until the response tells, so that concurrent requests spread
+                state.request_count += 1
+
+            return state, wait
+
+    def acquire(self, resource: str = "core") -> TokenState:
+        while True:
+            state, wait = self.choose(resource)
+            if wait == 0:
+                return state
+
+            logger.warning("Every token is rate-limited; sleeping for {:.0f} seconds", wait)
+            time.sleep(wait)
+
+    def update(self, state: TokenState, resource: str, headers: Mapping[str, str]) -> None:
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        resource = headers.get("X-RateLimit-Resource", resource)
+
+        if remaining is None or reset is None:
+            return
+
+        with self.lock:
+            state.budgets[resource] = (int(remaining), float(reset))
+
+    def total_remaining(self, resource: str) -> int:
+        """
+        Returns the budget left for `resource` over every token (tokens that weren't used yet count as `UNKNOWN_REMAINING`)
+        """
+
+        with self.lock:
+            now = time.time()
+            return sum(state.remaining(resource, now) for state in self.states if state.available_at <= now)
+
+    def budget_rate(self, resource: str) -> Optional[float]:
+        """
+        Returns the request rate that the tokens' remaining budgets can sustain until their reset,
+        or None while the budgets are unknown or large enough not to need pacing
+        """
+
+        with self.lock:
+            now = time.time()
+            if any(resource not in state.budgets for state in self.states):
+                return None
+
+            if sum(state.remaining(resource, now) for state in self.states) > LOW_BUDGET:
+                return None
+
+            return sum(
+                state.remaining(resource, now) / max(state.budgets[resource][1] - now, 1.0)
+                for state in self.states
+            )
+
+    def backoff(self, state: TokenState, resource: str, seconds: float) -> None:
+        """
+        Takes a rate-limited token out of rotation for `seconds`
+        """
+
+        with self.lock:
+            state.rate_limited_count += 1
+            state.available_at = max(state.available_at, time.time() + seconds)
+
+            if len(self.states) > 1:
+                logger.info("Token {} is rate-limited for {} seconds, routing requests to the other tokens", mask_token(state.token), seconds)
+
+    def log_summary(self) -> None:
+        elapsed = max(time.monotonic() - self.created_at, 1e-3)
+        now = time.time()
+
+        for state in self.states:
+            logger.info(
+                "Token {}: {} requests ({:.1f}/s), rate-limited {} times, {} core requests left",
+                mask_token(state.token),
+                state.request_count,
+                state.request_count / elapsed,
+                state.rate_limited_count,
+                state.remaining("core", now)
+            )
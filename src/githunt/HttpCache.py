@@ -0,0 +1,185 @@
+"""
+# HttpCache
+
+This file hosts the persistent HTTP cache for API calls, shared between runs.
+
+Entries hold the validators (ETag, Last-Modified), pagination headers and body of a GET response, keyed by the URL and
+whether the request was authenticated: every token of a pool sees the same public data, so entries are shared between them
+(and the token itself is never stored).
+Cached entries are revalidated with a conditional request on every use: GitHub doesn't count
+`304 Not Modified` responses against the rate limit, so re-scanning unchanged users costs next to nothing.
+"""
+
+from typing import Optional
+from threading import Lock
+from requests.adapters import HTTPAdapter
+from loguru import logger
+
+import requests
+import hashlib
+import pickle
+import time
+import os
+
+from githunt.Utils import default_cache_dir
+
+DEFAULT_HTTP_CACHE_TTL_HOURS = 24 * 7
+DEFAULT_HTTP_CACHE_SIZE_MB = 64
+PAGINATION_HEADERS = ("Link",) # Not always repeated on `304 Not Modified` responses, so they are kept with the entry
+
+class HttpCache:
+    def __init__(self, root: Optional[str] = None, ttl_hours: float = DEFAULT_HTTP_CACHE_TTL_HOURS, max_size_mb: int = DEFAULT_HTTP_CACHE_SIZE_MB) -> None:
+        self.root: str = root or os.path.join(default_cache_dir(), "http")
+        self.ttl: float = ttl_hours * 3600
+        self.max_size: int = max_size_mb * 1024 * 1024
+
+        self.counters_lock = Lock()
+        self.revalidated: int = 0
+        self.stored: int = 0
+
+        os.makedirs(self.root, exist_ok=True)
+        logger.debug("Using HTTP cache '{}' (TTL {}h, max {} MiB)", self.root, ttl_hours, max_size_mb)
+
+    @staticmethod
+    def key_for(url: str, authorization: Optional[str]) -> str:
+        identity = "authenticated" if authorization else "anonymous"
+        return hashlib.sha256(f"{identity}\0{url}".encode()).hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.pickle")
+
+    def load(self, key: str) -> Optional[dict]:
+        path = self.entry_path(key)
+
+        try:
+            if time.time() - os.stat(path).st_mtime > self.ttl:
+                logger.trace("HTTP cache entry {} expired", key)
+                os.remove(path)
+                return None
+
+            with open(path, "rb") as entry_file:
+                return pickle.load(entry_file)
+
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.exception("Couldn't load HTTP cache entry {}, ignoring it", key)
+            return None
+
+    def store(self, key: str, url: str, etag: Optional[str], last_modified: Optional[str], body: bytes, headers: Optional[dict[str, str]] = None) -> None:
+        path = self.entry_path(key)
+        entry = {"url": url, "etag": etag, "last_modified": last_modified, "body": body, "headers": headers or {}}
+
+        try:
+            temp_path = f"{path}.{os.getpid()}.{id(entry)}.tmp"
+            with open(temp_path, "wb") as entry_file:
+                pickle.dump(entry, entry_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except Exception:
+            logger.exception("Couldn't write HTTP cache entry for '{}'", url)
+            return
+
+        with self.counters_lock:
+            self.stored += 1
+
+    def touch(self, key: str) -> None:
+        """
+        Marks a revalidated entry as fresh (for both the TTL and eviction)
+        """
+
+        try:
+            os.utime(self.entry_path(key))
+        except OSError:
+            pass
+
+        with self.counters_lock:
+            self.revalidated += 1
+
+    def evict(self) -> None:
+        """
+        Removes expired entries, then least recently used ones until the cache fits within its size budget
+
+        Other processes may be evicting the same entries at the same time, so entries already gone are skipped
+        """
+
+        now = time.time()
+        entries: list[tuple[float, str, int]] = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".pickle"):
+                continue
+
+            path = os.path.join(self.root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            if now - stat.st_mtime > self.ttl:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+
+            entries.append((stat.st_mtime, path, stat.st_size))
+
+        total_size = sum(size for _, _, size in entries)
+        logger.debug("HTTP cache holds {} entries for {} KiB", len(entries), total_size // 1024)
+
+        entries.sort()
+        for _, path, size in entries:
+            if total_size <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+            total_size -= size
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """
+    Transport adapter turning GET requests into conditional requests against the cache
+    """
+
+    def __init__(self, cache: HttpCache, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.cache: HttpCache = cache
+
+    def send(self, request: requests.PreparedRequest, *args, **kwargs) -> requests.Response:
+        if request.method != "GET" or request.url is None:
+            return super().send(request, *args, **kwargs)
+
+        key = self.cache.key_for(request.url, request.headers.get("Authorization"))
+        entry = self.cache.load(key)
+
+        if entry is not None:
+            if entry["etag"]:
+                request.headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request.headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = super().send(request, *args, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            response.content # Drains the (empty) body, so that the connection goes back to the pool
+
+            logger.trace("Serving '{}' from the HTTP cache", request.url)
+            response.status_code = 200
+            response.reason = "OK"
+            response._content = entry["body"]
+            for name, value in entry.get("headers", {}).items():
+                if name not in response.headers:
+                    response.headers[name] = value
+            self.cache.touch(key)
+
+        elif response.status_code == 200:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+            if etag or last_modified:
+                headers = {name: response.headers[name] for name in PAGINATION_HEADERS if name in response.headers}
+                self.cache.store(key, request.url, etag, last_modified, response.content, headers)
+
+        return response
@@ -0,0 +1,56 @@
+"""
+# Report
+
+This file hosts the JSON-serializable report of a scanned user: what identity expansion found, and what the analyses inferred.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any
+
+from githunt.Classes.User import User
+
+DAY_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+def format_seconds(seconds: float) -> str:
+    midnight = datetime.min
+    return (midnight + timedelta(seconds=seconds)).time().strftime("%H:%M")
+
+def activity_report(user: User) -> dict[str, Any]:
+    from githunt.Analysis.ActivityDetectionAlgorithm import infer_activity
+
+    ratio_interactions_per_day, average_bounds_per_day = infer_activity(user)
+
+    return {
+        "ratios": {day: ratio_interactions_per_day[day] for day in DAY_ORDER if day in ratio_interactions_per_day},
+        "active_hours": {
+            day: [format_seconds(average_bounds_per_day[day][0]), format_seconds(average_bounds_per_day[day][1])]
+            for day in DAY_ORDER if day in average_bounds_per_day
+        }
+    }
+
+def build_report(user: User, infer_country: bool, top_countries: int, use_population_apriori: bool, infer_activity: bool) -> dict[str, Any]:
+    """
+    Runs the requested analyses over a visited user
+    """
+
+    report: dict[str, Any] = {
+        "username": user.name,
+        "id": user.id,
+        "displayname": user.displayname,
+        "emails": sorted(user.git_data.emails),
+        "aliases": [
+            {"name": alias.name, "is_main": alias.is_main, "is_signed": alias.is_signed}
+            for alias in user.git_data.aliases
+        ],
+        "repository_count": len(user.repositories),
+        "timestamp_count": len(user.git_data.timestamps),
+    }
+
+    if infer_country:
+        from githunt.Analysis.CountryDetectionAlgorithm import infer_countries
+        report["countries"] = infer_countries(user, top_countries, use_population_apriori)
+
+    if infer_activity:
+        report["activity"] = activity_report(user)
+
+    return report
@@ -1,236 +1,634 @@
-from typing import Optional, TYPE_CHECKING
+from typing import Callable, Generator, Iterable, Iterator, Optional, TYPE_CHECKING
 from loguru import logger
-from threading import Lock
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from git import Repo
+from threading import BoundedSemaphore, Lock
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from collections import OrderedDict, deque
 
+import multiprocessing
 import subprocess
 import shutil
+import time
+import sys
 import re
 import os
 
 from githunt.Utils import random_str
+from githunt.GitLog import head_sha, is_ancestor, iter_commit_records
 from githunt.Classes.Alias import Alias
+from githunt.Classes.CommitRecord import CommitRecord
+from githunt.Classes.Identity import Identity
+from githunt.Classes.GitData import GitData
+from githunt.Classes.RepositorySummary import RepositorySummary
 from githunt.Classes.User import User
 from githunt.Classes.RepositoryInformation import RepositoryInformation
 
-git_data_lock = Lock()
+if TYPE_CHECKING:
+    from githunt.CloneCache import CloneCache
+    from githunt.ScanStore import ScanStore
+    from githunt.GitProviders.GitHubCommits import ApiCommitSource
 
-def matching_substrings(a: str, b: str) -> bool:
-    a = a.lower()
-    b = b.lower()
+# Only commit metadata is ever read, so trees and blobs are left on the server whenever possible
+CLONE_ARGUMENTS = ["--bare", "--single-branch", "--no-tags"]
+CLONE_FILTERS = ["tree:0", "blob:none"]
 
-    return (
-        a == b
-        or a in b
-        or b in a
-    )
+# Extracted summaries (with every commit timestamp) a shared pipeline keeps in memory at most, the least recently used ones going first
+DEFAULT_MAX_SUMMARIES = 512
+
+def group_identities(commits: Iterable[CommitRecord], repo_info: RepositoryInformation, identities: dict[tuple[str, str], Identity]) -> None:
+    """
+    Groups commits by distinct (author name, author email) pair into `identities`, as they stream in
+    """
+
+    for commit in commits:
+        logger.trace("[{}] Looking at commit {} from '{} <{}>'", repo_info.name, commit.sha[:7], commit.author_name, commit.author_email)
 
-def normalize_name(name: str) -> str:
-    return " ".join(name.strip().lower().split())
+        identity = identities.get((commit.author_name, commit.author_email))
+        if identity is None:
+            identity = Identity(commit.author_name, commit.author_email)
+            identities[identity.key] = identity
 
-def names_equivalent_strict(a: str, b: str) -> bool:
-    return normalize_name(a) == normalize_name(b)
+        identity.add_commit(commit.committed_datetime, commit.is_signed)
 
-def names_equivalent_guess(a: str, b: str) -> bool:
+def extract_identities(repo_path: str, repo_info: RepositoryInformation, since_sha: Optional[str] = None) -> dict[tuple[str, str], Identity]:
     """
-    Controlled heuristic
-    It prevents 'John' matching 'Johnny' for example, or 'Alex' matching 'Alexander'
+    Walks the repository history once (only past `since_sha` when given) and groups its commits by distinct (author name, author email) pair
     """
 
-    a_tokens = normalize_name(a).split()
-    b_tokens = normalize_name(b).split()
+    identities: dict[tuple[str, str], Identity] = {}
 
-    if not a_tokens or not b_tokens:
-        return False
+    try:
+        group_identities(iter_commit_records(repo_path, since_sha), repo_info, identities)
+    except:
+        logger.exception("Failed scanning the repository (is the repository empty?)")
 
-    if a_tokens == b_tokens:
-        return True
+    return identities
+
+def configure_extraction_worker() -> None:
+    """
+    Extraction workers may be spawned with a fresh logger, so they only report warnings and above
+    """
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+def extraction_context() -> multiprocessing.context.BaseContext:
+    """
+    Extraction workers are started from a clean server process where possible: forked from a process holding
+    clone cache locks, they would keep holding them (workers are forked lazily, at any point of a scan)
+    """
+
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+
+    return multiprocessing.get_context()
+
+def summarize_repository(repo_path: str, repo_info: RepositoryInformation, since_sha: Optional[str] = None) -> RepositorySummary:
+    """
+    With `since_sha` (the HEAD of a previous scan), only the newer commits are walked,
+    unless the history was rewritten since, in which case the whole history is
+    """
+
+    current_sha = head_sha(repo_path)
+    if since_sha is not None and (current_sha is None or not is_ancestor(repo_path, since_sha)):
+        logger.info("[{}] Previously scanned commit {} is gone, scanning the whole history", repo_info.name, since_sha[:7])
+        since_sha = None
 
-    # Same first + last token (e.g. "John A Smith" vs "John Smith")
-    if len(a_tokens) >= 2 and len(b_tokens) >= 2:
-        return a_tokens[0] == b_tokens[0] and a_tokens[-1] == b_tokens[-1]
+    identities = {} if since_sha is not None and since_sha == current_sha else extract_identities(repo_path, repo_info, since_sha)
 
-    return False
+    return RepositorySummary(
+        repo_info.name,
+        identities,
+        sum(identity.commit_count for identity in identities.values()),
+        current_sha,
+        since_sha
+    )
+
+def merge_summaries(previous: RepositorySummary, update: RepositorySummary) -> RepositorySummary:
+    """
+    Adds an incremental summary to the summary of the history it continues
+    """
+
+    identities: dict[tuple[str, str], Identity] = {}
+    for summary in (previous, update):
+        for key, identity in summary.identities.items():
+            merged_identity = identities.get(key)
+            if merged_identity is None:
+                merged_identity = identities[key] = Identity(identity.name, identity.email)
+            merged_identity.merge(identity)
+
+    return RepositorySummary(
+        update.repo_name,
+        identities,
+        previous.commit_count + update.commit_count,
+        update.head_sha
+    )
 
-def expand_identities(repos: list[Repo], user: User, alias_based_inference: bool, repo_infos: list[RepositoryInformation]) -> None:
+def build_identity_table(repo_tables: Iterable[dict[tuple[str, str], Identity]]) -> list[Identity]:
+    table: dict[tuple[str, str], Identity] = {}
+
+    for repo_table in repo_tables:
+        for key, identity in repo_table.items():
+            # Copied rather than merged into, as repository tables may be shared between targets
+            existing_identity = table.get(key)
+            if existing_identity is None:
+                existing_identity = table[key] = Identity(identity.name, identity.email)
+            existing_identity.merge(identity)
+
+    logger.debug("Built identity table with {} distinct identities", len(table))
+    return list(table.values())
+
+def expand_identities(identities: list[Identity], user: User, alias_based_inference: bool) -> None:
     GITHUB_GENERATED_EMAIL_PATTERN = re.compile(rf"^(?!{user.id}\+)\d+\+[A-Za-z0-9-\[\]]+@users\.noreply\.github\.com$")
 
-    logger.debug("Starting global identity expansion")
+    logger.debug("Starting global identity expansion over {} identities", len(identities))
+
+    identities_by_name: dict[str, list[Identity]] = {}
+    identities_by_email: dict[str, list[Identity]] = {}
+    for identity in identities:
+        identities_by_name.setdefault(GitData.alias_key(identity.name), []).append(identity)
+        identities_by_email.setdefault(GitData.email_key(identity.email), []).append(identity)
+
+    main_alias = user.git_data.main_alias
+    for identity in identities:
+        if identity.name == user.name or identity.name == user.displayname:
+            logger.trace("Updating is_signed status for main alias from {}", identity)
+            main_alias.is_signed = main_alias.is_signed or identity.is_signed
+
+    # Every identity is looked at once, then again whenever a discovery may change its outcome
+    worklist: deque[Identity] = deque(identities)
+    queued: set[tuple[str, str]] = {identity.key for identity in identities}
+
+    def enqueue(related_identities: list[Identity]) -> None:
+        for related_identity in related_identities:
+            if related_identity.key not in queued:
+                queued.add(related_identity.key)
+                worklist.append(related_identity)
+
+    steps = 0
+    while worklist:
+        identity = worklist.popleft()
+        queued.discard(identity.key)
+        steps += 1
+
+        author_name = identity.name
+        author_email = identity.email
+
+        matching_strict_name = user.git_data.matches_alias_name(author_name)
+        matching_strict_email = user.git_data.matches_email(author_email)
+
+        # Email discovery
+        is_github_generated = GITHUB_GENERATED_EMAIL_PATTERN.match(author_email)
+        is_userowned_github_generated_email = False
+        if is_github_generated:
+            email_id_part = author_email.split('+')[0]
+            is_userowned_github_generated_email = (email_id_part == str(user.id))
+
+        if (matching_strict_name) and (author_email not in user.git_data.emails) and ((not is_github_generated) or is_userowned_github_generated_email):
+            logger.debug("Discovered email '{}' (matched {})", author_email, author_name)
+            user.git_data.add_email(author_email)
+            enqueue(identities_by_email.get(GitData.email_key(author_email), []))
+
+        # Alias discovery
+        existing_strict_alias = user.git_data.get_alias(author_name)
+
+        if matching_strict_email and (not existing_strict_alias):
+            alias = Alias(
+                author_name,
+                is_main=False,
+                is_signed=identity.is_signed,
+            )
+            logger.debug("Discovered{}alias '{}' (STRONG CONFIDENCE)", alias.is_signed and " signed " or " ", alias)
+            user.git_data.add_alias(alias)
+            enqueue(identities_by_name.get(GitData.alias_key(author_name), []))
+            continue
+
+        if existing_strict_alias:
+            continue
+
+        if alias_based_inference and len(author_name) > 3 and user.git_data.matches_user_name_guess(author_name):
+            alias = Alias(
+                author_name,
+                is_main=False,
+                is_signed=identity.is_signed,
+            )
+            logger.debug("Discovered{}alias '{}' (WEAK CONFIDENCE)", alias.is_signed and " signed " or " ", alias)
+            user.git_data.add_alias(alias)
+            enqueue(identities_by_name.get(GitData.alias_key(author_name), []))
+
+    # Timestamp discovery, done once the email set is final so that no commit is counted twice
+    for identity in identities:
+        if user.git_data.matches_email(identity.email):
+            logger.trace("Adding {} timestamps from {}", len(identity.timestamps), identity)
+            user.git_data.timestamps.extend(identity.timestamps)
+
+    logger.success(
+        "Identity expansion converged after {} steps - {} aliases, {} emails",
+        steps,
+        len(user.git_data.aliases),
+        len(user.git_data.emails),
+    )
 
-    changed = True
-    pass_number = 0
+def run_git(arguments: list[str], cwd: str, repo_name: str) -> int:
+    process = subprocess.Popen(
+        ["git", *arguments],
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
 
-    while changed:
-        changed = False
-        pass_number += 1
-        logger.debug("Expansion pass {}", pass_number)
+    stdout, stderr = process.communicate()
 
-        for i in range(len(repos)):
-            repo = repos[i]
-            repo_info = repo_infos[i]
+    for line in stdout.splitlines():
+        logger.debug("Git [{}]: {}", repo_name, line)
 
-            try:
-                for commit in repo.iter_commits():
-
-                    author_name = commit.author.name
-                    author_email = commit.author.email
-                    timestamp = commit.committed_datetime
-
-                    if TYPE_CHECKING:
-                        assert author_name
-                        assert author_email
-
-                    logger.trace("[{}] Looking at commit {} from '{} <{}>'", repo_info.name, commit.hexsha[:7], author_name, author_email)
-
-                    matching_strict_name = any(
-                        alias.name.strip().lower() == author_name.strip().lower()
-                        for alias in user.git_data.aliases
-                    )
-
-                    matching_strict_email = any(
-                        email.strip() == author_email.strip() 
-                        for email in user.git_data.emails
-                    )
-
-                    if author_name == user.name or author_name == user.displayname:
-                        logger.trace("[{}] Updating is_signed status for main alias", repo_info.name)
-                        main_alias = user.git_data.aliases[0]
-                        if not main_alias.is_signed:
-                            main_alias.is_signed = commit.gpgsig is not None
-
-                    # Timestamp discovery
-                    if (matching_strict_email):
-                        logger.trace("[{}] Adding timestamp '{}'", repo_info.name, timestamp)
-                        user.git_data.timestamps.append(timestamp)
-
-                    # Email discovery
-                    is_github_generated = GITHUB_GENERATED_EMAIL_PATTERN.match(author_email)
-                    is_userowned_github_generated_email = False
-                    if is_github_generated:
-                        email_id_part = author_email.split('+')[0]
-                        is_userowned_github_generated_email = (email_id_part == str(user.id))
-
-                    if (matching_strict_name) and (author_email not in user.git_data.emails) and ((not is_github_generated) or is_userowned_github_generated_email):
-                        logger.debug("[{}] Discovered email '{}' (matched {})", repo_info.name, author_email, author_name)
-                        user.git_data.emails.add(author_email)
-                        changed = True
-
-                    # Alias discovery
-                    existing_strict_alias = next(
-                        (
-                            alias
-                            for alias in user.git_data.aliases
-                            if alias.name == author_name
-                        ),
-                        None
-                    )
-
-                    if matching_strict_email and (not existing_strict_alias):
-                        alias = Alias(
-                            author_name,
-                            is_main=False,
-                            is_signed=(commit.gpgsig is not None),
-                        )
-                        logger.debug("[{}] Discovered{}alias '{}' (STRONG CONFIDENCE)", repo_info.name, alias.is_signed and " signed " or " ", alias)
-                        user.git_data.aliases.append(alias)
-                        changed = True
-                        continue
-
-                    if existing_strict_alias:
-                        continue
-
-                    if alias_based_inference and len(author_name) > 3 and (
-                        names_equivalent_guess(user.name, author_name) or
-                        matching_substrings(user.name, author_name) or
-                        names_equivalent_guess(user.displayname, author_name) or
-                        matching_substrings(user.displayname, author_name)
-                    ):
-                        alias = Alias(
-                            author_name,
-                            is_main=False,
-                            is_signed=(commit.gpgsig is not None),
-                        )
-                        logger.debug("[{}] Discovered{}alias '{}' (WEAK CONFIDENCE)", repo_info.name, alias.is_signed and " signed " or " ", alias)
-                        user.git_data.aliases.append(alias)
-                        changed = True
-
-            except:
-                logger.exception("Failed scanning the repository (is the repository empty?)")
-
-        logger.debug(
-            "Pass {} complete - {} aliases, {} emails",
-            pass_number,
-            len(user.git_data.aliases),
-            len(user.git_data.emails),
-        )
+    for line in stderr.splitlines():
+        logger.debug("Git [{}]: {}", repo_name, line)
+
+    return process.returncode
 
-    logger.success("Identity expansion converged after {} passes", pass_number)
+def clone_repository(repo: RepositoryInformation, temp_dir_name: str, repo_dir_name: Optional[str] = None) -> Optional[tuple[str, RepositoryInformation]]:
+    """
+    Clones commit metadata only: the clone is bare, and trees/blobs are filtered out when the server allows it
+    """
 
-def clone_repository(repo: RepositoryInformation, temp_dir_name: str) -> Optional[tuple[Repo, RepositoryInformation]]:
     try:
         logger.info("Cloning repository '{}'", repo.name)
 
-        process = subprocess.Popen(
-            ["git", "clone", repo.git_url, repo.name.replace('/', '-')],
-            cwd=temp_dir_name,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
+        repo_dir_name = repo_dir_name or repo.name.replace('/', '-')
+        repo_path = os.path.join(temp_dir_name, repo_dir_name)
 
-        stdout, stderr = process.communicate()
+        for clone_filter in CLONE_FILTERS:
+            returncode = run_git(
+                ["clone", *CLONE_ARGUMENTS, f"--filter={clone_filter}", repo.git_url, repo_dir_name],
+                temp_dir_name,
+                repo.name
+            )
 
-        for line in stdout.splitlines():
-            logger.debug("Git [{}]: {}", repo.name, line)
+            if returncode == 0:
+                return repo_path, repo
 
-        for line in stderr.splitlines():
-            logger.debug("Git [{}]: {}", repo.name, line)
+            logger.debug("Git exited with code {} while cloning repository '{}' with filter '{}'", returncode, repo.name, clone_filter)
+            shutil.rmtree(repo_path, ignore_errors=True)
 
-        repo_path = os.path.join(temp_dir_name, repo.name.replace('/', '-'))
-        return Repo(repo_path), repo
+        logger.error("Failed to clone repository '{}' with any of the filters {}", repo.name, CLONE_FILTERS)
+        return None
 
     except Exception:
         logger.exception("Failed to clone repository '{}'", repo.name)
         return None
 
-def visit_repositories(user: User, workers: int, alias_based_inference: bool) -> None:
-    logger.debug("Visiting repositories with {} workers", workers)
+def fetch_repository(repo: RepositoryInformation, repo_path: str) -> bool:
+    """
+    Brings an existing metadata-only clone up to date, reusing the filter it was cloned with
+    """
+
+    try:
+        logger.info("Fetching repository '{}'", repo.name)
 
-    temp_dir_name = f"gitrepos_{user.name.lower()}_{random_str(16)}"
-    logger.debug("Set temp dir name to '{}'", temp_dir_name)
+        head_ref = subprocess.run(
+            ["git", "symbolic-ref", "HEAD"],
+            cwd=repo_path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=True
+        ).stdout.strip()
 
+        returncode = run_git(["fetch", "--no-tags", "origin", f"+HEAD:{head_ref}"], repo_path, repo.name)
+        if returncode != 0:
+            logger.error("Git exited with code {} while fetching repository '{}'", returncode, repo.name)
+            return False
+
+        return True
+
+    except Exception:
+        logger.exception("Failed to fetch repository '{}'", repo.name)
+        return False
+
+def clone_stage(
+    acquire: Callable[[RepositoryInformation], Optional[tuple[str, RepositoryInformation]]],
+    repo_info: RepositoryInformation,
+    extraction_executor: ProcessPoolExecutor,
+    extraction_slots: BoundedSemaphore,
+    since_sha: Optional[str] = None,
+    release: Optional[Callable[[RepositoryInformation], None]] = None
+) -> Optional[Future[RepositorySummary]]:
+    """
+    `release` is called once the acquired clone is extracted (it must not hold the clone for longer:
+    a clone cache entry held while waiting on another would deadlock concurrent runs)
+    """
+
+    result_tuple = acquire(repo_info)
+    if result_tuple is None:
+        return None
+
+    extraction_slots.acquire() # Blocks while extraction lags behind, which throttles cloning
     try:
-        os.mkdir(temp_dir_name)
+        future = extraction_executor.submit(summarize_repository, *result_tuple, since_sha)
     except Exception:
-        logger.exception("Couldn't create temporary directory")
+        extraction_slots.release()
+        if release is not None:
+            release(repo_info)
+        raise
+
+    future.add_done_callback(lambda _: extraction_slots.release())
+    if release is not None:
+        future.add_done_callback(lambda _: release(repo_info))
+    return future
+
+def forward_summary(
+    clone_future: Future[Optional[Future[RepositorySummary]]],
+    summary_future: Future[Optional[RepositorySummary]],
+    complete: Callable[[RepositorySummary], RepositorySummary] = lambda summary: summary,
+    fallback: Optional[RepositorySummary] = None
+) -> None:
+    """
+    Resolves `summary_future` once the repository has been cloned then extracted (or with `fallback` if the clone failed),
+    with the extracted summary passed through `complete`
+    """
+
+    exception = clone_future.exception()
+    if exception is not None:
+        summary_future.set_exception(exception)
+        return
+
+    extraction_future = clone_future.result()
+    if extraction_future is None:
+        if fallback is not None:
+            logger.warning("Couldn't clone repository '{}', reusing the results of its last scan", fallback.repo_name)
+        summary_future.set_result(fallback)
         return
 
-    repos: list[Repo] = []
-    repo_infos: list[RepositoryInformation] = []
+    def forward_extraction(extraction_future: Future[RepositorySummary]) -> None:
+        try:
+            summary = complete(extraction_future.result())
+        except Exception as exception:
+            summary_future.set_exception(exception)
+        else:
+            summary_future.set_result(summary)
 
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        futures = [
-            executor.submit(clone_repository, repo_info, temp_dir_name)
-            for repo_info in user.repositories
-        ]
+    extraction_future.add_done_callback(forward_extraction)
 
-        for future in as_completed(futures):
-            result_tuple = future.result()
-            if result_tuple is None:
-                continue
+class RepositoryPipeline:
+    """
+    Clone and extraction worker pools, which may be shared by several targets
 
-            repo, repo_info = result_tuple
-            repos.append(repo)
-            repo_infos.append(repo_info)
+    Each repository is cloned and extracted once: its summary is reused by every target it is submitted for
+    (for `summary_ttl` seconds when set, after which the repository is fetched and extracted again),
+    as long as it is one of the `max_summaries` most recently used ones.
+    Without a clone cache, clones go to `temp_dir_name`, which is created here and removed on `close`,
+    and each clone is removed as soon as it is extracted.
 
-    logger.info("Finished cloning {} repositories", len(repos))
-    expand_identities(repos, user, alias_based_inference, repo_infos)
+    With a `store`, summaries are persisted: a repository the git host reports as not pushed to since
+    its last scan is not cloned at all, and others only have their commits past the last scanned one walked
+    """
 
-    logger.info("Sorting timestamps for analysis later on")
-    user.git_data.timestamps.sort()
+    def __init__(
+        self,
+        workers: int,
+        clone_cache: Optional[CloneCache] = None,
+        temp_dir_name: Optional[str] = None,
+        summary_ttl: Optional[float] = None,
+        store: Optional[ScanStore] = None,
+        max_summaries: int = DEFAULT_MAX_SUMMARIES
+    ) -> None:
+        self.clone_cache: Optional[CloneCache] = clone_cache
+        self.temp_dir_name: Optional[str] = None
+        self.summary_ttl: Optional[float] = summary_ttl
+        self.store: Optional[ScanStore] = store
+
+        if clone_cache is None:
+            self.temp_dir_name = temp_dir_name or f"gitrepos_{random_str(16)}"
+            logger.debug("Set temp dir name to '{}'", self.temp_dir_name)
+            os.mkdir(self.temp_dir_name)
+
+        extraction_workers = max(1, min(workers, os.cpu_count() or 1))
+        self.extraction_slots = BoundedSemaphore(extraction_workers * 2)
+        self.extraction_executor = ProcessPoolExecutor(
+            max_workers=extraction_workers,
+            mp_context=extraction_context(),
+            initializer=configure_extraction_worker
+        )
+        self.clone_executor = ThreadPoolExecutor(max_workers=workers)
+
+        # Repository name -> its summary and when it was submitted, least recently used first
+        self.summaries: OrderedDict[str, tuple[Future[Optional[RepositorySummary]], float]] = OrderedDict()
+        self.max_summaries: int = max_summaries
+        self.summaries_lock = Lock()
+
+    def clone_path(self, repo_info: RepositoryInformation) -> str:
+        return os.path.join(self.temp_dir_name, repo_info.name.replace('/', '-'))
+
+    def acquire(self, repo_info: RepositoryInformation) -> Optional[tuple[str, RepositoryInformation]]:
+        if self.clone_cache is not None:
+            return self.clone_cache.acquire(repo_info)
+
+        return clone_repository(repo_info, self.temp_dir_name, os.path.basename(self.clone_path(repo_info)))
+
+    def existing(self, key: str) -> Optional[Future[Optional[RepositorySummary]]]:
+        with self.summaries_lock:
+            return self.existing_locked(key)
+
+    def claim(self, key: str) -> tuple[Future[Optional[RepositorySummary]], bool]:
+        """
+        Returns the summary registered under `key`, and whether it is a new one (which the caller must then resolve)
+        """
+
+        with self.summaries_lock:
+            summary_future = self.existing_locked(key)
+            if summary_future is not None:
+                return summary_future, False
+
+            summary_future = Future()
+            self.summaries[key] = (summary_future, time.monotonic())
+            self.trim_locked()
+            return summary_future, True
+
+    def existing_locked(self, key: str) -> Optional[Future[Optional[RepositorySummary]]]:
+        summary_future, submitted_at = self.summaries.get(key, (None, 0.0))
+        if summary_future is None:
+            return None
+
+        if self.summary_ttl is not None and summary_future.done() and time.monotonic() - submitted_at > self.summary_ttl:
+            del self.summaries[key]
+            return None
+
+        self.summaries.move_to_end(key)
+        return summary_future
+
+    def trim_locked(self) -> None:
+        """
+        Forgets the least recently used summaries past `max_summaries` (the scan store, when set, still has them)
+        """
+
+        excess = len(self.summaries) - self.max_summaries
+        if excess <= 0:
+            return
+
+        resolved = [key for key, (summary_future, _) in self.summaries.items() if summary_future.done()]
+        for key in resolved[:excess]: # Pending ones are still awaited by their targets
+            del self.summaries[key]
+
+    def submit(self, repo_info: RepositoryInformation, commit_source: Optional[ApiCommitSource] = None) -> Future[Optional[RepositorySummary]]:
+        """
+        With a `commit_source`, large repositories get the target's commits read from the API instead of being cloned
+        (their summary then only covers the target's commits, so it is only reused for that target)
+        """
+
+        summary_future = self.existing(repo_info.name)
+        if summary_future is not None:
+            logger.debug("Reusing the extraction of repository '{}'", repo_info.name)
+            return summary_future
+
+        stored_summary: Optional[RepositorySummary] = None
+        is_unchanged = False
+        stored = self.store.load_repository(repo_info) if self.store is not None else None
+        if stored is not None:
+            stored_summary, pushed_at = stored
+            is_unchanged = repo_info.pushed_at is not None and pushed_at == repo_info.pushed_at
+
+        if commit_source is not None and not is_unchanged and commit_source.prefers_api(repo_info):
+            summary_future, is_new = self.claim(f"{repo_info.name} ({commit_source.author_id})")
+            if is_new:
+                self.clone_executor.submit(self.ingest, repo_info, commit_source, summary_future, stored_summary)
+            return summary_future
+
+        summary_future, is_new = self.claim(repo_info.name)
+        if not is_new:
+            logger.debug("Reusing the extraction of repository '{}'", repo_info.name)
+        elif is_unchanged:
+            logger.debug("Repository '{}' wasn't pushed to since its last scan, reusing it", repo_info.name)
+            summary_future.set_result(stored_summary)
+        else:
+            self.clone(repo_info, summary_future, stored_summary)
+
+        return summary_future
+
+    def clone(self, repo_info: RepositoryInformation, summary_future: Future[Optional[RepositorySummary]], stored_summary: Optional[RepositorySummary]) -> None:
+        if self.clone_cache is None:
+            summary_future.add_done_callback(lambda _: shutil.rmtree(self.clone_path(repo_info), ignore_errors=True))
+
+        since_sha = stored_summary.head_sha if stored_summary is not None else None
+        release = self.clone_cache.release if self.clone_cache is not None else None
+        clone_future = self.clone_executor.submit(clone_stage, self.acquire, repo_info, self.extraction_executor, self.extraction_slots, since_sha, release)
+        clone_future.add_done_callback(lambda clone_future: forward_summary(
+            clone_future,
+            summary_future,
+            lambda summary: self.record(repo_info, stored_summary, summary),
+            stored_summary
+        ))
+
+    def ingest(self, repo_info: RepositoryInformation, commit_source: ApiCommitSource, summary_future: Future[Optional[RepositorySummary]], stored_summary: Optional[RepositorySummary]) -> None:
+        try:
+            summary = commit_source.summarize(repo_info)
+        except Exception:
+            logger.exception("Failed reading the commits of repository '{}' from the API, cloning it instead", repo_info.name)
+            summary = None
+
+        if summary is None:
+            self.clone(repo_info, summary_future, stored_summary)
+        else:
+            summary_future.set_result(summary)
+
+    def record(self, repo_info: RepositoryInformation, stored_summary: Optional[RepositorySummary], summary: RepositorySummary) -> RepositorySummary:
+        """
+        Completes an incremental summary with the stored one, then stores the result
+        """
+
+        if summary.since_sha is not None and stored_summary is not None:
+            logger.debug("[{}] Scanned {} new commits since {}", repo_info.name, summary.commit_count, summary.since_sha[:7])
+            summary = merge_summaries(stored_summary, summary)
+
+        if self.store is not None:
+            self.store.save_repository(repo_info, summary)
+
+        return summary
+
+    def release_clones(self) -> None:
+        """
+        Lets the clone cache fetch (and evict) the repositories this pipeline read, which must not be in use
+        """
+
+        if self.clone_cache is not None:
+            self.clone_cache.release_all()
+            self.clone_cache.evict()
+
+    def close(self) -> None:
+        try:
+            self.clone_executor.shutdown()
+            self.extraction_executor.shutdown()
+
+        finally:
+            self.release_clones()
+
+        if self.temp_dir_name is not None:
+            try:
+                shutil.rmtree(self.temp_dir_name)
+            except Exception:
+                logger.exception("Couldn't remove temporary directory")
+
+def collect_summaries(summary_futures: list[Future[Optional[RepositorySummary]]]) -> Iterator[RepositorySummary]:
+    for future in as_completed(summary_futures):
+        summary = future.result()
+        if summary is None:
+            continue
+
+        logger.debug("[{}] Extracted {} distinct identities from {} commits", summary.repo_name, len(summary.identities), summary.commit_count)
+        yield summary
+
+def visit_repositories(
+    user: User,
+    workers: int,
+    alias_based_inference: bool,
+    clone_cache: Optional[CloneCache] = None,
+    repositories: Optional[Iterable[RepositoryInformation]] = None,
+    pipeline: Optional[RepositoryPipeline] = None,
+    store: Optional[ScanStore] = None,
+    commit_source: Optional[ApiCommitSource] = None
+) -> None:
+    """
+    Clones and extracts repositories as a pipeline: each repository is extracted as soon as its clone completes,
+    then identities are expanded once every extraction is in
+
+    `repositories` may be a stream still being listed by the provider: each repository is cloned as soon as it comes in,
+    and added to `user.repositories`.
+    A `pipeline` shared between targets reuses the repositories it already extracted (`clone_cache` and `store` are then the pipeline's own).
+    A `commit_source` reads the target's commits of large repositories from the API instead of cloning them
+    """
+
+    logger.debug("Visiting repositories with {} workers", workers)
+
+    owns_pipeline = pipeline is None
+    if pipeline is None:
+        try:
+            pipeline = RepositoryPipeline(workers, clone_cache, f"gitrepos_{user.name.lower()}_{random_str(16)}", store=store)
+        except Exception:
+            logger.exception("Couldn't create temporary directory")
+            if isinstance(repositories, Generator):
+                repositories.close()
+            return
 
     try:
-        shutil.rmtree(temp_dir_name)
-    except Exception:
-        logger.exception("Couldn't remove temporary directory")
+        summary_futures: list[Future[Optional[RepositorySummary]]] = []
+        for repo_info in (list(user.repositories) if repositories is None else repositories):
+            if repositories is not None:
+                user.repositories.append(repo_info)
+            summary_futures.append(pipeline.submit(repo_info, commit_source))
+
+        summaries = list(collect_summaries(summary_futures))
+        identities = build_identity_table(summary.identities for summary in summaries)
+
+        logger.info("Finished cloning and extracting {} repositories", len(summaries))
+        expand_identities(identities, user, alias_based_inference)
+
+    finally:
+        # A stream left mid-way (when the visit fails) stops listing, and releases its session
+        if isinstance(repositories, Generator):
+            repositories.close()
+
+        if owns_pipeline:
+            pipeline.close()
+
+    logger.info("Sorting timestamps for analysis later on")
+    user.git_data.timestamps.sort()
@@ -0,0 +1,166 @@
+"""
+# ScanStore
+
+This file hosts the persistent store of scan results, an SQLite database shared between runs.
+
+It holds, per repository, the identities extracted from its history (with their commit timestamps) and the last
+scanned commit, so that re-scans only walk newer commits. Per user, it holds the latest report and when it was made.
+"""
+
+from datetime import datetime
+from typing import Any, Optional
+from threading import Lock
+from loguru import logger
+
+import sqlite3
+import json
+import time
+import os
+
+from githunt.Classes.Identity import Identity
+from githunt.Classes.RepositoryInformation import RepositoryInformation
+from githunt.Classes.RepositorySummary import RepositorySummary
+from githunt.Utils import default_cache_dir
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repositories (
+    name TEXT PRIMARY KEY,
+    git_url TEXT NOT NULL,
+    head_sha TEXT,
+    pushed_at TEXT,
+    commit_count INTEGER NOT NULL,
+    scanned_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS identities (
+    repository TEXT NOT NULL REFERENCES repositories (name) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    commit_count INTEGER NOT NULL,
+    is_signed INTEGER NOT NULL,
+    timestamps TEXT NOT NULL, -- JSON list of ISO 8601 datetimes, with their UTC offset
+    PRIMARY KEY (repository, name, email)
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    user_id INTEGER,
+    report TEXT NOT NULL,
+    scanned_at REAL NOT NULL
+);
+"""
+
+class ScanStore:
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path: str = path or os.path.join(default_cache_dir(), "githunt.sqlite3")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        # Shared by the pipeline's threads, which take turns through the lock
+        self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.lock = Lock()
+
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode = WAL")
+            self.connection.execute("PRAGMA foreign_keys = ON")
+
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, SCHEMA_VERSION):
+                logger.warning("Scan store '{}' has an unknown format (version {}), starting it over", self.path, version)
+                self.connection.executescript("DROP TABLE IF EXISTS identities; DROP TABLE IF EXISTS repositories; DROP TABLE IF EXISTS users;")
+
+            self.connection.executescript(SCHEMA)
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+        logger.debug("Using scan store '{}'", self.path)
+
+    def load_repository(self, repo_info: RepositoryInformation) -> Optional[tuple[RepositorySummary, Optional[str]]]:
+        """
+        Returns the stored summary of the repository, with the push time the git host reported when it was scanned
+        """
+
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT git_url, head_sha, pushed_at, commit_count FROM repositories WHERE name = ?",
+                (repo_info.name,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            git_url, head_sha, pushed_at, commit_count = row
+            if git_url != repo_info.git_url:
+                return None
+
+            identity_rows = self.connection.execute(
+                "SELECT name, email, commit_count, is_signed, timestamps FROM identities WHERE repository = ?",
+                (repo_info.name,)
+            ).fetchall()
+
+        identities: dict[tuple[str, str], Identity] = {}
+        for name, email, identity_commit_count, is_signed, timestamps in identity_rows:
+            identity = Identity(name, email)
+            identity.commit_count = identity_commit_count
+            identity.is_signed = bool(is_signed)
+            identity.timestamps = [datetime.fromisoformat(timestamp) for timestamp in json.loads(timestamps)]
+            identities[identity.key] = identity
+
+        return RepositorySummary(repo_info.name, identities, commit_count, head_sha), pushed_at
+
+    def save_repository(self, repo_info: RepositoryInformation, summary: RepositorySummary) -> None:
+        """
+        Replaces the stored summary of the repository with `summary`, which must cover its whole history
+        """
+
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM repositories WHERE name = ?", (repo_info.name,))
+            self.connection.execute(
+                "INSERT INTO repositories (name, git_url, head_sha, pushed_at, commit_count, scanned_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (repo_info.name, repo_info.git_url, summary.head_sha, repo_info.pushed_at, summary.commit_count, time.time())
+            )
+            self.connection.executemany(
+                "INSERT INTO identities (repository, name, email, commit_count, is_signed, timestamps) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        repo_info.name,
+                        identity.name,
+                        identity.email,
+                        identity.commit_count,
+                        identity.is_signed,
+                        json.dumps([timestamp.isoformat() for timestamp in identity.timestamps])
+                    )
+                    for identity in summary.identities.values()
+                ]
+            )
+
+    def save_user(self, report: dict[str, Any]) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO users (username, user_id, report, scanned_at) VALUES (?, ?, ?, ?)",
+                (report["username"].lower(), report.get("id"), json.dumps(report), time.time())
+            )
+
+    def load_user(self, username: str) -> Optional[tuple[dict[str, Any], float]]:
+        """
+        Returns the latest report of the user, with when it was made
+        """
+
+        with self.lock:
+            row = self.connection.execute("SELECT report, scanned_at FROM users WHERE username = ?", (username.lower(),)).fetchone()
+
+        if row is None:
+            return None
+
+        return json.loads(row[0]), row[1]
+
+    def known_emails(self, username: str) -> list[str]:
+        """
+        Returns the emails the latest scan of the user captured
+        """
+
+        stored = self.load_user(username)
+        return stored[0].get("emails", []) if stored is not None else []
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
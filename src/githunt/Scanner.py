@@ -0,0 +1,130 @@
+"""
+# Scanner
+
+This file hosts the scanner shared by the targets of a batch (and of the service): one API session, token pool and
+rate limiter for the provider, one clone and extraction pipeline for the repositories.
+
+A repository belonging to several targets (typically through a shared organization) is cloned and extracted once,
+then its identity table is reused for every target.
+"""
+
+from typing import Any, Callable, Generator, Optional, TYPE_CHECKING
+from loguru import logger
+
+from githunt.Classes.RepositoryInformation import RepositoryInformation
+from githunt.Classes.ScanOptions import ScanOptions
+from githunt.GitProviders.GitHub import API_URL, create_session, log_session_stats, stream_user
+from githunt.GitProviders.GitHubCommits import create_commit_source
+from githunt.GitProviders.RateLimiter import shared_rate_limiter
+from githunt.GitProviders.TokenPool import TokenPool
+from githunt.RepositoriesVisitor import RepositoryPipeline, visit_repositories
+from githunt.Report import build_report
+from githunt.Utils import random_str
+
+if TYPE_CHECKING:
+    from githunt.CloneCache import CloneCache
+    from githunt.HttpCache import HttpCache
+    from githunt.ScanStore import ScanStore
+
+class Scanner:
+    def __init__(
+        self,
+        options: ScanOptions,
+        token_pool: TokenPool,
+        http_cache: Optional[HttpCache] = None,
+        clone_cache: Optional[CloneCache] = None,
+        api_url: str = API_URL,
+        summary_ttl: Optional[float] = None,
+        store: Optional[ScanStore] = None
+    ) -> None:
+        self.options: ScanOptions = options
+        self.token_pool: TokenPool = token_pool
+        self.http_cache: Optional[HttpCache] = http_cache
+        self.api_url: str = api_url
+        self.store: Optional[ScanStore] = store
+
+        self.session, self.stats = create_session(options.workers, options.proxy, http_cache)
+        self.pipeline = RepositoryPipeline(options.workers, clone_cache, f"gitrepos_shared_{random_str(16)}", summary_ttl, store)
+
+    def scan(self, username: str, on_progress: Optional[Callable[[dict[str, Any]], None]] = None) -> Optional[dict[str, Any]]:
+        """
+        Scans and analyzes a target, returning its report (or None if the git host doesn't know it)
+
+        `on_progress` is called with an event (a dict with a "stage" key) as each stage starts and each repository comes in
+        """
+
+        def progress(stage: str, **details: Any) -> None:
+            if on_progress is not None:
+                on_progress({"stage": stage, **details})
+
+        def tracked(repositories: Generator[RepositoryInformation, None, None]) -> Generator[RepositoryInformation, None, None]:
+            try:
+                for count, repo_info in enumerate(repositories, 1):
+                    progress("repository", name=repo_info.name, count=count)
+                    yield repo_info
+            finally:
+                repositories.close()
+
+        options = self.options
+        progress("querying")
+        streamed = stream_user(
+            username,
+            options.scan_forks,
+            options.scan_orgs,
+            options.blacklisted_orgs,
+            self.token_pool,
+            options.workers,
+            options.proxy,
+            self.http_cache,
+            options.fetch_details,
+            options.filter_org_repositories,
+            self.api_url,
+            self.session,
+            self.store.known_emails(username) if self.store is not None else None
+        )
+        if streamed is None:
+            return None
+
+        user, repositories = streamed
+        commit_source = None
+        if options.use_api_ingestion:
+            commit_source = create_commit_source(self.token_pool, user, options.api_ingestion_size, f"{self.api_url}/graphql", self.session)
+
+        progress("visiting", total_repository_count=user.total_repository_count)
+        visit_repositories(
+            user,
+            options.workers,
+            options.alias_based_inference,
+            repositories=tracked(repositories),
+            pipeline=self.pipeline,
+            commit_source=commit_source
+        )
+
+        progress("analyzing", repository_count=len(user.repositories), timestamp_count=len(user.git_data.timestamps))
+        report = build_report(user, options.infer_country, options.top_countries, options.use_population_apriori, options.infer_activity)
+        if self.store is not None:
+            self.store.save_user(report)
+
+        return report
+
+    def evict_clones(self) -> None:
+        """
+        Evicts the clone cache down to its size budget (skipping the entries being read)
+        """
+
+        if self.pipeline.clone_cache is not None:
+            self.pipeline.clone_cache.evict()
+
+    def close(self) -> None:
+        try:
+            self.pipeline.close()
+
+        finally:
+            log_session_stats(self.session, self.stats)
+            self.token_pool.log_summary()
+            shared_rate_limiter().log_summary()
+            self.session.close()
+
+            if self.http_cache is not None:
+                logger.info("Served {} API responses from the HTTP cache (304 Not Modified)", self.http_cache.revalidated)
+                self.http_cache.evict()
@@ -0,0 +1,290 @@
+"""
+# Service
+
+This file hosts service mode: a long-running process scanning targets submitted through a local HTTP/JSON API.
+
+Jobs go through a bounded queue, and run on a fixed number of worker threads through one `Scanner`:
+the API session, token pool, HTTP and clone caches, extraction processes and already extracted repositories
+stay warm between jobs, as do the timezone index and country table (loaded once, at startup).
+
+Endpoints:
+- `POST /jobs` with `{"username": "..."}`: submits a job (`503` when the queue is full)
+- `GET /jobs`: lists the jobs, without their results
+- `GET /jobs/<id>`: the job's status, latest progress event, and report once done
+- `GET /jobs/<id>/events`: streams the job's progress events as NDJSON until it finishes
+- `GET /health`: queue and worker counts
+
+SIGTERM (from a process supervisor) shuts the service down like Ctrl-C: queued jobs are cancelled, and the caches and store closed.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread, current_thread, main_thread
+from queue import Empty, Full, Queue
+from typing import Any, Optional
+from loguru import logger
+
+import signal
+import json
+
+from githunt.Classes.Job import Job
+from githunt.Classes.ScanOptions import ScanOptions
+from githunt.Scanner import Scanner
+
+DEFAULT_LISTEN_ADDRESS = "127.0.0.1:8765"
+MAX_FINISHED_JOBS = 1024 # Older finished jobs are forgotten past this count
+EVENTS_POLL_SECONDS = 15
+
+def warm_up(options: ScanOptions) -> None:
+    """
+    Loads what the analyses build on, so that the first job doesn't pay for it
+    """
+
+    if options.infer_country:
+        from githunt.Analysis.TimezoneIndex import load_timezone_index
+        from githunt.Analysis.CountryTable import load_country_table
+
+        load_timezone_index()
+        load_country_table()
+
+class Service:
+    def __init__(self, scanner: Scanner, concurrency: int, queue_size: int) -> None:
+        self.scanner: Scanner = scanner
+        self.queue: Queue = Queue(maxsize=queue_size)
+
+        self.jobs: dict[str, Job] = {} # In submission order
+        self.running_count: int = 0
+        self.is_stopping: bool = False
+        self.lock = Lock()
+
+        self.workers: list[Thread] = [Thread(target=self.run_worker, daemon=True) for _ in range(max(1, concurrency))]
+
+    def start(self) -> None:
+        for worker in self.workers:
+            worker.start()
+
+        logger.info("Started {} job workers (queue of {} jobs)", len(self.workers), self.queue.maxsize)
+
+    def submit(self, username: str) -> Optional[Job]:
+        """
+        Queues a scan of `username`, returning None when the queue is full (or the service is shutting down)
+        """
+
+        job = Job(username)
+        with self.lock:
+            if self.is_stopping:
+                return None
+
+            try:
+                self.queue.put_nowait(job)
+            except Full:
+                return None
+
+            self.jobs[job.id] = job
+
+        logger.info("Queued job {} for target '{}'", job.id, username)
+        self.forget_finished_jobs()
+        return job
+
+    def job(self, job_id: str) -> Optional[Job]:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def job_list(self) -> list[Job]:
+        with self.lock:
+            return list(self.jobs.values())
+
+    def forget_finished_jobs(self) -> None:
+        with self.lock:
+            finished = [job_id for job_id, job in self.jobs.items() if job.is_finished]
+            for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del self.jobs[job_id]
+
+    def run_worker(self) -> None:
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+
+            with self.lock:
+                self.running_count += 1
+
+            try:
+                self.run_job(job)
+            finally:
+                with self.lock:
+                    self.running_count -= 1
+                    is_idle = self.running_count == 0
+
+                # Outside the lock, as eviction walks the whole clone cache
+                if is_idle:
+                    self.scanner.evict_clones()
+
+    def run_job(self, job: Job) -> None:
+        logger.info("Running job {} for target '{}'", job.id, job.username)
+        job.start()
+
+        try:
+            report = self.scanner.scan(job.username, job.add_event)
+        except Exception as exception:
+            logger.exception("Job {} for target '{}' failed", job.id, job.username)
+            job.finish(error=str(exception))
+            return
+
+        if report is None:
+            logger.error("Could not query the user '{}' (user is None)", job.username)
+            job.finish(error="user not found")
+            return
+
+        job.finish(report)
+        logger.success("Finished job {} for target '{}'", job.id, job.username)
+
+    def stats(self) -> dict[str, Any]:
+        with self.lock:
+            return {
+                "status": "ok",
+                "queued": self.queue.qsize(),
+                "running": self.running_count,
+                "workers": len(self.workers),
+                "jobs": len(self.jobs),
+            }
+
+    def close(self) -> None:
+        """
+        Cancels the queued jobs, then waits for the running ones to finish
+        """
+
+        with self.lock:
+            self.is_stopping = True
+
+        cancelled_count = 0
+        while True:
+            try:
+                job = self.queue.get_nowait()
+            except Empty:
+                break
+
+            job.finish(error="cancelled, as the service shut down")
+            cancelled_count += 1
+
+        if cancelled_count:
+            logger.warning("Cancelled {} queued jobs", cancelled_count)
+
+        for _ in self.workers:
+            self.queue.put(None)
+
+        for worker in self.workers:
+            worker.join()
+
+def create_server(service: Service, host: str, port: int) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def send_json(self, code: int, payload: Any) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_error_json(self, code: int, message: str) -> None:
+            self.send_json(code, {"error": message})
+
+        def stream_events(self, job: Job) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers() # No length: the response ends when the connection closes
+
+            sent = 0
+            while True:
+                is_finished = job.is_finished
+                events = job.events_after(sent, EVENTS_POLL_SECONDS)
+                for event in events:
+                    self.wfile.write((json.dumps(event) + "\n").encode())
+                sent += len(events)
+                self.wfile.flush()
+
+                if is_finished:
+                    self.wfile.write((json.dumps({"stage": job.status, "error": job.error}) + "\n").encode())
+                    return
+
+        def do_GET(self) -> None:
+            parts = self.path.strip("/").split("/")
+
+            if parts == ["health"]:
+                self.send_json(200, service.stats())
+                return
+
+            if parts == ["jobs"]:
+                jobs = [job.to_dict() for job in service.job_list()]
+                self.send_json(200, [{key: value for key, value in job.items() if key != "result"} for job in jobs])
+                return
+
+            if len(parts) in (2, 3) and parts[0] == "jobs":
+                job = service.job(parts[1])
+                if job is None:
+                    self.send_error_json(404, "unknown job")
+                elif len(parts) == 2:
+                    self.send_json(200, job.to_dict())
+                elif parts[2] == "events":
+                    self.stream_events(job)
+                else:
+                    self.send_error_json(404, "not found")
+                return
+
+            self.send_error_json(404, "not found")
+
+        def do_POST(self) -> None:
+            if self.path.rstrip("/") != "/jobs":
+                self.send_error_json(404, "not found")
+                return
+
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            except json.decoder.JSONDecodeError:
+                self.send_error_json(400, "malformed JSON")
+                return
+
+            username = payload.get("username") if isinstance(payload, dict) else None
+            if not isinstance(username, str) or not username.strip():
+                self.send_error_json(400, "'username' is required")
+                return
+
+            job = service.submit(username.strip())
+            if job is None:
+                self.send_error_json(503, "the job queue is full")
+                return
+
+            self.send_json(202, job.to_dict())
+
+        def log_message(self, format: str, *args) -> None:
+            logger.debug("Service: {}", format % args)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+def parse_listen_address(address: str) -> tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+def serve(service: Service, address: str) -> None:
+    host, port = parse_listen_address(address)
+    server = create_server(service, host, port)
+    service.start()
+
+    # SIGTERM takes the same way out as Ctrl-C (signal handlers can only be installed from the main thread)
+    handles_sigterm = current_thread() is main_thread()
+    previous_handler = signal.getsignal(signal.SIGTERM) or signal.SIG_DFL # None when not set from Python
+    try:
+        if handles_sigterm:
+            signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+        logger.success("Serving the githunt API on http://{}:{}", host, server.server_port)
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down")
+    finally:
+        if handles_sigterm:
+            signal.signal(signal.SIGTERM, previous_handler)
+
+        server.server_close()
+        service.close()
@@ -1,5 +1,47 @@
 import string
 import random
+import os
 
 def random_str(N: int) -> str:
     return ''.join(random.choice(string.ascii_letters + string.digits) for _ in range(N))
+
+def default_cache_dir() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "githunt")
+
+def matching_substrings(a: str, b: str) -> bool:
+    a = a.lower()
+    b = b.lower()
+
+    return (
+        a == b
+        or a in b
+        or b in a
+    )
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.strip().lower().split())
+
+def names_equivalent_strict(a: str, b: str) -> bool:
+    return normalize_name(a) == normalize_name(b)
+
+def names_equivalent_guess(a: str, b: str) -> bool:
+    """
+    Controlled heuristic
+    It prevents 'John' matching 'Johnny' for example, or 'Alex' matching 'Alexander'
+    """
+
+    return tokens_equivalent_guess(normalize_name(a).split(), normalize_name(b).split())
+
+def tokens_equivalent_guess(a_tokens: list[str], b_tokens: list[str]) -> bool:
+    if not a_tokens or not b_tokens:
+        return False
+
+    if a_tokens == b_tokens:
+        return True
+
+    # Same first + last token (e.g. "John A Smith" vs "John Smith")
+    if len(a_tokens) >= 2 and len(b_tokens) >= 2:
+        return a_tokens[0] == b_tokens[0] and a_tokens[-1] == b_tokens[-1]
+
+    return False
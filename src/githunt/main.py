@@ -1,69 +1,105 @@
-from datetime import datetime, timedelta
-from typing import Optional
+from typing import Iterator, Optional, TYPE_CHECKING
 from loguru import logger
 
 import sys
 
 from githunt.CliParser import parser
-from githunt.RepositoriesVisitor import visit_repositories
-from githunt.GitProviders.GitHub import query_user as github_query_user
 
-from githunt.Analysis.CountryDetectionAlgorithm import infer_countries
-from githunt.Analysis.ActivityDetectionAlgorithm import infer_activity
+# Subsystems (and their dependencies: requests, numpy, country data...) are imported when they run,
+# so that `--help` or a run skipping some analyses doesn't pay for them
+if TYPE_CHECKING:
+    from githunt.CloneCache import CloneCache
+    from githunt.HttpCache import HttpCache
+    from githunt.Classes.User import User
+    from githunt.Classes.RepositoryInformation import RepositoryInformation
+    from githunt.GitProviders.TokenPool import TokenPool
+    from githunt.ScanStore import ScanStore
 
-from githunt.Classes.User import User
+logger.remove(0)
 
-DAY_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+def apply_cache_switch(args) -> None:
+    """
+    `--no-cache` turns off every persistent cache at once
+    """
 
-logger.remove(0)
+    if not args.use_cache:
+        args.use_clone_cache = args.use_http_cache = args.use_store = False
 
-def main() -> None:
-    args = parser.parse_args()
+def create_clone_cache(args) -> Optional[CloneCache]:
+    if not args.use_clone_cache:
+        return None
 
-    debug_level: str = args.level.upper()
-    logger.add(sys.stderr, level=debug_level)
-    logger.add(
-        args.logs_path,
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {name}:{function}:{line} | {message}",
-        level=debug_level
-    )
+    from githunt.CloneCache import CloneCache
+    return CloneCache(args.clone_cache_dir, args.clone_cache_size)
 
-    logger.info("Targetting git host '{}' with username '{}'", args.host, args.username)
+def create_store(args) -> Optional[ScanStore]:
+    if not args.use_store:
+        return None
 
-    user: Optional[User] = None
-    if args.host == "github":
-        if not args.personal_access_token:
-            logger.warning("")
-            logger.warning("Not using a Personal Access Token (PAT)!")
-            logger.warning("You can generate one here: https://github.com/settings/personal-access-tokens/new")
-            logger.warning("")
-            logger.warning("This will potentially reduce the quality of the results")
-            logger.warning("You may also get rate-limited by GitHub!")
-            logger.warning("")
-            logger.warning("For security reasons, please either delete it after use, or make it temporary.")
-            logger.warning("")
+    from githunt.ScanStore import ScanStore
+    return ScanStore(args.store_path)
 
-        blacklisted_orgs_str: str = args.blacklisted_orgs
-        blacklisted_orgs = list(map(str.strip, blacklisted_orgs_str.split(",")))
+def run_batch_mode(args, blacklisted_orgs: list[str], token_pool: TokenPool, http_cache: Optional[HttpCache]) -> None:
+    from githunt.Batch import read_usernames, run_batch
+    from githunt.Classes.ScanOptions import ScanOptions
+    from githunt.Scanner import Scanner
 
-        logger.debug("Blacklisted organizations: {}", blacklisted_orgs)
+    if args.api != "rest" or args.engine != "threads":
+        logger.warning("Batch mode scans through the threaded REST provider, ignoring '--api' and '--engine'")
+
+    usernames = read_usernames(args.usernames_file)
+    store = create_store(args)
+    scanner = Scanner(ScanOptions.from_args(args, blacklisted_orgs), token_pool, http_cache, create_clone_cache(args), store=store)
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+
+    try:
+        failures = run_batch(scanner, usernames, output, args.batch_concurrency)
+    finally:
+        scanner.close()
+        if store is not None:
+            store.close()
+        if output is not sys.stdout:
+            output.close()
+
+    if failures:
+        logger.warning("Couldn't scan {} of the {} targets", failures, len(usernames))
+
+    logger.success("Scanned {} targets", len(usernames) - failures)
+
+def run_service_mode(args, blacklisted_orgs: list[str], token_pool: TokenPool, http_cache: Optional[HttpCache]) -> None:
+    from githunt.Classes.ScanOptions import ScanOptions
+    from githunt.Scanner import Scanner
+    from githunt.Service import Service, serve, warm_up
+
+    if args.api != "rest" or args.engine != "threads":
+        logger.warning("Service mode scans through the threaded REST provider, ignoring '--api' and '--engine'")
+
+    options = ScanOptions.from_args(args, blacklisted_orgs)
+    warm_up(options)
+
+    store = create_store(args)
+    scanner = Scanner(options, token_pool, http_cache, create_clone_cache(args), summary_ttl=args.summary_ttl * 60, store=store)
+    try:
+        serve(Service(scanner, args.batch_concurrency, args.queue_size), args.listen)
+    finally:
+        scanner.close()
+        if store is not None:
+            store.close()
+
+def visit_and_report(args, user: User, repositories: Optional[Iterator[RepositoryInformation]], token_pool: TokenPool, store: Optional[ScanStore]) -> None:
+    from githunt.RepositoriesVisitor import visit_repositories
+
+    commit_source = None
+    if args.use_api_ingestion:
+        from githunt.GitProviders.GitHubCommits import create_commit_source
+        commit_source = create_commit_source(token_pool, user, args.api_ingestion_size, workers=args.workers, proxy=args.proxy)
+
+    try:
+        visit_repositories(user, args.workers, args.alias_based_inference, create_clone_cache(args), repositories, store=store, commit_source=commit_source)
+    finally:
+        if commit_source is not None:
+            commit_source.session.close()
 
-        user = github_query_user(
-            args.username,
-            args.scan_forks,
-            args.scan_orgs,
-            blacklisted_orgs,
-            args.personal_access_token,
-            args.workers
-        )
-        if user is None:
-            logger.critical("Could not query the GitHub user '{}' (user is None)", args.username)
-            exit(1)
-
-        logger.success("Data has been successfully retrieved from the git host")
-
-    assert user
-    visit_repositories(user, args.workers, args.alias_based_inference)
     logger.success("Successfully visited repositories")
 
     logger.info("Captured {} emails:", len(user.git_data.emails))
@@ -80,11 +116,15 @@ def main() -> None:
         len(user.repositories),
     )
 
+    from githunt.Report import build_report
+    report = build_report(user, args.infer_country, args.top_countries, args.use_population_apriori, args.infer_activity)
+    if store is not None:
+        store.save_user(report)
+
     if args.infer_country:
-        inferred_countries = infer_countries(user, args.top_countries, args.use_population_apriori)
         logger.success("Successfully inferred countries")
         logger.info("Inferred countries:")
-        for position, country_info in enumerate(inferred_countries):
+        for position, country_info in enumerate(report["countries"]):
             logger.info(
                 "\t- {}) {} (chance: {:.1f}% locally,  {:.1f}% globally)",
                 position + 1,
@@ -94,23 +134,126 @@ def main() -> None:
             )
 
     if args.infer_activity:
-        ratio_interactions_per_day, average_bounds_per_day = infer_activity(user)
         logger.success("Successfully inferred activity")
 
-        sorted_ratio = {day: ratio_interactions_per_day[day] for day in DAY_ORDER if day in ratio_interactions_per_day}
-        sorted_bounds = {day: average_bounds_per_day[day] for day in DAY_ORDER if day in average_bounds_per_day}
-
         logger.info("Activity repartition:")
-        for day, ratio in sorted_ratio.items():
+        for day, ratio in report["activity"]["ratios"].items():
             logger.info("\t- {}: {:.1f}% of activity", day, ratio * 100)
 
         logger.info("Average active hours:")
-        for day, bounds in sorted_bounds.items():
-            lower_bound_timedelta = timedelta(seconds=bounds[0])
-            upper_bound_timedelta = timedelta(seconds=bounds[1])
+        for day, (lower_bound_time, upper_bound_time) in report["activity"]["active_hours"].items():
+            logger.info("\t- {}: from {} to {}", day, lower_bound_time, upper_bound_time)
 
-            midnight = datetime.min
-            lower_bound_time = (midnight + lower_bound_timedelta).time().strftime("%H:%M")
-            upper_bound_time = (midnight + upper_bound_timedelta).time().strftime("%H:%M")
+def main() -> None:
+    args = parser.parse_args()
+    apply_cache_switch(args)
 
-            logger.info("\t- {}: from {} to {}", day, lower_bound_time, upper_bound_time)
+    debug_level: str = args.level.upper()
+    logger.add(sys.stderr, level=debug_level)
+    logger.add(
+        args.logs_path,
+        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {name}:{function}:{line} | {message}",
+        level=debug_level
+    )
+
+    if args.serve:
+        logger.info("Targetting git host '{}' with the usernames submitted on '{}'", args.host, args.listen)
+    elif args.usernames_file:
+        logger.info("Targetting git host '{}' with the usernames of '{}'", args.host, args.usernames_file)
+    else:
+        logger.info("Targetting git host '{}' with username '{}'", args.host, args.username)
+
+    if args.host == "github":
+        from githunt.GitProviders.TokenPool import TokenPool, read_token_file
+
+        tokens: list[str] = list(args.personal_access_tokens)
+        if args.pat_file:
+            tokens.extend(read_token_file(args.pat_file))
+
+        if not tokens:
+            logger.warning("")
+            logger.warning("Not using a Personal Access Token (PAT)!")
+            logger.warning("You can generate one here: https://github.com/settings/personal-access-tokens/new")
+            logger.warning("")
+            logger.warning("This will potentially reduce the quality of the results")
+            logger.warning("You may also get rate-limited by GitHub!")
+            logger.warning("")
+            logger.warning("For security reasons, please either delete it after use, or make it temporary.")
+            logger.warning("")
+
+        blacklisted_orgs_str: str = args.blacklisted_orgs
+        blacklisted_orgs = list(map(str.strip, blacklisted_orgs_str.split(",")))
+
+        logger.debug("Blacklisted organizations: {}", blacklisted_orgs)
+
+        token_pool = TokenPool(tokens)
+        logger.debug("Using {} token(s)", len(tokens))
+
+        from githunt.GitProviders.RateLimiter import configure_rate_limiter
+        configure_rate_limiter(args.max_request_rate, args.max_concurrent_requests)
+
+        if args.api == "graphql" and not tokens:
+            logger.warning("GitHub's GraphQL API requires a Personal Access Token, falling back to the REST API")
+            args.api = "rest"
+
+        http_cache: Optional[HttpCache] = None
+        if args.use_http_cache:
+            from githunt.HttpCache import HttpCache
+            http_cache = HttpCache(args.http_cache_dir, args.http_cache_ttl, args.http_cache_size)
+
+        if args.serve:
+            run_service_mode(args, blacklisted_orgs, token_pool, http_cache)
+            return
+
+        if args.usernames_file:
+            run_batch_mode(args, blacklisted_orgs, token_pool, http_cache)
+            return
+
+        if args.api == "graphql":
+            from githunt.GitProviders.GitHubGraphQL import query_user as github_query_user
+        elif args.engine == "async":
+            try:
+                from githunt.GitProviders.GitHubAsync import query_user as github_query_user
+            except ImportError:
+                logger.warning("The asyncio engine requires httpx, falling back to the threaded engine")
+                from githunt.GitProviders.GitHub import query_user as github_query_user
+        else:
+            from githunt.GitProviders.GitHub import stream_user as github_stream_user
+
+        store = create_store(args)
+        try:
+            user: Optional[User] = None
+            repositories: Optional[Iterator[RepositoryInformation]] = None
+
+            # Emails captured by previous scans find the organization repositories committed to with them
+            known_emails = store.known_emails(args.username) if store is not None else None
+
+            query_arguments = (
+                args.username,
+                args.scan_forks,
+                args.scan_orgs,
+                blacklisted_orgs,
+                token_pool,
+                args.workers,
+                args.proxy,
+                http_cache,
+                args.fetch_repository_details
+            )
+            if args.api == "rest" and args.engine == "threads":
+                # Repositories are cloned while the next pages are still being listed
+                streamed = github_stream_user(*query_arguments, args.filter_org_repositories, known_emails=known_emails)
+                if streamed is not None:
+                    user, repositories = streamed
+            else:
+                user = github_query_user(*query_arguments, args.filter_org_repositories, known_emails=known_emails)
+
+            if user is None:
+                logger.critical("Could not query the GitHub user '{}' (user is None)", args.username)
+                exit(1)
+
+            logger.success("Data has been successfully retrieved from the git host")
+
+            visit_and_report(args, user, repositories, token_pool, store)
+        finally:
+            if store is not None:
+                store.close()
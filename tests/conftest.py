@@ -0,0 +1,8 @@
+import pytest
+
+from githunt.GitProviders.RateLimiter import configure_rate_limiter
+
+@pytest.fixture(autouse=True)
+def fast_rate_limiter():
+    # The stand-in API server has no secondary rate limits to protect
+    return configure_rate_limiter(10_000, 64)
@@ -0,0 +1,285 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from pathlib import Path
+from typing import Any, Optional
+
+import subprocess
+import hashlib
+import json
+import re
+import gzip
+import time
+import os
+
+from githunt.Classes.RepositoryInformation import RepositoryInformation
+
+def git(cwd: Path, *arguments: str, env: Optional[dict[str, str]] = None) -> str:
+    return subprocess.run(
+        ["git", *arguments],
+        cwd=cwd,
+        env={**os.environ, **(env or {})},
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout.strip()
+
+def add_commit(path: Path, name: str, email: str, date: str) -> None:
+    asset = path / f"asset_{len(list(path.glob('asset_*.bin')))}.bin"
+    asset.write_bytes(bytes(1024))
+    git(path, "add", ".")
+    git(
+        path,
+        "-c", f"user.name={name}",
+        "-c", f"user.email={email}",
+        "commit", "-q", "-m", f"add {asset.name}",
+        env={"GIT_COMMITTER_DATE": date}
+    )
+
+def make_source_repository(path: Path) -> Path:
+    path.mkdir()
+    git(path, "init", "-q")
+    git(path, "config", "uploadpack.allowFilter", "true")
+    git(path, "config", "uploadpack.allowAnySHA1InWant", "true")
+
+    for i in range(3):
+        add_commit(path, "Alice Smith", "alice@example.com", f"2024-01-0{i + 1}T10:00:00+0200")
+
+    return path
+
+def make_repository_information(source: Path, name: str = "alice/source") -> RepositoryInformation:
+    return RepositoryInformation(name, None, None, 0, 0, 0, source.resolve().as_uri())
+
+class FakeGitHub:
+    """
+    Local stand-in for the GitHub API
+
+    REST payloads are registered by path (query string included), GraphQL responses are replayed from
+    recorded exchanges, matched on the operation name and variables (repository details and contributions are answered from
+    the REST payloads and `contributors`)
+    """
+
+    def __init__(self, graphql_exchanges: Optional[list[dict]] = None) -> None:
+        self.routes: dict[str, Any] = {}
+        self.graphql_exchanges: list[dict] = graphql_exchanges or []
+        self.requests: list[tuple[str, dict[str, str]]] = []
+
+        # Path -> `Link` header of the paginated listings
+        self.links: dict[str, str] = {}
+
+        # Authorization header -> remaining rate limit budget, for the tokens which have one
+        self.token_budgets: dict[str, int] = {}
+        self.budgets_lock = Lock()
+
+        # Count of upcoming requests answered with a secondary rate limit
+        self.secondary_limits: int = 0
+
+        # Repository name -> node IDs and emails of its commit authors, which contribution checks are answered from
+        # (other repositories can't be queried)
+        self.contributors: dict[str, set[str]] = {}
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # Keep-alive
+
+            def rate_limited(self) -> bool:
+                self.rate_limit_headers: dict[str, str] = {}
+
+                authorization = self.headers.get("Authorization", "")
+                with fake.budgets_lock:
+                    if fake.secondary_limits > 0:
+                        fake.secondary_limits -= 1
+                        self.send_response(429)
+                        self.send_header("Retry-After", "1")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return True
+
+                    if authorization not in fake.token_budgets:
+                        return False
+
+                    remaining = fake.token_budgets[authorization]
+                    fake.token_budgets[authorization] = max(remaining - 1, 0)
+
+                self.rate_limit_headers = {"X-RateLimit-Remaining": str(max(remaining - 1, 0)), "X-RateLimit-Reset": str(int(time.time()) + 3600)}
+                if remaining > 0:
+                    return False
+
+                self.send_response(403)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return True
+
+            def send_response(self, code: int, message: Optional[str] = None) -> None:
+                super().send_response(code, message)
+                for name, value in self.rate_limit_headers.items():
+                    self.send_header(name, value)
+
+            def do_GET(self) -> None:
+                fake.requests.append((self.path, dict(self.headers)))
+                if self.rate_limited():
+                    return
+
+                if self.path not in fake.routes:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body = json.dumps(fake.routes[self.path]).encode()
+                etag = f'"{hashlib.sha256(body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("ETag", etag)
+                if self.path in fake.links:
+                    self.send_header("Link", fake.links[self.path])
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body)
+                    self.send_header("Content-Encoding", "gzip")
+
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self) -> None:
+                fake.requests.append((self.path, dict(self.headers)))
+                self.rate_limit_headers = {}
+
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                operation = re.match(r"\s*query\s+(\w+)", payload["query"])
+                if operation and operation.group(1) == "RepositoryContributions":
+                    response = fake.contributions_response(payload["variables"])
+                elif operation and operation.group(1) == "RepositoryDetails":
+                    response = fake.details_response(payload["variables"])
+                else:
+                    response = next(
+                        (
+                            exchange["response"] for exchange in fake.graphql_exchanges
+                            if operation and exchange["operationName"] == operation.group(1) and exchange["variables"] == payload["variables"]
+                        ),
+                        {"errors": [{"message": f"No recorded exchange for {payload['variables']}"}]}
+                    )
+
+                body = json.dumps(response).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+
+    def contributions_response(self, variables: dict) -> dict:
+        data: dict[str, Any] = {}
+        i = 0
+        while f"owner{i}" in variables:
+            name = f"{variables[f'owner{i}']}/{variables[f'name{i}']}"
+            if name not in self.contributors:
+                data[f"repo{i}"] = None
+            else:
+                authors = self.contributors[name]
+                commit = {"byAccount": {"nodes": [{"oid": "0" * 40}] if variables["author"] in authors else []}}
+                if "emails" in variables:
+                    commit["byEmail"] = {"nodes": [{"oid": "0" * 40}] if authors & set(variables["emails"]) else []}
+                data[f"repo{i}"] = {"defaultBranchRef": {"target": commit}}
+            i += 1
+
+        return {"data": data}
+
+    def details_response(self, variables: dict) -> dict:
+        data: dict[str, Any] = {}
+        i = 0
+        while f"owner{i}" in variables:
+            repo_info = self.routes.get(f"/repos/{variables[f'owner{i}']}/{variables[f'name{i}']}")
+            data[f"repo{i}"] = repo_info and {
+                "nameWithOwner": repo_info["full_name"],
+                "description": repo_info["description"],
+                "homepageUrl": repo_info["homepage"],
+                "isFork": repo_info["fork"],
+                "stargazerCount": repo_info["stargazers_count"],
+                "forkCount": repo_info["forks_count"],
+                "watchers": {"totalCount": repo_info["watchers_count"]},
+                "url": repo_info["clone_url"].removesuffix(".git"),
+                "diskUsage": repo_info["size"],
+                "pushedAt": repo_info["pushed_at"],
+            }
+            i += 1
+
+        return {"data": data}
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def add_user(self, login: str, repository_count: int, organizations: dict[str, int], missing_fields: tuple[str, ...] = ()) -> None:
+        self.routes[f"/users/{login}"] = {
+            "id": 1001,
+            "node_id": f"U_{login}",
+            "login": login,
+            "name": None,
+            "bio": None,
+            "location": None,
+            "blog": "",
+            "email": None,
+            "followers": 0,
+            "following": 0,
+            "public_repos": repository_count,
+            "repos_url": self.add_repositories(login, repository_count, missing_fields=missing_fields),
+            "organizations_url": f"{self.url}/users/{login}/orgs",
+        }
+
+        self.routes[f"/users/{login}/orgs"] = [
+            {"login": organization, "repos_url": self.add_repositories(organization, count, "orgs", missing_fields)}
+            for organization, count in organizations.items()
+        ]
+
+    def add_repositories(self, owner: str, count: int, owner_kind: str = "users", missing_fields: tuple[str, ...] = ()) -> str:
+        repos_path = f"/{owner_kind}/{owner}/repos"
+        listing = []
+        for i in range(count):
+            name = f"{owner}/repo{i}"
+            repo_info = {
+                "full_name": name,
+                "description": None,
+                "fork": False,
+                "url": f"{self.url}/repos/{name}",
+                "homepage": "",
+                "stargazers_count": i,
+                "forks_count": 0,
+                "watchers_count": i,
+                "clone_url": f"https://example.com/{name}.git",
+                "size": 100 + i,
+                "pushed_at": "2024-01-03T08:00:00Z",
+            }
+
+            self.routes[f"/repos/{name}"] = {**repo_info, "homepage": f"https://{owner}.example.com/{i}"}
+            listing.append({field: value for field, value in repo_info.items() if field not in missing_fields})
+
+        page_count = count // 100 + 1
+        for page in range(1, page_count + 1):
+            page_path = f"{repos_path}?per_page=100&page={page}&type=owner"
+            self.routes[page_path] = listing[(page - 1) * 100:page * 100]
+            if page_count > 1:
+                self.links[page_path] = f'<{self.url}{repos_path}?per_page=100&page={page_count}&type=owner>; rel="last"'
+
+        return f"{self.url}{repos_path}"
+
+    def __enter__(self) -> FakeGitHub:
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,62 @@
+from pathlib import Path
+from io import StringIO
+
+import pytest
+import json
+
+from githunt.Batch import read_usernames, run_batch
+from githunt.Classes.ScanOptions import ScanOptions
+from githunt.GitProviders.TokenPool import TokenPool
+from githunt.RepositoriesVisitor import RepositoryPipeline
+from githunt.Scanner import Scanner
+
+from tests.helpers import FakeGitHub, make_source_repository, make_repository_information
+
+def test_read_usernames_skips_blanks_comments_and_duplicates(tmp_path: Path) -> None:
+    usernames_file = tmp_path / "usernames.txt"
+    usernames_file.write_text("alice\n\n# watchlist\n  bob \nalice\n")
+
+    assert read_usernames(str(usernames_file)) == ["alice", "bob"]
+
+def test_shared_repository_is_extracted_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    source = make_source_repository(tmp_path / "source")
+
+    with FakeGitHub() as github:
+        github.add_user("alice", 0, {"acme": 1})
+        github.add_user("bob", 0, {"acme": 1})
+        github.routes["/orgs/acme/repos?per_page=100&page=1&type=owner"][0]["clone_url"] = source.resolve().as_uri()
+
+        options = ScanOptions(False, True, [], False, True, False, 5, True, False, 2, None)
+        scanner = Scanner(options, TokenPool(["token"]), api_url=github.url)
+        output = StringIO()
+
+        try:
+            failures = run_batch(scanner, ["alice", "bob", "ghost"], output, 2)
+        finally:
+            scanner.close()
+
+    reports = {report["username"]: report for report in map(json.loads, output.getvalue().splitlines())}
+    assert failures == 1
+    assert reports["ghost"]["error"] == "user not found"
+    assert reports["alice"]["repository_count"] == reports["bob"]["repository_count"] == 1
+    assert "alice@example.com" in reports["alice"]["emails"] and reports["alice"]["timestamp_count"] == 3
+    assert "alice@example.com" not in reports["bob"]["emails"] and reports["bob"]["timestamp_count"] == 0
+
+    assert list(scanner.pipeline.summaries) == ["acme/repo0"]
+    assert not list(tmp_path.glob("gitrepos_*"))
+
+def test_pipeline_forgets_least_recently_used_summaries(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    first = make_repository_information(make_source_repository(tmp_path / "first"), "alice/first")
+    second = make_repository_information(make_source_repository(tmp_path / "second"), "alice/second")
+    third = make_repository_information(make_source_repository(tmp_path / "third"), "alice/third")
+    pipeline = RepositoryPipeline(1, max_summaries=2)
+
+    try:
+        for repo_info in (first, second, first, third):
+            assert pipeline.submit(repo_info).result().commit_count == 3
+
+        assert list(pipeline.summaries) == ["alice/first", "alice/third"]
+    finally:
+        pipeline.close()
@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import multiprocessing
+
+from githunt.CloneCache import CloneCache, lock_file
+from githunt.RepositoriesVisitor import RepositoryPipeline, extract_identities
+
+from tests.helpers import add_commit, make_source_repository, make_repository_information
+
+def test_cached_clone_is_fetched_incrementally(tmp_path: Path) -> None:
+    source = make_source_repository(tmp_path / "source")
+    repo_info = make_repository_information(source)
+    cache = CloneCache(str(tmp_path / "cache"))
+
+    first = cache.acquire(repo_info)
+    assert first is not None
+    cache.release_all()
+
+    add_commit(source, "Alice Smith", "alice@example.com", "2024-01-04T10:00:00+0200")
+
+    second = cache.acquire(repo_info)
+    assert second is not None
+    assert second[0] == first[0]
+    assert cache.acquire(repo_info) == second # Acquiring twice in a run must not deadlock
+
+    identities = extract_identities(second[0], repo_info)
+    assert identities[("Alice Smith", "alice@example.com")].commit_count == 4
+    cache.release_all()
+
+def test_eviction_skips_entries_in_use(tmp_path: Path) -> None:
+    first_info = make_repository_information(make_source_repository(tmp_path / "first"))
+    second_info = make_repository_information(make_source_repository(tmp_path / "second"))
+    cache = CloneCache(str(tmp_path / "cache"), max_size_mb=0)
+
+    first = cache.acquire(first_info)
+    assert first is not None
+    cache.release_all()
+
+    second = cache.acquire(second_info)
+    assert second is not None
+
+    cache.evict()
+    assert not Path(first[0]).exists()
+    assert Path(second[0]).exists()
+
+    cache.release_all()
+    cache.evict()
+    assert not Path(second[0]).exists()
+
+def scan_in_order(cache_root: str, sources: list[str], barrier) -> None:
+    pipeline = RepositoryPipeline(1, CloneCache(cache_root))
+    try:
+        for i, source in enumerate(sources):
+            repo_info = make_repository_information(Path(source), f"alice/{Path(source).name}")
+            assert pipeline.submit(repo_info).result().commit_count == 3
+            if i == 0:
+                barrier.wait(timeout=60) # Each run now holds (or held) the entry the other one needs next
+    finally:
+        pipeline.close()
+
+def test_concurrent_runs_in_opposite_orders_do_not_deadlock(tmp_path: Path) -> None:
+    first = str(make_source_repository(tmp_path / "first"))
+    second = str(make_source_repository(tmp_path / "second"))
+    cache_root = str(tmp_path / "cache")
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(2)
+    runs = [
+        context.Process(target=scan_in_order, args=(cache_root, [first, second], barrier)),
+        context.Process(target=scan_in_order, args=(cache_root, [second, first], barrier))
+    ]
+    for run in runs:
+        run.start()
+
+    for run in runs:
+        run.join(timeout=120)
+    for run in runs:
+        if run.is_alive():
+            run.kill()
+
+    assert [run.exitcode for run in runs] == [0, 0]
+
+def test_extracted_entry_is_released_while_the_pipeline_runs(tmp_path: Path) -> None:
+    repo_info = make_repository_information(make_source_repository(tmp_path / "source"))
+    cache = CloneCache(str(tmp_path / "cache"))
+    pipeline = RepositoryPipeline(1, cache)
+
+    try:
+        assert pipeline.submit(repo_info).result().commit_count == 3
+
+        # Not even the extraction workers may still hold the entry's lock
+        with open(cache.lock_path(cache.key_for(repo_info.git_url)), "a") as handle:
+            assert lock_file(handle, exclusive=True, blocking=False)
+    finally:
+        pipeline.close()
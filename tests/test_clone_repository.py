@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from githunt.RepositoriesVisitor import clone_repository, extract_identities
+
+from tests.helpers import git, make_source_repository, make_repository_information
+
+def test_clone_is_bare_and_filtered(tmp_path: Path) -> None:
+    source = make_source_repository(tmp_path / "source")
+    clones = tmp_path / "clones"
+    clones.mkdir()
+
+    result = clone_repository(make_repository_information(source), str(clones))
+    assert result is not None
+
+    repo_path = Path(result[0])
+    assert git(repo_path, "rev-parse", "--is-bare-repository") == "true"
+    assert git(repo_path, "config", "remote.origin.partialclonefilter") == "tree:0"
+    assert not any(repo_path.glob("asset_*.bin"))
+
+    identities = extract_identities(str(repo_path), result[1])
+    identity = identities[("Alice Smith", "alice@example.com")]
+    assert identity.commit_count == 3
+    assert sorted(timestamp.isoformat() for timestamp in identity.timestamps) == [
+        "2024-01-01T10:00:00+02:00",
+        "2024-01-02T10:00:00+02:00",
+        "2024-01-03T10:00:00+02:00",
+    ]
+
+def test_clone_falls_back_to_blobless_filter(tmp_path: Path) -> None:
+    source = make_source_repository(tmp_path / "source")
+    git(source, "config", "uploadpackfilter.tree.allow", "false")
+    clones = tmp_path / "clones"
+    clones.mkdir()
+
+    result = clone_repository(make_repository_information(source), str(clones))
+    assert result is not None
+
+    repo_path = Path(result[0])
+    assert git(repo_path, "config", "remote.origin.partialclonefilter") == "blob:none"
+    assert len(extract_identities(str(repo_path), result[1])) == 1
@@ -0,0 +1,20 @@
+import random
+import pytest
+
+from githunt.Analysis.CountryScoring import count_country_hits_numpy, count_country_hits_python
+
+def test_numpy_hits_match_python_hits() -> None:
+    numpy = pytest.importorskip("numpy")
+
+    generator = random.Random(0)
+    tz_names = [f"Zone/{i}" for i in range(40)]
+    country_tzs = {f"C{i}": generator.sample(tz_names, generator.randint(1, 6)) for i in range(25)}
+
+    candidate_lists = [generator.sample(tz_names, generator.randint(0, 8)) + ["Not/AZone"] for _ in range(50)]
+    timestamp_to_tz_candidates = [generator.choice(candidate_lists) for _ in range(1000)]
+
+    tz_local_hours = {tz_name: [generator.randint(-1, 23) for _ in range(1000)] for tz_name in tz_names[:-1]} # The last zone has no local hours
+    numpy_local_hours = {tz_name: numpy.array(hours, dtype=numpy.int8) for tz_name, hours in tz_local_hours.items()}
+
+    assert count_country_hits_numpy(country_tzs, timestamp_to_tz_candidates, numpy_local_hours) == \
+        count_country_hits_python(country_tzs, timestamp_to_tz_candidates, tz_local_hours)
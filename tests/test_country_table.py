@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from githunt.Analysis import CountryTable
+from githunt.Analysis.CountryTable import load_country_table
+
+def test_table_is_built_and_loaded_from_disk_cache(tmp_path: Path, monkeypatch) -> None:
+    cache_path = tmp_path / "country_table.pickle"
+    monkeypatch.setattr(CountryTable, "country_table", None)
+    built_table = load_country_table(str(cache_path))
+    assert cache_path.exists()
+
+    france = built_table.countries["FR"]
+    assert (france.name, france.flag) == ("France", "🇫🇷")
+    assert france.population and france.population > 0
+    assert "Europe/Paris" in france.timezones
+    assert built_table.tz_to_countries["Europe/Paris"] == ["FR"]
+
+    monkeypatch.setattr(CountryTable, "country_table", None)
+    monkeypatch.setattr(CountryTable.CountryTable, "build", None) # Any rebuild would now fail
+    loaded_table = load_country_table(str(cache_path))
+
+    assert loaded_table is not built_table
+    assert loaded_table.countries == built_table.countries
+    assert loaded_table.tz_to_countries == built_table.tz_to_countries
@@ -0,0 +1,61 @@
+import pytest
+
+from githunt.Classes.Alias import Alias
+from githunt.Classes.User import User
+from githunt.Utils import matching_substrings, names_equivalent_guess
+
+NAMES = [
+    "alice", "ALICE", "  Alice  ", "ali", "lic", "alice-dev", "malice",
+    "Alice Smith", "alice   smith", " ALICE SMITH ", "Alice B. Smith", "Alice Jones", "Alison Smith", "Bob Smith", "Smith Alice",
+    "Alice", "Smith", "A Smith", "ice sm", "", "Bob",
+]
+
+@pytest.fixture
+def user() -> User:
+    return User(1001, "alice", "Alice Smith", None, None, None, None, 0, 0, 0)
+
+def test_aliases_are_matched_whatever_their_case_and_surrounding_whitespace(user: User) -> None:
+    git_data = user.git_data
+    assert git_data.add_alias(Alias("Ally Smith", is_main=False, is_signed=False))
+    assert not git_data.add_alias(Alias("Ally Smith", is_main=False, is_signed=True)) # Already known
+
+    for name in ["Ally Smith", "ally smith", "  ALLY SMITH\t", "alice", "ALICE "]:
+        # As compared by the linear scan: `alias.name.strip().lower() == name.strip().lower()`
+        assert git_data.matches_alias_name(name) == any(alias.name.strip().lower() == name.strip().lower() for alias in git_data.aliases) == True
+
+    assert not git_data.matches_alias_name("ally  smith") # Inner whitespace is kept
+    assert not git_data.matches_alias_name("Ally")
+
+    # Lookups by exact name, like `next(alias for alias in aliases if alias.name == name)`
+    assert git_data.get_alias("Ally Smith") is git_data.aliases[1]
+    assert git_data.get_alias("ally smith") is None
+    assert git_data.main_alias.name == "alice" and git_data.main_alias.is_main
+
+def test_emails_are_matched_on_their_stripped_value(user: User) -> None:
+    git_data = user.git_data
+    assert git_data.add_email(" alice@example.com")
+    assert not git_data.add_email(" alice@example.com")
+
+    for email in ["alice@example.com", "alice@example.com  ", "1001+alice@users.noreply.github.com"]:
+        assert git_data.matches_email(email)
+
+    # Emails are case sensitive, as they were compared
+    assert not git_data.matches_email("Alice@example.com")
+    assert git_data.emails == {"1001+alice@users.noreply.github.com", " alice@example.com"}
+
+@pytest.mark.parametrize("name", NAMES)
+def test_user_name_guesses_match_the_heuristics(user: User, name: str) -> None:
+    expected = any(
+        names_equivalent_guess(user_name, name) or matching_substrings(user_name, name)
+        for user_name in (user.name, user.displayname)
+    )
+    assert user.git_data.matches_user_name_guess(name) == expected
+
+def test_user_name_guesses(user: User) -> None:
+    git_data = user.git_data
+    assert git_data.matches_user_name_guess("alice   smith") # Same tokens
+    assert git_data.matches_user_name_guess("Alice B. Smith") # Same first and last tokens
+    assert git_data.matches_user_name_guess("malice") # Contains the username
+    assert git_data.matches_user_name_guess("ice sm") # Contained in the display name
+    assert not git_data.matches_user_name_guess("Alison Smith")
+    assert not git_data.matches_user_name_guess("A Smith")
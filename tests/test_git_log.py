@@ -0,0 +1,96 @@
+from datetime import timedelta
+from pathlib import Path
+from threading import Thread
+from typing import Optional
+
+import pytest
+import subprocess
+
+from githunt import GitLog
+from githunt.GitLog import iter_commit_records
+
+from tests.helpers import git
+
+SIGNATURE = b"""gpgsig -----BEGIN PGP SIGNATURE-----
+
+ iQEzBAABCAAdFiEEexample0signature0lines0author Mallory <m@example.com> 1 +0000
+ =abcd
+ -----END PGP SIGNATURE-----"""
+
+MERGETAG = b"""mergetag object 0123456789012345678901234567890123456789
+ type commit
+ tag v1.0
+ tagger Mallory <mallory@example.com> 1700000000 +0000
+
+ Release v1.0"""
+
+def hash_object(path: Path, object_type: str, content: bytes) -> bytes:
+    return subprocess.run(["git", "hash-object", "-t", object_type, "-w", "--stdin"], cwd=path, input=content, check=True, capture_output=True).stdout.strip()
+
+def write_commit(path: Path, parents: list[str], author: bytes, committer: bytes, message: bytes, headers: Optional[list[bytes]] = None) -> str:
+    lines = [b"tree " + hash_object(path, "tree", b""), *(b"parent " + parent.encode() for parent in parents), b"author " + author, b"committer " + committer, *(headers or [])]
+    return hash_object(path, "commit", b"\n".join(lines) + b"\n\n" + message + b"\n").decode()
+
+@pytest.fixture
+def history(tmp_path: Path) -> tuple[Path, dict[str, str]]:
+    path = tmp_path / "history"
+    path.mkdir()
+    git(path, "init", "-q")
+
+    shas: dict[str, str] = {}
+    shas["root"] = write_commit(path, [], b"Alice Smith <alice@example.com> 1700000000 +1400", b"Alice Smith <alice@example.com> 1700000000 +1400", b"root")
+    shas["signed"] = write_commit(
+        path, [shas["root"]],
+        b"Alice Smith <alice@example.com> 1700000100 +0000", b"Alice Smith <alice@example.com> 1700000100 -1200",
+        b"signed",
+        [SIGNATURE]
+    )
+    shas["branch"] = write_commit(path, [shas["root"]], b"Bob <bob@example.com> 1700000200 +0100", b"Bob <bob@example.com> 1700000200 +0100", b"branch")
+    shas["merge"] = write_commit(
+        path, [shas["signed"], shas["branch"]],
+        b"Alice Smith <alice@example.com> 1700000300 +0200", b"Alice Smith <alice@example.com> 1700000300 +0200",
+        b"Merge tag 'v1.0'\n\nauthor Mallory <mallory@example.com> 1 +0000\ncommitter Mallory <mallory@example.com> 1 +0000\n\\0 ^@ \\x00\n\ngpgsig not a signature",
+        [MERGETAG]
+    )
+    shas["anonymous"] = write_commit(path, [shas["merge"]], b" <anon@example.com> 1700000400 -0330", b" <anon@example.com> 1700000400 -0330", b"anonymous")
+    shas["nameless"] = write_commit(path, [shas["anonymous"]], b"<nameless@example.com> 1700000500 +0000", b"<nameless@example.com> 1700000500 +0000", b"nameless")
+
+    git(path, "update-ref", "HEAD", shas["nameless"])
+    return path, shas
+
+def test_raw_headers_are_parsed(history: tuple[Path, dict[str, str]]) -> None:
+    path, shas = history
+    records = {record.sha: record for record in iter_commit_records(str(path))}
+    assert sorted(records) == sorted(shas.values())
+
+    root, signed, branch, merge, anonymous, nameless = (records[shas[name]] for name in ("root", "signed", "branch", "merge", "anonymous", "nameless"))
+
+    assert [record.is_signed for record in (root, signed, branch, merge, anonymous, nameless)] == [False, True, False, False, False, False]
+
+    # Neither the mergetag's tagger nor the message's `author` lines are taken for the author
+    assert (merge.author_name, merge.author_email) == ("Alice Smith", "alice@example.com")
+    assert (branch.author_name, branch.author_email) == ("Bob", "bob@example.com")
+    assert (anonymous.author_name, anonymous.author_email) == ("", "anon@example.com")
+    assert (nameless.author_name, nameless.author_email) == ("", "nameless@example.com")
+
+    assert root.committed_datetime.utcoffset() == timedelta(hours=14)
+    assert signed.committed_datetime.utcoffset() == timedelta(hours=-12)
+    assert anonymous.committed_datetime.utcoffset() == -timedelta(hours=3, minutes=30)
+    assert root.committed_datetime.timestamp() == 1700000000
+
+def test_incremental_walk_stops_at_the_known_commit(history: tuple[Path, dict[str, str]]) -> None:
+    path, shas = history
+    assert sorted(record.sha for record in iter_commit_records(str(path), shas["merge"])) == sorted([shas["anonymous"], shas["nameless"]])
+
+def test_verbose_stderr_does_not_block_the_stream(history: tuple[Path, dict[str, str]], monkeypatch: pytest.MonkeyPatch) -> None:
+    path, _ = history
+    # Far more than a pipe buffer is written to stderr before anything reaches stdout
+    monkeypatch.setattr(GitLog, "GIT_LOG_COMMAND", ["sh", "-c", 'head -c 1048576 /dev/zero >&2; exec git log "$@"', "git", *GitLog.GIT_LOG_COMMAND[2:]])
+
+    records: list = []
+    reader = Thread(target=lambda: records.extend(iter_commit_records(str(path))), daemon=True)
+    reader.start()
+    reader.join(timeout=60)
+
+    assert not reader.is_alive()
+    assert len(records) == 6
@@ -0,0 +1,85 @@
+from pathlib import Path
+from typing import Optional
+
+import pytest
+import asyncio
+
+from githunt.GitProviders.GitHub import last_page_number, query_user as query_user_threads
+from githunt.HttpCache import HttpCache
+from githunt.GitProviders.TokenPool import TokenPool
+
+from tests.helpers import FakeGitHub
+
+@pytest.mark.parametrize("fetch_details", [False, True])
+def test_async_engine_matches_threaded_engine(fetch_details: bool) -> None:
+    pytest.importorskip("httpx")
+    from githunt.GitProviders.GitHubAsync import query_user as query_user_async
+
+    with FakeGitHub() as github:
+        github.add_user("alice", 120, {"acme": 30, "blocked": 5, "initech": 0}, ("homepage",))
+        del github.routes["/repos/acme/repo3"] # Its detail request fails
+
+        users = [
+            query_user(
+                "alice", False, True, ["blocked"], TokenPool(["token"]), 4,
+                fetch_details=fetch_details,
+                api_url=github.url
+            )
+            for query_user in (query_user_threads, query_user_async)
+        ]
+
+    threaded_user, async_user = users
+    assert threaded_user is not None and async_user is not None
+    assert async_user.name == threaded_user.name == "alice"
+
+    assert len(async_user.repositories) == 150
+    # Pages and organizations are listed concurrently, so the order of the repositories isn't deterministic
+    assert sorted((repo.__dict__ for repo in async_user.repositories), key=lambda repo: repo["name"]) == \
+        sorted((repo.__dict__ for repo in threaded_user.repositories), key=lambda repo: repo["name"])
+
+def test_async_engine_filters_org_repositories_like_threaded_engine() -> None:
+    pytest.importorskip("httpx")
+    from githunt.GitProviders.GitHubAsync import query_user as query_user_async
+
+    with FakeGitHub() as github:
+        github.add_user("alice", 3, {"acme": 10})
+        for i in range(0, 10, 2):
+            github.contributors[f"acme/repo{i}"] = set()
+
+        users = [
+            query_user("alice", False, True, [], TokenPool(["token"]), 4, filter_org_repositories=True, api_url=github.url)
+            for query_user in (query_user_threads, query_user_async)
+        ]
+
+    for user in users:
+        assert user is not None
+        assert sorted(repo.name for repo in user.repositories) == sorted([f"alice/repo{i}" for i in range(3)] + [f"acme/repo{i}" for i in range(1, 10, 2)])
+
+def test_async_engine_fetches_pages_concurrently(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("httpx")
+    from githunt.GitProviders import GitHubAsync
+
+    page_counts: list[Optional[int]] = []
+
+    def recorded_last_page_number(links, repository_count=None):
+        page_counts.append(last_page_number(links, repository_count))
+        return page_counts[-1]
+
+    monkeypatch.setattr(GitHubAsync, "last_page_number", recorded_last_page_number)
+
+    async def scan(repos_url: str, cache: HttpCache) -> list[str]:
+        api = GitHubAsync.AsyncGitHubClient(4, TokenPool(["token"]), http_cache=cache)
+        try:
+            return [repo.name for repo in await GitHubAsync.scan_repositories(api, repos_url, False, False)]
+        finally:
+            await api.close()
+
+    cache = HttpCache(str(tmp_path))
+    with FakeGitHub() as github:
+        repos_url = github.add_repositories("acme", 350, "orgs")
+        for _ in range(2):
+            assert sorted(asyncio.run(scan(repos_url, cache))) == sorted(f"acme/repo{i}" for i in range(350))
+
+    # Pages 2 to 4 are requested at once, from the `Link` header of the first page (kept by the cache on the second scan)
+    assert page_counts == [4, 4]
+    assert len(github.requests) == 8 and cache.revalidated == 4
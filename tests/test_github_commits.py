@@ -0,0 +1,102 @@
+from pathlib import Path
+
+import pytest
+
+from githunt.Classes.User import User
+from githunt.GitProviders.GitHub import create_session
+from githunt.GitProviders.GitHubCommits import DEFAULT_MIN_SIZE_MB, ApiCommitSource, create_commit_source
+from githunt.GitProviders.TokenPool import TokenPool
+from githunt.RepositoriesVisitor import RepositoryPipeline
+
+from tests.helpers import FakeGitHub, add_commit, git, make_source_repository, make_repository_information
+
+AUTHOR_ID = "MDQ6VXNlcjEwMDE="
+
+def commit_node(sha: str, date: str) -> dict:
+    return {
+        "oid": sha,
+        "author": {"name": "Alice Smith", "email": "alice@users.noreply.github.com"},
+        "committer": {"date": date},
+        "signature": None
+    }
+
+def history_exchange(cursor, nodes: list[dict], end_cursor) -> dict:
+    return {
+        "operationName": "RepositoryCommits",
+        "variables": {"owner": "alice", "name": "source", "author": AUTHOR_ID, "cursor": cursor},
+        "response": {"data": {"repository": {"defaultBranchRef": {"target": {"history": {
+            "pageInfo": {"hasNextPage": end_cursor is not None, "endCursor": end_cursor},
+            "nodes": nodes
+        }}}}}}
+    }
+
+def summarize(github: FakeGitHub, source: Path, size_kb: int):
+    repo_info = make_repository_information(source)
+    repo_info.size_kb = size_kb
+    session, _ = create_session(1)
+    commit_source = ApiCommitSource(session, TokenPool(["token"]), AUTHOR_ID, 1, f"{github.url}/graphql")
+
+    pipeline = RepositoryPipeline(1)
+    try:
+        return pipeline.submit(repo_info, commit_source).result()
+    finally:
+        pipeline.close()
+        session.close()
+
+def test_large_repository_is_read_from_the_api(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    exchanges = [
+        history_exchange(None, [commit_node("a" * 40, "2024-02-01T09:00:00+09:00")], "c1"),
+        history_exchange("c1", [commit_node("b" * 40, "2024-02-02T09:00:00-03:00")], None)
+    ]
+
+    with FakeGitHub(exchanges) as github:
+        summary = summarize(github, tmp_path / "missing", 4096) # Nothing to clone: the commits can only come from the API
+
+    identity = summary.identities[("Alice Smith", "alice@users.noreply.github.com")]
+    assert summary.commit_count == identity.commit_count == 2
+    assert sorted(timestamp.isoformat() for timestamp in identity.timestamps) == ["2024-02-01T09:00:00+09:00", "2024-02-02T09:00:00-03:00"]
+    assert len(github.requests) == 2
+
+def test_small_or_failing_repository_is_cloned(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    source = make_source_repository(tmp_path / "source")
+
+    with FakeGitHub() as github:
+        assert summarize(github, source, 16).commit_count == 3
+        assert len(github.requests) == 0
+
+        assert summarize(github, source, 4096).commit_count == 3 # No recorded exchange: the query fails
+        assert len(github.requests) == 1
+
+def test_commit_source_needs_a_token_and_a_node_id() -> None:
+    user = User(1001, "alice", "alice", None, None, None, None, 0, 0, 0, AUTHOR_ID)
+
+    assert create_commit_source(TokenPool([]), user) is None
+    assert create_commit_source(TokenPool(["token"]), User(1001, "alice", "alice", None, None, None, None, 0, 0, 0)) is None
+
+    commit_source = create_commit_source(TokenPool(["token"]), user)
+    assert commit_source is not None
+    assert commit_source.min_size_kb == DEFAULT_MIN_SIZE_MB * 1024
+    commit_source.session.close()
+
+def test_api_summary_matches_the_clone_for_linked_commits_only(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    source = make_source_repository(tmp_path / "source")
+    add_commit(source, "A. Smith", "alice@old-job.example.com", "2024-01-04T10:00:00-0500") # Under an email not linked to the account
+
+    # GitHub only lists the commits linked to the account
+    log = git(source, "log", "--author=alice@example.com", "--format=%H%x00%cI").splitlines()
+    nodes = [{**commit_node(sha, date), "author": {"name": "Alice Smith", "email": "alice@example.com"}} for sha, date in (line.split("\0") for line in log)]
+
+    with FakeGitHub([history_exchange(None, nodes, None)]) as github:
+        cloned = summarize(github, source, 16)
+        ingested = summarize(github, tmp_path / "missing", 4096)
+
+    linked = ("Alice Smith", "alice@example.com")
+    assert sorted(cloned.identities) == [("A. Smith", "alice@old-job.example.com"), linked]
+    assert sorted(ingested.identities) == [linked]
+
+    assert ingested.identities[linked].commit_count == cloned.identities[linked].commit_count == 3
+    assert sorted(ingested.identities[linked].timestamps) == sorted(cloned.identities[linked].timestamps)
+    assert (cloned.commit_count, ingested.commit_count) == (4, 3)
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import json
+
+from githunt.GitProviders.GitHubGraphQL import query_user
+from githunt.GitProviders.TokenPool import TokenPool
+
+from tests.helpers import FakeGitHub
+
+EXCHANGES_PATH = Path(__file__).parent / "fixtures" / "github_graphql.json"
+
+def test_query_user_from_recorded_exchanges() -> None:
+    with FakeGitHub(json.loads(EXCHANGES_PATH.read_text())) as github:
+        user = query_user("Alice", False, True, ["blocked"], TokenPool(["token"]), 4, graphql_url=f"{github.url}/graphql")
+
+    assert user is not None
+    assert (user.id, user.name, user.displayname, user.location, user.email) == (1001, "alice", "Alice Smith", "Paris", None)
+    assert (user.followers, user.following) == (12, 3)
+
+    repositories = {repo.name: repo for repo in user.repositories}
+    assert sorted(repositories) == ["acme/api", "acme/web", "alice/dotfiles", "alice/engine"]
+
+    engine = repositories["alice/engine"]
+    assert (engine.stars, engine.forks, engine.watchers, engine.size_kb) == (42, 1, 42, 2048)
+    assert engine.home_link == "https://engine.example.com"
+    assert engine.git_url == "https://github.com/alice/engine.git"
+    assert repositories["alice/dotfiles"].home_link is None
+
+    # One query for the profile, one for the second page of repositories, two for the organizations' repositories
+    assert len(github.requests) == 4
+    assert all(headers["Authorization"] == "token token" for _, headers in github.requests)
+
+def test_query_user_filters_org_repositories() -> None:
+    with FakeGitHub(json.loads(EXCHANGES_PATH.read_text())) as github:
+        github.contributors = {"acme/api": {"MDQ6VXNlcjEwMDE="}, "acme/web": set()}
+        user = query_user("Alice", False, True, ["blocked"], TokenPool(["token"]), 4, filter_org_repositories=True, graphql_url=f"{github.url}/graphql")
+
+    assert user is not None
+    assert sorted(repo.name for repo in user.repositories) == ["acme/api", "alice/dotfiles", "alice/engine"]
@@ -0,0 +1,196 @@
+import pytest
+
+from githunt.Classes.RepositoryInformation import RepositoryInformation
+from githunt.Classes.User import User
+from githunt.GitProviders.GitHub import PAGE_SIZE, create_session, merge_iterators, opened_connections, scan_repositories, stream_user
+from githunt.GitProviders import GitHubGraphQL
+from githunt.GitProviders.TokenPool import TokenPool
+from githunt.RepositoriesVisitor import visit_repositories
+
+from tests.helpers import FakeGitHub
+
+def test_scan_builds_repositories_from_list_pages() -> None:
+    with FakeGitHub() as github:
+        repos_url = github.add_repositories("alice", 150)
+
+        session, stats = create_session(workers=4)
+        with session:
+            repositories = scan_repositories(session, repos_url, False, TokenPool(["token"]), 4)
+
+        assert sorted(repo.stars for repo in repositories) == list(range(150))
+        assert all(repo.home_link is None and repo.size_kb == 100 + repo.stars for repo in repositories)
+        assert stats.request_count == 2
+
+def test_detail_fetch_reuses_pooled_connections() -> None:
+    with FakeGitHub() as github:
+        repos_url = github.add_repositories("alice", 30, missing_fields=("homepage",))
+
+        session, stats = create_session(workers=4)
+        with session:
+            repositories = scan_repositories(session, repos_url, False, TokenPool(["token"]), 4, fetch_details=True)
+
+            assert sorted(repo.home_link for repo in repositories) == sorted(f"https://alice.example.com/{i}" for i in range(30))
+            assert stats.request_count == 31
+            assert stats.status_counts == {200: 31}
+            assert 1 <= opened_connections(session) <= 4
+
+        assert all(headers["Authorization"] == "token token" for _, headers in github.requests)
+        assert all(headers["Accept-Encoding"] == "gzip" for _, headers in github.requests)
+
+def test_details_are_only_fetched_for_missing_fields() -> None:
+    with FakeGitHub() as github:
+        repos_url = github.add_repositories("alice", 3)
+        incomplete_url = github.add_repositories("acme", 3, "orgs", missing_fields=("homepage", "size"))
+        del github.routes["/repos/acme/repo1"] # Its detail request fails
+
+        session, stats = create_session(workers=4)
+        with session:
+            assert all(repo.home_link is None for repo in scan_repositories(session, repos_url, False, TokenPool(["token"]), 4, fetch_details=True))
+            assert stats.request_count == 1
+
+            repositories = {repo.name: repo for repo in scan_repositories(session, incomplete_url, False, TokenPool(["token"]), 4, fetch_details=True)}
+
+        assert sorted(repositories) == ["acme/repo0", "acme/repo1", "acme/repo2"]
+        assert repositories["acme/repo1"].home_link is None and repositories["acme/repo1"].size_kb is None
+        assert repositories["acme/repo2"].home_link == "https://acme.example.com/2" and repositories["acme/repo2"].size_kb == 102
+        assert stats.request_count == 5
+
+def test_details_are_batched_through_graphql() -> None:
+    with FakeGitHub() as github:
+        repos_url = github.add_repositories("alice", 150, missing_fields=("homepage", "stargazers_count", "clone_url"))
+        del github.routes["/repos/alice/repo7"] # Can't be queried
+
+        session, _ = create_session(workers=4)
+        with session:
+            repositories = {repo.name: repo for repo in scan_repositories(session, repos_url, False, TokenPool(["token"]), 4, True, 150, f"{github.url}/graphql")}
+
+        assert len(repositories) == 150
+        assert repositories["alice/repo8"].home_link == "https://alice.example.com/8" and repositories["alice/repo8"].stars == 8
+        assert repositories["alice/repo8"].git_url == "https://example.com/alice/repo8.git"
+
+        # Built from its list entry
+        assert repositories["alice/repo7"].home_link is None and repositories["alice/repo7"].stars == 0
+
+        assert sorted(path for path, _ in github.requests) == ["/graphql", "/graphql", "/users/alice/repos?per_page=100&page=1&type=owner", "/users/alice/repos?per_page=100&page=2&type=owner"]
+
+def test_list_entries_missing_fields_are_still_listed() -> None:
+    with FakeGitHub() as github:
+        repos_url = github.add_repositories("alice", 3, missing_fields=("stargazers_count", "forks_count", "watchers_count", "clone_url", "fork"))
+
+        session, _ = create_session(workers=4)
+        with session:
+            repositories = scan_repositories(session, repos_url, False, TokenPool(["token"]), 4)
+
+        assert sorted(repo.name for repo in repositories) == ["alice/repo0", "alice/repo1", "alice/repo2"]
+        assert all(repo.stars == 0 for repo in repositories)
+
+def test_pages_after_the_first_are_fetched_from_the_link_header() -> None:
+    with FakeGitHub() as github:
+        repos_url = github.add_repositories("acme", 350, "orgs")
+
+        session, stats = create_session(workers=4)
+        with session:
+            repositories = scan_repositories(session, repos_url, False, TokenPool(["token"]), 4)
+
+        assert sorted(repo.stars for repo in repositories) == list(range(350))
+        assert sorted(path for path, _ in github.requests) == [f"/orgs/acme/repos?per_page=100&page={page}&type=owner" for page in range(1, 5)]
+
+def test_stream_user_lists_repositories_as_they_are_consumed() -> None:
+    with FakeGitHub() as github:
+        github.add_user("alice", 120, {"acme": 30})
+
+        streamed = stream_user("alice", False, True, [], TokenPool(["token"]), 4, api_url=github.url)
+        assert streamed is not None
+        user, repositories = streamed
+        assert user.name == "alice" and user.repositories == []
+        assert [path for path, _ in github.requests] == ["/users/alice"]
+
+        assert sorted(repo.name for repo in repositories) == sorted([f"alice/repo{i}" for i in range(120)] + [f"acme/repo{i}" for i in range(30)])
+
+def test_org_repositories_without_commits_by_the_target_are_left_out() -> None:
+    with FakeGitHub() as github:
+        github.add_user("alice", 2, {"acme": 120})
+        for i in range(119):
+            github.contributors[f"acme/repo{i}"] = set()
+        github.contributors["acme/repo1"] = {"U_alice"}
+        github.contributors["acme/repo2"] = {"alice@old-job.example.com"}
+        # acme/repo119 can't be checked, so it is kept
+
+        streamed = stream_user(
+            "alice", False, True, [], TokenPool(["token"]), 4,
+            filter_org_repositories=True,
+            api_url=github.url,
+            known_emails=["alice@old-job.example.com"]
+        )
+        assert streamed is not None
+        _, repositories = streamed
+
+        assert sorted(repo.name for repo in repositories) == ["acme/repo1", "acme/repo119", "acme/repo2", "alice/repo0", "alice/repo1"]
+
+    # 120 repositories are checked in 3 queries
+    assert len([path for path, _ in github.requests if path == "/graphql"]) == 3
+
+def test_org_repositories_are_kept_when_their_check_fails(monkeypatch: pytest.MonkeyPatch) -> None:
+    check_contributions = GitHubGraphQL.check_contributions
+
+    def failing_check_contributions(session, graphql_url, batch, *args):
+        if batch[0].name == "acme/repo0":
+            raise ValueError("malformed GraphQL response")
+        return check_contributions(session, graphql_url, batch, *args)
+
+    monkeypatch.setattr(GitHubGraphQL, "check_contributions", failing_check_contributions)
+
+    with FakeGitHub() as github:
+        github.add_user("alice", 0, {"acme": 60})
+        for i in range(60):
+            github.contributors[f"acme/repo{i}"] = set()
+
+        streamed = stream_user("alice", False, True, [], TokenPool(["token"]), 4, filter_org_repositories=True, api_url=github.url)
+        assert streamed is not None
+        _, repositories = streamed
+
+        # The first batch of 50 couldn't be checked, the other 10 were checked and left out
+        assert sorted(repo.name for repo in repositories) == sorted(f"acme/repo{i}" for i in range(50))
+
+def test_anonymous_runs_do_not_filter_org_repositories() -> None:
+    with FakeGitHub() as github:
+        github.add_user("alice", 0, {"acme": 3})
+
+        streamed = stream_user("alice", False, True, [], TokenPool([]), 4, filter_org_repositories=True, api_url=github.url)
+        assert streamed is not None
+        _, repositories = streamed
+
+        assert len(list(repositories)) == 3
+        assert all(path != "/graphql" for path, _ in github.requests)
+
+def endless_repositories(owner: str, produced: dict[str, int], closed: list[str]):
+    try:
+        while True:
+            produced[owner] = produced.get(owner, 0) + 1
+            yield RepositoryInformation(f"{owner}/repo{produced[owner]}", None, None, 0, 0, 0, "")
+    finally:
+        closed.append(owner)
+
+def test_merged_streams_stop_once_the_consumer_goes_away() -> None:
+    produced: dict[str, int] = {}
+    closed: list[str] = []
+
+    merged = merge_iterators([endless_repositories(owner, produced, closed) for owner in ("alice", "acme")], 2)
+    assert len([next(merged) for _ in range(5)]) == 5
+    merged.close()
+
+    assert sorted(closed) == ["acme", "alice"]
+    assert sum(produced.values()) <= 5 + 2 * PAGE_SIZE + 2 # Never more than the queue holds ahead
+
+def test_failed_visit_closes_the_repository_stream() -> None:
+    class FailingPipeline:
+        def submit(self, repo_info, commit_source=None):
+            raise RuntimeError("the pipeline is closed")
+
+    closed: list[str] = []
+    user = User(1001, "alice", "alice", None, None, None, None, 0, 0, 2)
+
+    with pytest.raises(RuntimeError):
+        visit_repositories(user, 1, False, repositories=endless_repositories("alice", {}, closed), pipeline=FailingPipeline())
+
+    assert closed == ["alice"]
@@ -0,0 +1,88 @@
+from pathlib import Path
+from typing import Optional
+
+import pytest
+import os
+
+from githunt.GitProviders import GitHub
+from githunt.GitProviders.GitHub import create_session, last_page_number, scan_repositories
+from githunt.HttpCache import HttpCache
+from githunt.GitProviders.TokenPool import TokenPool
+
+from tests.helpers import FakeGitHub
+
+def scan(repos_url: str, cache: HttpCache, token: Optional[str]) -> list[int]:
+    session, stats = create_session(4, http_cache=cache)
+    with session:
+        repositories = scan_repositories(session, repos_url, False, TokenPool([token] if token else []), 4, fetch_details=True)
+        assert stats.status_counts == {200: len(repositories) + 1}
+
+    return sorted(repo.stars for repo in repositories)
+
+def test_unchanged_responses_are_revalidated(tmp_path: Path) -> None:
+    cache = HttpCache(str(tmp_path))
+
+    with FakeGitHub() as github:
+        repos_url = github.add_repositories("alice", 5, missing_fields=("homepage",))
+        assert scan(repos_url, cache, "token") == list(range(5))
+        assert (cache.stored, cache.revalidated) == (6, 0)
+
+        github.routes["/repos/alice/repo0"]["stargazers_count"] = 42
+        assert scan(repos_url, cache, "token") == [1, 2, 3, 4, 42]
+        assert (cache.stored, cache.revalidated) == (7, 5)
+
+        # Responses are shared between tokens, so that rotating them doesn't miss the cache
+        assert scan(repos_url, cache, "other token") == [1, 2, 3, 4, 42]
+        assert (cache.stored, cache.revalidated) == (7, 11)
+
+        # but not with anonymous requests
+        assert scan(repos_url, cache, None) == [1, 2, 3, 4, 42]
+        assert (cache.stored, cache.revalidated) == (13, 11)
+
+def test_expired_and_oversized_entries_are_evicted(tmp_path: Path) -> None:
+    cache = HttpCache(str(tmp_path), ttl_hours=1, max_size_mb=0)
+    cache.store("old", "https://example.com/old", '"a"', None, b"{}")
+    cache.store("new", "https://example.com/new", '"b"', None, b"{}")
+
+    os.utime(cache.entry_path("old"), (0, 0))
+    assert cache.load("old") is None
+    assert cache.load("new") is not None
+
+    cache.evict()
+    assert os.listdir(tmp_path) == []
+
+def test_cached_listings_keep_their_page_count(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = HttpCache(str(tmp_path))
+    page_counts: list[Optional[int]] = []
+
+    def recorded_last_page_number(links, repository_count=None):
+        page_counts.append(last_page_number(links, repository_count))
+        return page_counts[-1]
+
+    monkeypatch.setattr(GitHub, "last_page_number", recorded_last_page_number)
+
+    with FakeGitHub() as github:
+        repos_url = github.add_repositories("acme", 350, "orgs")
+        for _ in range(2):
+            session, stats = create_session(4, http_cache=cache)
+            with session:
+                assert len(scan_repositories(session, repos_url, False, TokenPool(["token"]), 4)) == 350
+
+    # The second scan is served from the cache (the fake API sends no `Link` on a 304), and still fetches pages 2 to 4 at once
+    assert cache.revalidated == 4
+    assert page_counts == [4, 4]
+
+def test_concurrent_evictions_skip_removed_entries(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = HttpCache(str(tmp_path), ttl_hours=1, max_size_mb=0)
+    for key in ("old", "new"):
+        cache.store(key, f"https://example.com/{key}", '"a"', None, b"{}")
+    os.utime(cache.entry_path("old"), (0, 0))
+
+    remove = os.remove
+    def remove_concurrently(path: str) -> None:
+        remove(path) # Another process gets there first
+        remove(path)
+
+    monkeypatch.setattr(os, "remove", remove_concurrently)
+    cache.evict()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,103 @@
+from datetime import datetime, timezone
+
+import pytest
+import re
+
+from githunt.Classes.Identity import Identity
+from githunt.Classes.User import User
+from githunt.RepositoriesVisitor import build_identity_table, expand_identities
+from githunt.Utils import matching_substrings, names_equivalent_guess
+
+def identity(name: str, email: str, day: int, is_signed: bool = False) -> Identity:
+    result = Identity(name, email)
+    result.add_commit(datetime(2024, 1, day, tzinfo=timezone.utc), is_signed)
+    return result
+
+def repository_tables() -> list[dict[tuple[str, str], Identity]]:
+    # Tables are listed so that most discoveries come after the identities they unlock
+    other_repository = [
+        identity("A. Smith", "asmith@old.example.com", 5), # Email of an alias found through another email
+        identity("A. Smith", "ally@home.example.com", 4), # Strong alias of an email found through an alias
+        identity("ally", "ally@home.example.com", 3), # Email of an alias, matched whatever its case
+        identity("Bob", "bob@example.com", 7),
+        identity("alice", "12345+bob@users.noreply.github.com", 8), # Someone else's GitHub generated email
+    ]
+    own_repository = [
+        identity("Ally", "alice@work.example.com", 2, is_signed=True), # Strong alias of an email found in this very table
+        identity("alice", "alice@work.example.com", 1),
+        identity("Alice B Smith", "abs@example.com", 6), # Weak alias of the display name
+    ]
+
+    return [{item.key: item for item in table} for table in (other_repository, own_repository)]
+
+def make_user() -> User:
+    return User(1001, "alice", "Alice Smith", None, None, None, None, 0, 0, 2)
+
+def fixed_point_expansion(identities: list[Identity], user: User, alias_based_inference: bool) -> tuple[set[str], list[str]]:
+    """
+    The expansion identities went through before the worklist: passes over every commit until nothing changes
+    """
+
+    generated_email_pattern = re.compile(rf"^(?!{user.id}\+)\d+\+[A-Za-z0-9-\[\]]+@users\.noreply\.github\.com$")
+    emails = {f"{user.id}+{user.name}@users.noreply.github.com"}
+    aliases = [user.name]
+
+    changed = True
+    while changed:
+        changed = False
+        for item in identities:
+            matching_strict_name = any(alias.strip().lower() == item.name.strip().lower() for alias in aliases)
+            matching_strict_email = any(email.strip() == item.email.strip() for email in emails)
+
+            is_github_generated = generated_email_pattern.match(item.email)
+            if matching_strict_name and item.email not in emails and ((not is_github_generated) or item.email.split("+")[0] == str(user.id)):
+                emails.add(item.email)
+                changed = True
+
+            if item.name in aliases:
+                continue
+
+            if matching_strict_email or (alias_based_inference and len(item.name) > 3 and any(
+                names_equivalent_guess(user_name, item.name) or matching_substrings(user_name, item.name)
+                for user_name in (user.name, user.displayname)
+            )):
+                aliases.append(item.name)
+                changed = True
+
+    return emails, aliases
+
+@pytest.mark.parametrize("alias_based_inference", [True, False])
+def test_worklist_reaches_the_fixed_point(alias_based_inference: bool) -> None:
+    user = make_user()
+    identities = build_identity_table(repository_tables())
+    expand_identities(identities, user, alias_based_inference)
+
+    emails, aliases = fixed_point_expansion(build_identity_table(repository_tables()), make_user(), alias_based_inference)
+    assert user.git_data.emails == emails
+    assert sorted(alias.name for alias in user.git_data.aliases) == sorted(aliases)
+
+def test_expansion_chains_emails_and_aliases_across_repositories() -> None:
+    user = make_user()
+    expand_identities(build_identity_table(repository_tables()), user, True)
+
+    assert user.git_data.emails == {
+        "1001+alice@users.noreply.github.com",
+        "alice@work.example.com",
+        "ally@home.example.com",
+        "asmith@old.example.com",
+        "abs@example.com",
+    }
+    # Aliases are told apart by their exact name, while names are matched whatever their case
+    assert sorted(alias.name for alias in user.git_data.aliases) == ["A. Smith", "Alice B Smith", "Ally", "alice", "ally"]
+    assert user.git_data.get_alias("Ally").is_signed
+
+    # Each commit of the target counts once, whichever pass found its email
+    assert sorted(timestamp.day for timestamp in user.git_data.timestamps) == [1, 2, 3, 4, 5, 6]
+
+def test_weak_aliases_need_alias_based_inference() -> None:
+    user = make_user()
+    expand_identities(build_identity_table(repository_tables()), user, False)
+
+    assert "abs@example.com" not in user.git_data.emails
+    assert sorted(alias.name for alias in user.git_data.aliases) == ["A. Smith", "Ally", "alice", "ally"]
+    assert sorted(timestamp.day for timestamp in user.git_data.timestamps) == [1, 2, 3, 4, 5]
@@ -0,0 +1,34 @@
+from datetime import datetime, timezone, timedelta
+from zoneinfo import available_timezones
+from pathlib import Path
+
+import random
+import pytest
+
+from githunt.Analysis.LocalHours import local_hours_numpy, local_hours_python
+from githunt.Analysis.TimezoneIndex import load_timezone_index
+
+def test_numpy_hours_match_python_hours(tmp_path: Path) -> None:
+    pytest.importorskip("numpy")
+
+    generator = random.Random(0)
+    timestamps = [
+        datetime.fromtimestamp(
+            generator.randint(-500_000_000, 3_000_000_000),
+            timezone(timedelta(minutes=generator.choice([-300, 0, 60, 330, 540, 765])))
+        )
+        for _ in range(2000)
+    ]
+    timestamps.append(datetime(2021, 3, 28, 1, 30)) # Naive timestamps are assumed to be UTC
+
+    tz_names = sorted(available_timezones())[::7] + ["Not/AZone"]
+    index = load_timezone_index(str(tmp_path / "timezone_index.pickle"))
+
+    python_hours = local_hours_python(timestamps, tz_names)
+    numpy_hours = local_hours_numpy(timestamps, tz_names, index)
+
+    assert python_hours.keys() == numpy_hours.keys()
+    for tz_name, hours in python_hours.items():
+        assert list(numpy_hours[tz_name]) == hours, tz_name
+
+    assert python_hours["Not/AZone"] == [-1] * len(timestamps)
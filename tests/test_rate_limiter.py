@@ -0,0 +1,53 @@
+import time
+
+from githunt.GitProviders.GitHub import create_session, scan_repositories
+from githunt.GitProviders.RateLimiter import RateLimiter
+from githunt.GitProviders.TokenPool import TokenPool
+
+from tests.helpers import FakeGitHub
+
+def test_bucket_paces_requests_past_the_burst() -> None:
+    limiter = RateLimiter(rate=10, max_concurrency=4)
+    waits = [limiter.reserve() for _ in range(25)]
+
+    assert waits[:20] == [0.0] * 20
+    assert [round(wait, 1) for wait in waits[20:]] == [0.1, 0.2, 0.3, 0.4, 0.5]
+
+def test_penalties_and_budgets_lower_the_rate() -> None:
+    limiter = RateLimiter(rate=10, max_concurrency=4)
+    limiter.penalize()
+    limiter.penalize()
+    assert limiter.current_rate() == 2.5
+
+    limiter.observe(1.0, "graphql")
+    assert limiter.current_rate("graphql") == 1.0
+    assert limiter.current_rate("core") > 2.5 # Only recovering from the penalties
+
+    for _ in range(100):
+        limiter.observe(None, "core")
+    assert limiter.current_rate("core") == 10
+    assert limiter.current_rate("graphql") == 1.0 # Another resource's responses don't lift its pacing
+
+    limiter.observe(None, "graphql")
+    assert limiter.current_rate("graphql") == 10
+
+def test_low_budget_only_paces_its_resource() -> None:
+    limiter = RateLimiter(rate=100, max_concurrency=4)
+    limiter.observe(2.0, "graphql")
+
+    assert [limiter.reserve("core") for _ in range(10)] == [0.0] * 10
+    assert [round(limiter.reserve("graphql"), 1) for _ in range(3)] == [0.0, 0.5, 1.0]
+
+def test_secondary_rate_limit_is_retried_with_backoff(fast_rate_limiter: RateLimiter) -> None:
+    with FakeGitHub() as github:
+        repos_url = github.add_repositories("alice", 3)
+        github.secondary_limits = 1
+
+        session, _ = create_session(workers=2)
+        with session:
+            started = time.monotonic()
+            repositories = scan_repositories(session, repos_url, False, TokenPool(["token"]), 2)
+
+        assert len(repositories) == 3
+        assert time.monotonic() - started >= 1
+        assert fast_rate_limiter.penalty_count == 1
@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import pytest
+import shutil
+
+from githunt.Classes.RepositoryInformation import RepositoryInformation
+from githunt.RepositoriesVisitor import RepositoryPipeline, summarize_repository
+
+import githunt.RepositoriesVisitor as RepositoriesVisitor
+from githunt.ScanStore import ScanStore
+
+from tests.helpers import add_commit, git, make_source_repository, make_repository_information
+
+def scan(store: ScanStore, repo_info: RepositoryInformation):
+    pipeline = RepositoryPipeline(1, store=store)
+    try:
+        return pipeline.submit(repo_info).result()
+    finally:
+        pipeline.close()
+
+def test_rescan_only_walks_new_commits(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    source = make_source_repository(tmp_path / "source")
+    repo_info = make_repository_information(source)
+    store = ScanStore(str(tmp_path / "store.sqlite3"))
+
+    first = scan(store, repo_info)
+    assert first.commit_count == 3 and first.head_sha == git(source, "rev-parse", "HEAD")
+
+    add_commit(source, "Alice Smith", "alice@example.com", "2024-01-04T10:00:00-0500")
+    clone = tmp_path / "clone"
+    git(tmp_path, "clone", "-q", "--bare", str(source), str(clone))
+    incremental = summarize_repository(str(clone), repo_info, first.head_sha)
+    assert incremental.since_sha == first.head_sha and incremental.commit_count == 1
+
+    # The pipeline's extraction must only walk the new commit too
+    extractions = []
+    clone_stage = RepositoriesVisitor.clone_stage
+
+    def spied_clone_stage(*arguments):
+        extraction_future = clone_stage(*arguments)
+        extractions.append(extraction_future.result())
+        return extraction_future
+
+    monkeypatch.setattr(RepositoriesVisitor, "clone_stage", spied_clone_stage)
+    second = scan(store, repo_info)
+    assert [(extraction.since_sha, extraction.commit_count) for extraction in extractions] == [(first.head_sha, 1)]
+
+    identity = second.identities[("Alice Smith", "alice@example.com")]
+    assert second.commit_count == identity.commit_count == 4
+    assert sorted(timestamp.isoformat() for timestamp in identity.timestamps)[-1] == "2024-01-04T10:00:00-05:00"
+
+    stored, _ = store.load_repository(repo_info)
+    assert stored.head_sha == git(source, "rev-parse", "HEAD") and stored.commit_count == 4
+    store.close()
+
+def test_unpushed_repository_is_not_cloned(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    source = make_source_repository(tmp_path / "source")
+    repo_info = make_repository_information(source)
+    repo_info.pushed_at = "2024-01-03T08:00:00Z"
+    store = ScanStore(str(tmp_path / "store.sqlite3"))
+
+    assert scan(store, repo_info).commit_count == 3
+
+    shutil.rmtree(source) # Any clone would now fail
+    assert scan(store, repo_info).commit_count == 3
+    store.close()
+
+def test_failed_clone_falls_back_to_the_stored_summary(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    source = make_source_repository(tmp_path / "source")
+    repo_info = make_repository_information(source)
+    store = ScanStore(str(tmp_path / "store.sqlite3"))
+
+    assert scan(store, repo_info).commit_count == 3
+
+    repo_info.pushed_at = "2024-01-05T08:00:00Z" # Pushed to since, so it gets cloned again
+    shutil.rmtree(source)
+    assert scan(store, repo_info).commit_count == 3
+    store.close()
+
+def test_rewritten_history_is_scanned_in_full(tmp_path: Path) -> None:
+    source = make_source_repository(tmp_path / "source")
+    summary = summarize_repository(str(source), make_repository_information(source), "0" * 40)
+
+    assert summary.since_sha is None and summary.commit_count == 3
+
+def test_user_report_round_trips(tmp_path: Path) -> None:
+    store = ScanStore(str(tmp_path / "store.sqlite3"))
+    store.save_user({"username": "Alice", "id": 1001, "emails": ["alice@example.com"]})
+
+    stored = store.load_user("alice")
+    assert stored is not None and stored[0]["emails"] == ["alice@example.com"]
+    store.close()
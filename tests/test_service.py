@@ -0,0 +1,183 @@
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from threading import Event, Thread
+from pathlib import Path
+
+import subprocess
+import pytest
+import signal
+import json
+import time
+import sys
+
+from githunt.Classes.ScanOptions import ScanOptions
+from githunt.CloneCache import CloneCache
+from githunt.GitProviders.TokenPool import TokenPool
+from githunt.RepositoriesVisitor import RepositoryPipeline
+from githunt.Scanner import Scanner
+from githunt.Service import Service, create_server
+
+from tests.helpers import FakeGitHub, add_commit, make_source_repository, make_repository_information
+
+def post_job(url: str, payload: dict) -> dict:
+    request = Request(f"{url}/jobs", json.dumps(payload).encode(), {"Content-Type": "application/json"}, method="POST")
+    with urlopen(request) as response:
+        assert response.status == 202
+        return json.load(response)
+
+def test_job_runs_and_streams_progress(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    source = make_source_repository(tmp_path / "source")
+
+    with FakeGitHub() as github:
+        github.add_user("alice", 1, {})
+        github.routes["/users/alice/repos?per_page=100&page=1&type=owner"][0]["clone_url"] = source.resolve().as_uri()
+
+        options = ScanOptions(False, True, [], False, True, False, 5, True, False, 2, None)
+        scanner = Scanner(options, TokenPool(["token"]), api_url=github.url)
+        service = Service(scanner, 1, 4)
+        server = create_server(service, "127.0.0.1", 0)
+        Thread(target=server.serve_forever, daemon=True).start()
+        service.start()
+        url = f"http://127.0.0.1:{server.server_port}"
+
+        try:
+            job = post_job(url, {"username": "alice"})
+            assert job["status"] in ("queued", "running")
+
+            with urlopen(f"{url}/jobs/{job['id']}/events") as response:
+                stages = [json.loads(line)["stage"] for line in response]
+
+            with urlopen(f"{url}/jobs/{job['id']}") as response:
+                job = json.load(response)
+
+        finally:
+            server.shutdown()
+            server.server_close()
+            service.close()
+            scanner.close()
+
+    assert stages == ["querying", "visiting", "repository", "analyzing", "done"]
+    assert job["status"] == "done"
+    assert job["result"]["repository_count"] == 1
+    assert "alice@example.com" in job["result"]["emails"]
+
+def test_full_queue_refuses_jobs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+
+    options = ScanOptions(False, True, [], False, True, False, 5, True, False, 1, None)
+    scanner = Scanner(options, TokenPool([]))
+    service = Service(scanner, 1, 1) # Never started, so that jobs stay queued
+    server = create_server(service, "127.0.0.1", 0)
+    Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        post_job(url, {"username": "alice"})
+        with pytest.raises(HTTPError) as error:
+            post_job(url, {"username": "bob"})
+        assert error.value.code == 503
+
+        with pytest.raises(HTTPError) as error:
+            post_job(url, {})
+        assert error.value.code == 400
+
+        with urlopen(f"{url}/health") as response:
+            assert json.load(response)["queued"] == 1
+
+    finally:
+        server.shutdown()
+        server.server_close()
+        scanner.close()
+
+def test_close_cancels_queued_jobs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+
+    options = ScanOptions(False, True, [], False, True, False, 5, True, False, 1, None)
+    scanner = Scanner(options, TokenPool([]))
+    scanned: list[str] = []
+    resume = Event()
+
+    def scan(username, on_progress=None):
+        scanned.append(username)
+        resume.wait(timeout=60)
+        return None
+
+    monkeypatch.setattr(scanner, "scan", scan)
+    service = Service(scanner, 1, 2)
+    service.start()
+
+    try:
+        running = service.submit("alice")
+        while not scanned:
+            time.sleep(0.01)
+        queued = [service.submit("bob"), service.submit("carol")] # Fills the queue
+
+        closing = Thread(target=service.close)
+        closing.start()
+        for job in queued:
+            deadline = time.monotonic() + 30
+            while not job.is_finished and time.monotonic() < deadline:
+                time.sleep(0.01)
+        assert service.submit("dave") is None
+
+        resume.set()
+        closing.join(timeout=30)
+        assert not closing.is_alive()
+
+    finally:
+        resume.set()
+        scanner.close()
+
+    assert scanned == ["alice"]
+    assert running.is_finished
+    assert [job.status for job in queued] == ["failed", "failed"]
+    assert all("cancelled" in job.error for job in queued)
+
+def test_expired_summary_fetches_cached_clone_again(tmp_path: Path) -> None:
+    source = make_source_repository(tmp_path / "source")
+    repo_info = make_repository_information(source)
+    pipeline = RepositoryPipeline(1, CloneCache(str(tmp_path / "cache")), summary_ttl=0)
+
+    try:
+        assert pipeline.submit(repo_info).result().commit_count == 3
+
+        add_commit(source, "Alice Smith", "alice@example.com", "2024-01-04T10:00:00+0200")
+        assert pipeline.submit(repo_info).result().commit_count == 4
+    finally:
+        pipeline.close()
+
+SERVE_SCRIPT = """
+import sys
+
+from githunt.Service import serve
+
+class RecordingService:
+    def start(self) -> None:
+        pass
+
+    def close(self) -> None:
+        with open(sys.argv[1], "w") as marker:
+            marker.write("closed")
+
+serve(RecordingService(), "127.0.0.1:0")
+"""
+
+def test_sigterm_closes_the_service(tmp_path: Path) -> None:
+    marker = tmp_path / "closed"
+    process = subprocess.Popen([sys.executable, "-c", SERVE_SCRIPT, str(marker)], stderr=subprocess.PIPE, text=True)
+    assert process.stderr
+
+    try:
+        for line in process.stderr:
+            if "Serving the githunt API" in line:
+                break
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stderr.close()
+
+    assert marker.read_text() == "closed"
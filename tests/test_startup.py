@@ -0,0 +1,61 @@
+import subprocess
+import sys
+import os
+
+# Modules which only the subsystems that need them may import
+HEAVY_MODULES = ["requests", "urllib3", "git", "numpy", "pytz", "countryinfo", "countryflag", "githunt.GitProviders.GitHub", "githunt.RepositoriesVisitor", "githunt.Analysis.CountryDetectionAlgorithm"]
+
+# Cumulative import time of `githunt.main`, in microseconds (overridable for slow machines)
+IMPORT_BUDGET_US = int(os.environ.get("GITHUNT_IMPORT_BUDGET_US", 250_000))
+
+HELP_SCRIPT = """
+import sys
+sys.argv = ["githunt", "--help"]
+
+from githunt.main import main
+try:
+    main()
+except SystemExit:
+    pass
+
+print(" ".join(sorted(sys.modules)), file=sys.stderr)
+"""
+
+def import_times(stderr: str) -> dict[str, int]:
+    times: dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+
+    return times
+
+def test_help_does_not_import_heavy_modules() -> None:
+    result = subprocess.run([sys.executable, "-c", HELP_SCRIPT], capture_output=True, text=True, check=True)
+    assert "usage:" in result.stdout
+
+    loaded_modules = set(result.stderr.split())
+    assert loaded_modules.isdisjoint(HEAVY_MODULES), loaded_modules.intersection(HEAVY_MODULES)
+
+def test_import_time_within_budget() -> None:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import githunt.main"], capture_output=True, text=True, check=True)
+    times = import_times(result.stderr)
+
+    assert times["githunt.main"] <= IMPORT_BUDGET_US, f"githunt.main imported in {times['githunt.main']}us (budget {IMPORT_BUDGET_US}us)"
+
+CACHE_SWITCH_SCRIPT = """
+from githunt.CliParser import parser
+from githunt.main import apply_cache_switch
+
+for extra_arguments in ([], ["--no-http-cache"], ["--no-cache"]):
+    args = parser.parse_args(["--host", "github", "-u", "alice", *extra_arguments])
+    apply_cache_switch(args)
+    print(args.use_clone_cache, args.use_http_cache, args.use_store)
+"""
+
+def test_no_cache_turns_off_every_persistent_cache() -> None:
+    result = subprocess.run([sys.executable, "-c", CACHE_SWITCH_SCRIPT], capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines() == ["True True True", "True False True", "False False False"]
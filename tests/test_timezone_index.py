@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo, available_timezones
+from pathlib import Path
+
+import random
+
+from githunt.Analysis import TimezoneIndex
+from githunt.Analysis.TimezoneIndex import load_timezone_index
+
+def test_index_matches_zoneinfo(tmp_path: Path) -> None:
+    index = load_timezone_index(str(tmp_path / "timezone_index.pickle"))
+    zones = sorted(available_timezones())
+    generator = random.Random(0)
+
+    for _ in range(100):
+        utc_seconds = generator.randint(-1_000_000_000, 3_000_000_000)
+        utc = datetime.fromtimestamp(utc_seconds, timezone.utc)
+
+        expected: dict[int, set[str]] = {}
+        for zone in zones:
+            offset = utc.astimezone(ZoneInfo(zone)).utcoffset()
+            assert offset is not None
+            expected.setdefault(int(offset.total_seconds()), set()).add(zone)
+
+        for offset_seconds, expected_zones in expected.items():
+            assert set(index.zones_matching(utc_seconds, offset_seconds)) == expected_zones
+
+def test_index_is_loaded_from_disk_cache(tmp_path: Path, monkeypatch) -> None:
+    cache_path = tmp_path / "timezone_index.pickle"
+    monkeypatch.setattr(TimezoneIndex, "timezone_index", None)
+    built_index = load_timezone_index(str(cache_path))
+    assert cache_path.exists()
+
+    monkeypatch.setattr(TimezoneIndex, "timezone_index", None)
+    monkeypatch.setattr(TimezoneIndex.TimezoneIndex, "build", None) # Any rebuild would now fail
+    loaded_index = load_timezone_index(str(cache_path))
+
+    assert loaded_index is not built_index
+    assert loaded_index.segments == built_index.segments
+
+def test_zone_files_are_fingerprinted_once_per_process(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(TimezoneIndex, "timezone_index", None)
+    index = load_timezone_index(str(tmp_path / "timezone_index.pickle"))
+
+    monkeypatch.setattr(TimezoneIndex, "zones_fingerprint", None) # Any fingerprinting would now fail
+    assert load_timezone_index(str(tmp_path / "timezone_index.pickle")) is index
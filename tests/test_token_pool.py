@@ -0,0 +1,40 @@
+import time
+
+from githunt.GitProviders.GitHub import create_session, scan_repositories
+from githunt.GitProviders.TokenPool import TokenPool
+
+from tests.helpers import FakeGitHub
+
+def test_requests_go_to_the_token_with_most_budget() -> None:
+    pool = TokenPool(["first-token-0000", "second-token-0000"])
+    first, second = pool.states
+
+    reset = str(int(time.time()) + 3600)
+    pool.update(first, "core", {"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": reset})
+    pool.update(second, "core", {"X-RateLimit-Remaining": "3", "X-RateLimit-Reset": reset})
+
+    # Once both have the same budget left, they alternate
+    assert [pool.acquire().token for _ in range(10)] == ["first-token-0000"] * 8 + ["second-token-0000", "first-token-0000"]
+    assert pool.choose("graphql")[0] is first # Budgets are tracked per resource
+
+    pool.backoff(first, "core", 60)
+    assert pool.acquire().token == "second-token-0000"
+
+def test_drained_token_is_rotated_out_without_sleeping() -> None:
+    with FakeGitHub() as github:
+        repos_url = github.add_repositories("alice", 30, missing_fields=("homepage",))
+        github.token_budgets = {"token drained-token-0000": 0, "token large-token-0000": 1000}
+
+        pool = TokenPool(["drained-token-0000", "large-token-0000"])
+        session, _ = create_session(workers=4)
+        with session:
+            started = time.monotonic()
+            repositories = scan_repositories(session, repos_url, False, pool, 4, fetch_details=True)
+
+        assert time.monotonic() - started < 30
+        assert len(repositories) == 30
+
+        # The drained token is tried first (both budgets are unknown at first), then every request goes to the other one
+        drained, large = pool.states
+        assert drained.rate_limited_count == drained.request_count >= 1
+        assert (large.request_count, large.rate_limited_count) == (31, 0)